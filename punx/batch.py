@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2022, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+validate many files (such as ``punx validate *.nxs``)
+
+Each file is validated by a :class:`~punx.validate.Data_File_Validator`
+(or, for NXDL files, by :func:`~punx.validate.validate_xml`) and is
+summarized by a dictionary (see :func:`validate_file`).  With more than
+one worker, files are validated in a pool of processes.  Each process
+loads the :class:`~punx.nxdl_manager.NXDL_Manager` once, then shares it
+with all the validators of that process.
+
+.. autosummary::
+
+   ~expand_file_names
+   ~validate_file
+   ~validate_files
+   ~summary_table
+   ~exit_code
+
+"""
+
+import collections
+import concurrent.futures
+import glob
+import logging
+import os
+import time
+
+import pyRestTable
+
+from . import finding
+from . import utils
+
+
+HDF5_FILE_EXTENSIONS = ".h5 .hdf .hdf5 .nx .nx5 .nxs .nexus".split()
+NXDL_FILE_EXTENSION = ".nxdl.xml"
+GLOB_CHARACTERS = "*?["
+
+# outcome of validating one file
+OUTCOME_OK = "ok"  # validated, no ERROR findings
+OUTCOME_ERROR = "ERROR"  # validated, with ERROR findings
+OUTCOME_FAILED = "failed"  # could not be validated
+OUTCOMES = (OUTCOME_OK, OUTCOME_ERROR, OUTCOME_FAILED)
+
+# exit codes for CI
+EXIT_OK = 0
+EXIT_ERROR_FINDINGS = 1
+EXIT_FAILED = 2
+
+logger = utils.setup_logger(__name__, logging.INFO)
+
+
+def expand_file_names(names, extensions=None):
+    """
+    Return the list of file names given by ``names``.
+
+    PARAMETERS
+
+    names [str]:
+        File names, directory names, or glob patterns
+        (such as ``data/**/*.nxs``).
+        A directory is searched (including subdirectories) for
+        files with one of the ``extensions``.
+        A file name is kept, even if the file does not exist
+        (validation of that file will fail).
+    extensions [str]:
+        (optional) File name extensions searched in directories.
+        (default: ``HDF5_FILE_EXTENSIONS`` and ``NXDL_FILE_EXTENSION``)
+
+    Each file name is listed once, in the order found.
+    """
+    extensions = tuple(
+        e.lower() for e in (extensions or HDF5_FILE_EXTENSIONS + [NXDL_FILE_EXTENSION])
+    )
+    file_names = []
+    for name in names:
+        if os.path.isdir(name):
+            for path, dirs, files in os.walk(name):
+                dirs.sort()
+                file_names += [
+                    os.path.join(path, f)
+                    for f in sorted(files)
+                    if f.lower().endswith(extensions)
+                ]
+        elif any(c in name for c in GLOB_CHARACTERS):
+            file_names += [
+                f for f in sorted(glob.glob(name, recursive=True)) if os.path.isfile(f)
+            ]
+        else:
+            file_names.append(name)
+    return list(collections.OrderedDict.fromkeys(file_names))
+
+
+def validate_file(
+    file_name, file_set_name=None, incremental=False, records=None, checks=None
+):
+    """
+    Validate one file, return its summary (a dictionary).
+
+    With ``incremental=True``, use the stored findings of a file
+    not changed since its last validation (see :mod:`punx.results_store`).
+    Set ``incremental="content"`` to compare also the file content.
+    With ``records``, a list of status keys (such as ``["ERROR", "WARN"]``),
+    the findings with these statuses are listed as records (see
+    :meth:`~punx.validate.Data_File_Validator.to_records`).
+    With ``checks``, run only these checks (see :mod:`punx.validations`).
+
+    ======== ===========================================================
+    key      value
+    ======== ===========================================================
+    file     ``file_name``
+    outcome  one of ``OUTCOMES``: ``ok``, ``ERROR``, or ``failed``
+    counts   number of findings for each status (such as ``ERROR``)
+    score    average value of the findings (``None`` if none)
+    error    why the file could not be validated (or ``None``)
+    stored   ``True`` if the findings were stored (not validated now)
+    seconds  time to validate the file
+    records  list of findings (only with ``records``)
+    ======== ===========================================================
+
+    Exceptions are not raised but reported in the summary.
+    """
+    from .__init__ import InvalidNxdlFile  # as raised by nxdl_manager
+    from . import HDF5_Open_Error  # as raised by validate
+    from . import results_store
+    from . import validate
+
+    t0 = time.time()
+    summary = collections.OrderedDict()
+    summary["file"] = file_name
+    summary["outcome"] = OUTCOME_OK
+    summary["counts"] = collections.OrderedDict(
+        (s.key, 0) for s in finding.VALID_STATUS_LIST
+    )
+    summary["score"] = None
+    summary["error"] = None
+    summary["stored"] = False
+    if records is not None:
+        summary["records"] = []
+
+    try:
+        if not os.path.isfile(file_name):
+            summary["error"] = "file not found"
+        elif file_name.endswith(NXDL_FILE_EXTENSION):
+            try:
+                validate.validate_xml(file_name)
+            except InvalidNxdlFile as exc:
+                summary["counts"][finding.ERROR.key] += 1
+                summary["error"] = str(exc)
+        else:
+            store = None
+            if incremental:
+                store = results_store.get_results_store(incremental == "content")
+            validator = validate.Data_File_Validator(
+                file_set_name, results_store=store, checks=checks
+            )
+            try:
+                validator.validate(file_name)
+                summary["stored"] = validator.results_from_store
+                for status, count in validator.finding_summary().items():
+                    summary["counts"][status.key] = count
+                if len(validator.validations) > 0:
+                    summary["score"] = validator.finding_score()[-1]
+                if records is not None:
+                    summary["records"] = list(validator.to_records(records))
+            finally:
+                validator.close()
+    except HDF5_Open_Error:
+        summary["error"] = "could not open as HDF5"
+    except Exception as exc:
+        summary["error"] = f"{exc.__class__.__name__}: {exc}"
+
+    if summary["counts"][finding.ERROR.key] > 0:
+        summary["outcome"] = OUTCOME_ERROR
+    elif summary["error"] is not None:
+        summary["outcome"] = OUTCOME_FAILED
+    summary["seconds"] = time.time() - t0
+    return summary
+
+
+def _init_worker(file_set_name):
+    """Load the NXDL_Manager once in each process of the pool."""
+    from . import nxdl_manager
+
+    nxdl_manager.get_manager(file_set_name, lazy=True)  # as Data_File_Validator
+
+
+def validate_files(
+    file_names,
+    file_set_name=None,
+    workers=1,
+    incremental=False,
+    records=None,
+    checks=None,
+):
+    """
+    Validate the files, yield the summary of each (in the same order).
+
+    PARAMETERS
+
+    file_names [str]:
+        Names of the files (see :func:`expand_file_names`).
+    file_set_name str:
+        Name of the NXDL file set. (default: the default file set)
+    workers int:
+        Number of processes.  If 1 (default), validate in this process.
+        If ``None``, as many as :func:`os.cpu_count`.
+    incremental bool or str:
+        Use stored findings of unchanged files, see :func:`validate_file`.
+    records [str]:
+        (optional) List the findings with these status keys,
+        see :func:`validate_file`.
+    checks [str]:
+        (optional) Names of the checks to run. (default: all)
+
+    See :func:`validate_file` for the content of each summary.
+    """
+    if workers == 1:
+        for file_name in file_names:
+            yield validate_file(file_name, file_set_name, incremental, records, checks)
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(file_set_name,),
+    ) as pool:
+        for summary in pool.map(
+            validate_file,
+            file_names,
+            [file_set_name] * len(file_names),
+            [incremental] * len(file_names),
+            [records] * len(file_names),
+            [checks] * len(file_names),
+            chunksize=4,
+        ):
+            yield summary
+
+
+def summary_table(summaries):
+    """
+    Return a table (``pyRestTable.Table``) of the findings of all files.
+
+    One row for each outcome (number of files) and one for each
+    finding status (number of findings, in all files).
+    """
+    outcomes = collections.OrderedDict((k, 0) for k in OUTCOMES)
+    counts = collections.OrderedDict((s.key, 0) for s in finding.VALID_STATUS_LIST)
+    for summary in summaries:
+        outcomes[summary["outcome"]] += 1
+        for k, v in summary["counts"].items():
+            counts[k] += v
+
+    t = pyRestTable.Table()
+    t.labels = ["files or findings", "count", "description"]
+    t.addRow(["files validated", outcomes[OUTCOME_OK], "no ERROR findings"])
+    t.addRow(["files validated", outcomes[OUTCOME_ERROR], "with ERROR findings"])
+    t.addRow(["files failed", outcomes[OUTCOME_FAILED], "could not validate"])
+    t.addRow(["TOTAL files", sum(outcomes.values()), ""])
+    for status in finding.VALID_STATUS_LIST:
+        t.addRow([status.key, counts[status.key], status.description])
+    t.addRow(["TOTAL findings", sum(counts.values()), ""])
+    return t
+
+
+def exit_code(summaries):
+    """
+    Return the exit code for these summaries.
+
+    ====  ========================================================
+    code  meaning
+    ====  ========================================================
+    0     every file validated without ERROR findings
+    1     some file has ERROR findings (or is not a valid NXDL file)
+    2     some file could not be validated (overrides 1)
+    ====  ========================================================
+    """
+    code = EXIT_OK
+    for summary in summaries:
+        if summary["outcome"] == OUTCOME_FAILED:
+            return EXIT_FAILED
+        if summary["outcome"] == OUTCOME_ERROR:
+            code = EXIT_ERROR_FINDINGS
+    return code
@@ -62,6 +62,7 @@ and :mod:`~punx.nxdl_manager`.
 """
 
 import datetime
+import hashlib
 import json
 import os
 import pathlib
@@ -86,6 +87,7 @@ GITHUB_NXDL_BRANCH = "main"
 GITHUB_NXDL_ORGANIZATION = "nexusformat"
 GITHUB_NXDL_REPOSITORY = "definitions"
 INFO_FILE_NAME = "__github_info__.json"
+NXDL_CATEGORIES = "base_classes applications contributed_definitions".split()
 SHORT_SHA_LENGTH = 7
 SOURCE_CACHE_SETTINGS_FILENAME = "punx.ini"
 SOURCE_CACHE_SUBDIR = "cache"
@@ -487,9 +489,9 @@ class NXDL_File_Set(object):
         if (
             len(args) == 1
             and args[0] == "schema_manager"
+            and not self.__schema_manager_loaded__
             and self.path is not None
             and os.path.exists(self.path)
-            and not self.__schema_manager_loaded__
         ):
             from punx import schema_manager
 
@@ -510,6 +512,35 @@ class NXDL_File_Set(object):
             ")"
         )
 
+    def fingerprint(self):
+        """
+        Return a hash describing the current state of the files in this file set.
+
+        The hash is computed from the name, size, and modification time
+        of each XML Schema and NXDL file.  It changes whenever any of these
+        files is added, removed, or modified.  File content is not read.
+        """
+        if self.path is None or not os.path.exists(self.path):
+            raise FileNotFoundError(f"file set not found: {self.path}")
+
+        file_list = [INFO_FILE_NAME, "nxdl.xsd", "nxdlTypes.xsd"]
+        for category in NXDL_CATEGORIES:
+            path = os.path.join(self.path, category)
+            if os.path.exists(path):
+                file_list += [
+                    os.path.join(category, fname)
+                    for fname in sorted(os.listdir(path))
+                    if fname.endswith(".nxdl.xml")
+                ]
+
+        h = hashlib.md5()
+        for fname in file_list:
+            full_name = os.path.join(self.path, fname)
+            if os.path.exists(full_name):
+                st = os.stat(full_name)
+                h.update(f"{fname} {st.st_size} {st.st_mtime_ns}\n".encode("utf8"))
+        return h.hexdigest()
+
     def read_info_file(self, file_name=None):
         if file_name is None and self.ref is None:
             raise ValueError("NXDL_File_Set() does not refer to any files")
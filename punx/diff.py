@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2022, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+compare the findings of two validation runs (such as ``punx diff``)
+
+A run is a file of records, one per finding, as written by
+``punx validate --format jsonl`` (or ``csv``, ``json``, ``parquet``,
+see :mod:`punx.report`)::
+
+    punx validate data/ --format jsonl -o before.jsonl
+    # ... new NXDL file set or new version of punx ...
+    punx validate data/ --format jsonl -o after.jsonl
+    punx diff before.jsonl after.jsonl
+
+Findings are identified by data file and ``key`` (see
+:func:`~punx.finding.finding_key`).  Both runs are read one data file
+at a time: the findings of a data file are matched (hash join by key)
+when that file has been read from both runs.  Runs that list the data
+files in the same order (as ``punx validate`` does) are compared
+keeping only the findings of one data file in memory, in time
+proportional to the number of findings.
+
+=========  ==========================================================
+change     meaning
+=========  ==========================================================
+added      finding only in the new run
+removed    finding only in the old run
+changed    same file and key, different status (or comment)
+=========  ==========================================================
+
+.. autosummary::
+
+   ~read_records
+   ~diff_runs
+   ~diff_text
+
+"""
+
+import collections
+import csv
+import itertools
+import json
+
+from . import finding
+
+
+DIFF_CHANGES = ("added", "removed", "changed")
+DIFF_FIELDS = (
+    "change file h5_address test_name key"
+    " old_status new_status old_comment new_comment"
+).split()
+
+
+def _parquet_records(file_name):
+    try:
+        import pyarrow.parquet
+    except ImportError:
+        raise ValueError("reading Parquet needs the 'pyarrow' package")
+    for batch in pyarrow.parquet.ParquetFile(file_name).iter_batches():
+        yield from batch.to_pylist()
+
+
+def _text_records(file_name, record_format):
+    with open(file_name, newline="") as fp:
+        if record_format == "csv":
+            yield from csv.DictReader(fp)
+        elif record_format == "json":
+            yield from json.load(fp)
+        else:
+            for line in fp:
+                if line.strip():
+                    yield json.loads(line)
+
+
+RUN_FORMATS = {
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".csv": "csv",
+    ".json": "json",
+    ".parquet": "parquet",
+}
+
+
+def read_records(file_name):
+    """
+    Return an iterator of the records (dictionaries) of a run.
+
+    The format is chosen by file extension (see ``RUN_FORMATS``),
+    records are read one at a time (but ``.json``, read at once).
+    A record without ``key`` is given one.
+    """
+    extension = "." + file_name.rsplit(".", 1)[-1].lower()
+    record_format = RUN_FORMATS.get(extension)
+    if record_format is None:
+        choices = ", ".join(RUN_FORMATS)
+        raise ValueError(f"unknown format of run '{file_name}', use: {choices}")
+    if record_format == "parquet":
+        records = _parquet_records(file_name)
+    else:
+        records = _text_records(file_name, record_format)
+    return _with_keys(records)
+
+
+def _with_keys(records):
+    for record in records:
+        if not record.get("key"):
+            record["key"] = finding.finding_key(
+                record["h5_address"], record["test_name"]
+            )
+        yield record
+
+
+def _difference(change, old, new):
+    record = old or new
+    return collections.OrderedDict(
+        change=change,
+        file=record["file"],
+        h5_address=record["h5_address"],
+        test_name=record["test_name"],
+        key=record["key"],
+        old_status=None if old is None else old["status"],
+        new_status=None if new is None else new["status"],
+        old_comment=None if old is None else old["comment"],
+        new_comment=None if new is None else new["comment"],
+    )
+
+
+def _diff_file(old_records, new_records, counts, compare_comment):
+    """differences of the findings of one data file (hash join by key)"""
+
+    def value(record):
+        if compare_comment:
+            return record["status"], record["comment"]
+        return record["status"]
+
+    old_by_key = collections.defaultdict(list)
+    for record in old_records:
+        old_by_key[record["key"]].append(record)
+
+    new_unmatched = []
+    for record in new_records:
+        candidates = old_by_key.get(record["key"], [])
+        for i, old in enumerate(candidates):
+            if value(old) == value(record):
+                del candidates[i]
+                counts["unchanged"] += 1
+                break
+        else:
+            new_unmatched.append(record)
+
+    for record in new_unmatched:
+        candidates = old_by_key.get(record["key"])
+        if candidates:
+            counts["changed"] += 1
+            yield _difference("changed", candidates.pop(0), record)
+        else:
+            counts["added"] += 1
+            yield _difference("added", None, record)
+    for candidates in old_by_key.values():
+        for old in candidates:
+            counts["removed"] += 1
+            yield _difference("removed", old, None)
+
+
+def diff_runs(old_records, new_records, counts=None, compare_comment=True):
+    """
+    Yield the differences between two runs, one at a time.
+
+    Each difference is a dictionary (see ``DIFF_FIELDS``).
+
+    PARAMETERS
+
+    old_records, new_records [dict]:
+        Records of the runs (such as from :func:`read_records`),
+        the records of each data file one after another.  Records of
+        a data file that appear again before the file is compared are
+        merged.  Raises ``ValueError`` if they appear again after
+        the file was compared (such as in runs concatenated
+        from several runs of the same files).
+    counts dict:
+        (optional) Counted here: number of ``added``, ``removed``,
+        ``changed``, and ``unchanged`` findings.
+    compare_comment bool:
+        If ``False``, a finding with a new comment but the same status
+        is not changed.  (default: ``True``)
+    """
+    if counts is None:
+        counts = collections.Counter()
+
+    def by_file(records):
+        return itertools.groupby(records, key=lambda record: record["file"])
+
+    # data files read from one run, waiting for the other run
+    pending_old, pending_new = {}, {}
+    compared = set()  # data files compared already
+    for old, new in itertools.zip_longest(by_file(old_records), by_file(new_records)):
+        for run, group, pending in (("old", old, pending_old), ("new", new, pending_new)):
+            if group is None:
+                continue
+            if group[0] in compared:
+                raise ValueError(
+                    f"records of data file '{group[0]}' are not one after"
+                    f" another in the {run} run"
+                )
+            pending.setdefault(group[0], []).extend(group[1])
+        names = [group[0] for group in (old, new) if group is not None]
+        for fname in dict.fromkeys(names):
+            if fname not in pending_old or fname not in pending_new:
+                continue
+            compared.add(fname)
+            yield from _diff_file(
+                pending_old.pop(fname),
+                pending_new.pop(fname),
+                counts,
+                compare_comment,
+            )
+
+    for fname, records in pending_old.items():  # data file not in new run
+        yield from _diff_file(records, [], counts, compare_comment)
+    for fname, records in pending_new.items():  # data file not in old run
+        yield from _diff_file([], records, counts, compare_comment)
+
+
+def diff_text(difference):
+    """Return one line of text describing this difference."""
+    d = difference
+    where = f"{d['file']} {d['h5_address']} [{d['test_name']}]"
+    if d["change"] == "added":
+        return f"+ {where} {d['new_status']}: {d['new_comment']}"
+    if d["change"] == "removed":
+        return f"- {where} {d['old_status']}: {d['old_comment']}"
+    text = f"~ {where} {d['old_status']} -> {d['new_status']}: {d['new_comment']}"
+    if d["old_comment"] != d["new_comment"]:
+        text += f" (was: {d['old_comment']})"
+    return text
@@ -14,12 +14,17 @@ document each item during validation
 .. autosummary::
 
    ~Finding
+   ~Findings
    ~VALID_STATUS_DICT
+   ~report_sort_key
+   ~finding_key
 
 """
 
 
+import array
 import hashlib
+import numpy
 
 
 class ValidationResultStatus(object):
@@ -67,11 +72,49 @@ VALID_STATUS_DICT = {str(f): f for f in VALID_STATUS_LIST}
 
 TF_RESULT = {True: OK, False: ERROR}
 
+STATUS_CODE = {status: code for code, status in enumerate(VALID_STATUS_LIST)}
+"""integer code (index in ``VALID_STATUS_LIST``) of each status"""
+
+STATUS_VALUES = numpy.array([status.value for status in VALID_STATUS_LIST])
+"""value of each status, indexed by status code"""
+
+REPORT_SORT_MAX_BYTES = 256 * 1024 * 1024
+"""largest array of sort keys made by :meth:`Findings.report_rows`"""
+
 # SHOW_ALL = VALID_STATUS_LIST
 # SHOW_ERRORS = (ERROR, WARN)
 # SHOW_NOT_OK = (WARN, ERROR, TODO, UNUSED)
 
 
+def report_sort_key(h5_address, status):
+    """
+    sort key of a finding in the validation report
+
+    Sorted by address (attributes with their group or dataset),
+    then from best to worst status.
+    """
+    value = h5_address
+    value += " %3d" % -status.value  # sort from best to worst
+    value += " " + status.description
+    return value.replace("@", " @")  # keep attributes with group or dataset
+
+
+def finding_key(h5_address, test_name):
+    """
+    key of a finding: same address and test, same key
+
+    A 64-bit hash (BLAKE2b) as 16 hexadecimal characters.  The same in any
+    process or run (unlike ``hash()``), to compare the findings of two
+    validations or to find duplicates.
+    """
+    text = f"{h5_address}\n{test_name}"
+    return hashlib.blake2b(text.encode("utf8"), digest_size=8).hexdigest()
+
+
+# part of report_sort_key after the address, indexed by status code
+_REPORT_SUFFIX = [report_sort_key("", status) for status in VALID_STATUS_LIST]
+
+
 class Finding(object):
     """
     a single reported observation while validating
@@ -80,6 +123,9 @@ class Finding(object):
     :param str test_name: short description of the test
     :param obj status: one of: OK NOTE WARN ERROR TODO COMMENT OPTIONAL UNUSED
     :param str comment: description
+
+    The ``key`` of the finding (see :func:`finding_key`) is made
+    when first used.
     """
 
     def __init__(self, h5_address, test_name, status, comment):
@@ -90,7 +136,14 @@ class Finding(object):
         self.h5_address = h5_address
         self.status = status
         self.comment = comment
-        self.key = self.make_md5
+        self._key = None
+
+    @property
+    def key(self):
+        """key (hash) of address and test name, see :func:`finding_key`"""
+        if self._key is None:
+            self._key = finding_key(self.h5_address, self.test_name)
+        return self._key
 
     def __str__(self, *args, **kwargs):
         try:
@@ -105,9 +158,252 @@ class Finding(object):
             return object.__str__(self, *args, **kwargs)
 
     def make_md5(self):
-        """make a unique hash for this finding"""
+        """make a unique hash (MD5) for this finding, see also ``key``"""
         h = hashlib.md5()
         h.update(bytes(self.h5_address, "utf8"))
         h.update(b"\n")
         h.update(bytes(self.test_name, "utf8"))
         return h.hexdigest()
+
+
+class Findings(object):
+    """
+    all findings of a validation, kept in columns
+
+    Used like a list of :class:`Finding` objects (``append``,
+    ``len``, iteration, indexing), but each finding is kept as
+    one row of four integer columns:
+
+    ============  =========================================================
+    column        content
+    ============  =========================================================
+    address       id of the h5_address
+    test_name     id of the test_name
+    status        code of the status (see ``STATUS_CODE``)
+    comment       id of the comment
+    ============  =========================================================
+
+    The ids refer to a table of texts, each text is kept once.
+    A :class:`Finding` object is made only when a row is read.
+    Summaries are counted from the columns, without making
+    Finding objects.
+
+    :param [Finding] findings: (optional) initial content
+
+    .. autosummary::
+
+       ~add
+       ~append
+       ~extend
+       ~row
+       ~key
+       ~status_counts
+       ~score
+       ~report_rows
+       ~by_address
+       ~remove
+    """
+
+    def __init__(self, findings=None):
+        self._text_ids = {}  # text: id
+        self._texts = []  # id: text
+        self.address = array.array("i")
+        self.test_name = array.array("i")
+        self.status = array.array("b")
+        self.comment = array.array("i")
+        self._report_order = None  # rows sorted for the report (see report_rows)
+        self._keys = {}  # (address id, test_name id): key, made when asked
+        self._rows_by_address = {}  # address id: [row], see by_address
+        if findings is not None:
+            self.extend(findings)
+
+    def __len__(self):
+        return len(self.status)
+
+    def __iter__(self):
+        texts = self._texts
+        for a, t, s, c in zip(self.address, self.test_name, self.status, self.comment):
+            yield Finding(texts[a], texts[t], VALID_STATUS_LIST[s], texts[c])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        texts = self._texts
+        return Finding(
+            texts[self.address[index]],
+            texts[self.test_name[index]],
+            VALID_STATUS_LIST[self.status[index]],
+            texts[self.comment[index]],
+        )
+
+    def _text_id(self, text):
+        text_id = self._text_ids.get(text)
+        if text_id is None:
+            text_id = len(self._texts)
+            self._text_ids[text] = text_id
+            self._texts.append(text)
+        return text_id
+
+    def add(self, h5_address, test_name, status, comment):
+        """Add one finding, return its row number."""
+        code = STATUS_CODE.get(status)
+        if code is None:
+            raise ValueError(f"unknown status value: {status}")
+        address = self._text_id(h5_address)
+        row = len(self.status)
+        self.address.append(address)
+        self.test_name.append(self._text_id(str(test_name)))
+        self.status.append(code)
+        self.comment.append(self._text_id(comment))
+        self._rows_by_address.setdefault(address, []).append(row)
+        return row
+
+    def append(self, f):
+        """Add one :class:`Finding`."""
+        self.add(f.h5_address, f.test_name, f.status, f.comment)
+
+    def extend(self, findings):
+        """Add each :class:`Finding`."""
+        for f in findings:
+            self.append(f)
+
+    def row(self, row):
+        """Return (h5_address, test_name, status, comment) of this row."""
+        texts = self._texts
+        return (
+            texts[self.address[row]],
+            texts[self.test_name[row]],
+            VALID_STATUS_LIST[self.status[row]],
+            texts[self.comment[row]],
+        )
+
+    def key(self, row):
+        """Return the key of this row (see :func:`finding_key`)."""
+        ids = self.address[row], self.test_name[row]
+        key = self._keys.get(ids)
+        if key is None:
+            key = self._keys[ids] = finding_key(
+                self._texts[ids[0]], self._texts[ids[1]]
+            )
+        return key
+
+    def status_counts(self):
+        """Return the number of findings of each status (indexed by status code)."""
+        codes = numpy.frombuffer(self.status, dtype=numpy.int8)
+        return numpy.bincount(codes, minlength=len(VALID_STATUS_LIST))
+
+    def score(self):
+        """
+        Return (total, count, average) of the status values.
+
+        Findings with a status value of zero (such as TODO) are not counted.
+        """
+        counts = self.status_counts()
+        scored = STATUS_VALUES != 0
+        total = int((counts * STATUS_VALUES)[scored].sum())
+        count = int(counts[scored].sum())
+        if count == 0:
+            return total, count, 0
+        return total, count, float(total) / count
+
+    def report_rows(self, statuses=None):
+        """
+        Return the row numbers of the findings in report order.
+
+        The order is the same as sorting by :func:`report_sort_key`
+        (findings with equal keys in the order recorded).  Since the key
+        depends only on address and status, only the distinct
+        (address, status) pairs are sorted by key, the rows are then
+        ordered by the rank of their pair (one stable integer sort).
+        The order is kept until findings are added or removed.
+
+        :param [str] statuses: (optional) report only findings with these
+            status keys (such as ``["ERROR", "WARN"]``, default: all)
+        """
+        order = self._report_order
+        if order is None or len(order) != len(self):
+            order = self._report_order = self._sort_for_report()
+        if statuses is None:
+            return order
+        wanted = numpy.zeros(len(VALID_STATUS_LIST), dtype=bool)
+        for key in statuses:
+            if key in VALID_STATUS_DICT:
+                wanted[STATUS_CODE[VALID_STATUS_DICT[key]]] = True
+        codes = numpy.frombuffer(self.status, dtype=numpy.int8)
+        return order[wanted[codes[order]]]
+
+    def _sort_for_report(self):
+        if len(self) == 0:
+            return numpy.zeros(0, dtype=numpy.intp)
+        n_status = len(VALID_STATUS_LIST)
+        addresses = numpy.frombuffer(self.address, dtype=numpy.int32)
+        codes = numpy.frombuffer(self.status, dtype=numpy.int8)
+        pairs = addresses.astype(numpy.int64) * n_status + codes
+        del addresses, codes  # release the buffers (so the columns can grow)
+        unique, inverse = numpy.unique(pairs, return_inverse=True)
+        address_ids, where = numpy.unique(unique // n_status, return_inverse=True)
+        texts = [self._texts[i] for i in address_ids.tolist()]
+        status_codes = unique % n_status
+
+        longest = max(map(len, texts), default=0) + len(_REPORT_SUFFIX[0])
+        if 4 * longest * len(unique) <= REPORT_SORT_MAX_BYTES:
+            # keys as fixed-width strings, sorted by numpy
+            keys = numpy.char.add(
+                numpy.char.replace(numpy.array(texts, dtype=str), "@", " @")[where],
+                numpy.array(_REPORT_SUFFIX)[status_codes],
+            )
+            order = numpy.argsort(keys)  # equal keys get equal rank below
+            keys = keys[order]
+            new_key = numpy.ones(len(keys), dtype=bool)
+            new_key[1:] = keys[1:] != keys[:-1]
+        else:
+            # very long addresses: keys as Python strings
+            keys = [
+                report_sort_key(texts[w], VALID_STATUS_LIST[c])
+                for w, c in zip(where.tolist(), status_codes.tolist())
+            ]
+            order = numpy.array(sorted(range(len(keys)), key=keys.__getitem__))
+            new_key = numpy.ones(len(keys), dtype=bool)
+            new_key[1:] = [keys[a] != keys[b] for a, b in zip(order[1:], order[:-1])]
+        rank = numpy.empty(len(unique), dtype=numpy.intp)
+        rank[order] = numpy.cumsum(new_key)  # equal keys: equal rank
+        return numpy.argsort(rank[inverse.ravel()], kind="stable")
+
+    def by_address(self, h5_address):
+        """
+        Return a dictionary (by test_name) of the findings of ``h5_address``.
+
+        The rows of each address are indexed as findings are added,
+        so only the findings of ``h5_address`` are read.
+        """
+        rows = self._rows_by_address.get(self._text_ids.get(h5_address), [])
+        result = {}
+        for row in rows:
+            f = self[row]
+            result[f.test_name] = f
+        return result
+
+    def remove(self, rows):
+        """
+        Remove the findings in these rows.
+
+        Returns an array of the new row number of each old row
+        (-1 for a removed row).
+        """
+        keep = numpy.ones(len(self), dtype=bool)
+        keep[numpy.asarray(list(rows), dtype=numpy.intp)] = False
+        new_rows = numpy.cumsum(keep) - 1
+        new_rows[~keep] = -1
+        for name, typecode, dtype in (
+            ("address", "i", numpy.int32),
+            ("test_name", "i", numpy.int32),
+            ("status", "b", numpy.int8),
+            ("comment", "i", numpy.int32),
+        ):
+            column = numpy.frombuffer(getattr(self, name), dtype=dtype)[keep]
+            setattr(self, name, array.array(typecode, column.tobytes()))
+        self._report_order = None
+        self._rows_by_address = {}
+        for row, address in enumerate(self.address):
+            self._rows_by_address.setdefault(address, []).append(row)
+        return new_rows
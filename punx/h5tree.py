@@ -14,22 +14,39 @@
 """
 Describe the tree structure of any HDF5 file
 
+Only the items of a dataset shown in the tree are read from the file
+(see :meth:`Hdf5TreeView._readPreview`), so the tree of a file with
+huge datasets is rendered with little I/O.
+
 .. autosummary::
 
     ~Hdf5TreeView
 """
 
+import contextlib
+import fnmatch
 import logging
 import os
 import h5py
 import numpy
 
+from . import HDF5_Open_Error
 from . import utils
 
 
 logger = logging.getLogger(__name__)
 
 
+class _Skipped(object):
+    """marks the items of an array not shown in the tree"""
+
+    def __repr__(self):
+        return "..."
+
+
+SKIPPED = _Skipped()
+
+
 class Hdf5TreeView(object):
     """
     Describe the tree structure of any HDF5 file
@@ -40,26 +57,75 @@ class Hdf5TreeView(object):
         mc.array_items_shown = 5
         show_attributes = False
         txt = mc.report(show_attributes)
+
+    or, one line at a time, while the file is read::
+
+        for line in mc.iter_report(show_attributes):
+            print(line)
+
+    Instead of a file name, give an open HDF5 file (``h5py.File``,
+    which is used and left open) or a binary file-like object::
+
+        with h5py.File(filename, "r") as f:
+            txt = Hdf5TreeView(f).report()
     """
 
     requested_filename = None
-    isNeXus = False
     array_items_shown = 5
+    path = "/"
+    max_depth = None
+    include = ()
+    exclude = ()
+    nx_class = ()
 
     def __init__(self, filename):
-        """store filename and test if file is NeXus HDF5"""
+        """store filename (or open file), the file is not read yet"""
         self.requested_filename = filename
         self.filename = None
         self.show_attributes = True
-        if os.path.exists(filename):
+        self._source = None  # what to open: name, h5py.File, file-like object
+        self._isNeXus = None  # not known until the file is opened
+        if utils.isHdf5FileObject(filename) or hasattr(filename, "read"):
+            self._source = filename
+            self.filename = utils.hdf5FileName(filename)
+        elif os.path.exists(filename):
+            self._source = filename
             self.filename = filename
-            self.isNeXus = utils.isNeXusFile(filename)
+
+    @property
+    def isNeXus(self):
+        """
+        Is the file a NeXus HDF5 file?
+
+        Known once the file is opened (by :meth:`iter_report`),
+        otherwise the file is opened now to find out.
+        """
+        if self._isNeXus is None:
+            if self._source is None:
+                return False
+            with self._open() as f:
+                self._isNeXus = utils.isNeXusFile(f)
+        return self._isNeXus
+
+    @isNeXus.setter
+    def isNeXus(self, value):
+        self._isNeXus = value
+
+    def _open(self):
+        """open the file, a given open HDF5 file is used (and left open)"""
+        if utils.isHdf5FileObject(self._source):
+            return contextlib.nullcontext(self._source)
+        try:
+            return h5py.File(self._source, "r")
+        except IOError:
+            raise HDF5_Open_Error(self.filename)
 
     def report(self, show_attributes=True):
         """
         Return the structure of the HDF5 file in a list of strings.
 
-        The work of parsing the datafile is done in this method.
+        The work of parsing the datafile is done in this method
+        (see :meth:`iter_report`).
 
         The hierarchy of the file is represented by indentation using spaces.
         Attributes are signified using ``@``. Group/dataset names are separated
@@ -79,16 +145,96 @@ class Hdf5TreeView(object):
         """
         if self.filename is None:
             return None
+        return list(self.iter_report(show_attributes))
+
+    def iter_report(self, show_attributes=True):
+        """
+        Yield the structure of the HDF5 file, one string at a time.
+
+        Same strings as :meth:`report`, yielded while the file is read:
+        the first lines are available at once and the tree of a file
+        with many groups and datasets is not kept in memory.
+        (Nothing is yielded if the file does not exist.)
+
+        Only part of the file is shown (and read) with these attributes:
+
+        ==========  ========================================================
+        attribute   show only
+        ==========  ========================================================
+        path        this group (or dataset), such as ``/entry/instrument``
+        max_depth   this many levels of groups (below ``path``)
+        include     items with name or HDF5 address matching one of these
+                    glob patterns (such as ``*detector*``), with all
+                    their content
+        exclude     not the items matching one of these glob patterns
+        nx_class    the content of groups of these NeXus classes (such as
+                    ``NXdetector``)
+        ==========  ========================================================
+
+        Excluded groups and groups deeper than ``max_depth`` are not read.
+        With ``include`` or ``nx_class``, the other datasets are not read,
+        the groups that contain something shown are shown.
+        """
+        if self.filename is None:
+            return
         self.show_attributes = show_attributes
-        with h5py.File(self.filename, "r") as f:
+        self._pending = []
+        with self._open() as f:
+            if self._isNeXus is None:
+                self._isNeXus = utils.isNeXusFile(f)  # in the same open
             txt = self.filename
             if self.isNeXus:
                 txt += " : NeXus data file"
-            tree_string_list = self._renderGroup(f, txt, indentation="")
-        return tree_string_list
+            path = "/" + self.path.strip("/")
+            if path == "/":
+                nothing = True
+                for line in self._renderGroup(f, txt, indentation=""):
+                    nothing = False
+                    yield line
+                if nothing:  # all filtered out
+                    yield txt
+                return
+            if path not in f:
+                raise KeyError(f"{path} not found in {self.filename}")
+
+            yield txt
+            included = not self.include or self._matches(
+                self.include, path.split("/")[-1], path
+            )
+            value = f.get(path)
+            if utils.isHdf5Dataset(value):
+                if included and not self.nx_class:
+                    yield from self._renderDataset(value, path, "  ")
+            else:
+                yield from self._renderGroup(
+                    value, path, "  ", address=path, included=included
+                )
 
-    def _renderGroup(self, obj, name, indentation="  ", md=None):
-        """return a [formatted_string] with the contents of the group
+    def _matches(self, patterns, name, address):
+        """does the name or the HDF5 address match one of the glob patterns?"""
+        return any(
+            fnmatch.fnmatchcase(name, pattern) or fnmatch.fnmatchcase(address, pattern)
+            for pattern in patterns
+        )
+
+    def _flushPending(self):
+        """yield the strings of the groups shown since something in them is"""
+        for lines in self._pending:
+            yield from lines
+        self._pending = []
+
+    def _renderGroup(
+        self,
+        obj,
+        name,
+        indentation="  ",
+        md=None,
+        address="/",
+        depth=0,
+        included=None,
+        classified=None,
+    ):
+        """yield formatted strings with the contents of the group
 
         Parameters
         ----------
@@ -99,25 +245,55 @@ class Hdf5TreeView(object):
             If group was an ExternalLink, then keys ``filename`` and ``path``
             describe the external link point.  If not ExternalLink, the dictionary
             contents will not be used.
+        address : str
+            HDF5 address of the group in this file
+        depth : int
+            levels of groups below ``path``
+        included, classified : bool
+            Is the group in an item matching ``include``, in a group of
+            one of the ``nx_class`` classes?  (default: if no such filter)
         """
-        s = []
+        if included is None:
+            included = not self.include
+        if classified is None:
+            classified = not self.nx_class
         nxclass = obj.attrs.get("NX_class", "")
         if len(nxclass) > 0:
             if isinstance(
                 nxclass, numpy.ndarray
             ):  # attribute reported as DATATYPE SIMPLE
                 nxclass = nxclass[0]  # convert as if DATATYPE SCALAR
-            nxclass = ":" + utils.decode_byte_string(nxclass)
-        s += [indentation + name + nxclass]
+            nxclass = utils.decode_byte_string(nxclass)
+            classified = classified or nxclass in self.nx_class
+            nxclass = ":" + nxclass
+        shown = included and classified
+        header = [indentation + name + nxclass]
         extra_attrs = {}
         if isinstance(md, h5py.ExternalLink):
             # also report external group links (file & path)
             extra_attrs = dict(file=md.filename, path=md.path)
-        s += self._renderAttributes(obj, indentation, extra_attrs)
+        header += self._renderAttributes(obj, indentation, extra_attrs)
+        if shown:
+            yield from self._flushPending()
+            yield from header
+        else:  # shown only if something in the group is shown
+            self._pending.append(header)
+
+        if self.max_depth is not None and depth >= self.max_depth:
+            itemnames = []  # not read
+        else:
+            itemnames = sorted(obj)
 
-        # show datasets and links next
+        # show datasets and links next, groups last (by name, one at a time)
         groups = []
-        for itemname in sorted(obj):
+        for itemname in itemnames:
+            item_address = address.rstrip("/") + "/" + itemname
+            if self._matches(self.exclude, itemname, item_address):
+                continue  # not read
+            item_included = included or self._matches(
+                self.include, itemname, item_address
+            )
+            item_shown = item_included and classified
             link_info = obj.get(itemname, getlink=True)
             # prevent fails of obj.get(itemname, getclass=True)
             # for external links if file is not available
@@ -137,29 +313,37 @@ class Hdf5TreeView(object):
                 classref = obj.get(itemname, getclass=True)
 
             if classref is None:
+                if not item_shown:
+                    continue
+                yield from self._flushPending()
                 if isinstance(link_info, h5py.SoftLink):
-                    s += ["%s  %s: --> %s" % (indentation, itemname, link_info.path)]
+                    yield "%s  %s: --> %s" % (indentation, itemname, link_info.path)
                 else:
-                    s += ["%s  %s: missing external file" % (indentation, itemname)]
+                    yield "%s  %s: missing external file" % (indentation, itemname)
                     if self.show_attributes:
                         for nm, attr in ("file", "filename"), ("path", "path"):
                             v = getattr(link_info, attr, None)
                             if v is not None:
-                                s += [self._renderSingleAttribute(indentation + "  ", nm, v)]
+                                yield self._renderSingleAttribute(indentation + "  ", nm, v)
+            elif classref is not h5py.Group and not item_shown:
+                continue  # dataset not read
             else:
                 value = obj.get(itemname)
                 if utils.isNeXusLink(value):
-                    s += self._renderLinkedObject(value, itemname, indentation + "  ")
+                    if item_shown:
+                        yield from self._flushPending()
+                        yield from self._renderLinkedObject(value, itemname, indentation + "  ")
                 elif utils.isHdf5Group(value) or utils.isHdf5FileObject(value):
-                    groups.append((value, itemname, link_info))
+                    groups.append((itemname, link_info, item_included))
                 elif utils.isHdf5Dataset(value):
-                    s += self._renderDataset(value, itemname, indentation + "  ")
+                    yield from self._flushPending()
+                    yield from self._renderDataset(value, itemname, indentation + "  ")
                     if self.show_attributes and utils.isHdf5ExternalLink(
                         obj, link_info
                     ):  # TODO: is obj the "parent"
                         # When "classref" is defined, then external data is available
-                        s += self._renderSingleAttribute(indentation + "  ", "file", link_info.filename)
-                        s += self._renderSingleAttribute(indentation + "  ", "path", link_info.path)
+                        yield self._renderSingleAttribute(indentation + "  ", "file", link_info.filename)
+                        yield self._renderSingleAttribute(indentation + "  ", "path", link_info.path)
                 else:
                     msg = (
                         "unidentified %s: %s, %s",
@@ -169,11 +353,20 @@ class Hdf5TreeView(object):
                     )
                     raise Exception(msg)
 
-        for value, itemname, md in groups:  # show things that look like groups
-            g = self._renderGroup(value, itemname, indentation + "  ", md)
-            s += g
-
-        return s
+        for itemname, md, item_included in groups:  # show things that look like groups
+            yield from self._renderGroup(
+                obj.get(itemname),
+                itemname,
+                indentation + "  ",
+                md,
+                address=address.rstrip("/") + "/" + itemname,
+                depth=depth + 1,
+                included=item_included,
+                classified=classified,
+            )
+
+        if self._pending and self._pending[-1] is header:
+            self._pending.pop()  # nothing shown in this group
 
     def _renderSingleAttribute(self, indentation, name, value):
         value = utils.decode_byte_string(value)
@@ -219,20 +412,8 @@ class Hdf5TreeView(object):
         txType = self._renderDsType(dset)
         txShape = self._renderDsShape(dset)
         s = []
-        if dset.dtype.kind == "S":
-            if isinstance(dset[()], numpy.ndarray):
-                ss = ['"' + utils.decode_byte_string(ss) + '"' for ss in dset[()]]
-                if len(ss) > 1:
-                    value = " = [%s]" % ", ".join(ss)
-                else:
-                    value = " = %s" % ", ".join(ss)
-            else:
-                value = " = %s" % utils.decode_byte_string(dset[()])
-            s += ["%s%s:%s%s" % (indentation, name, txType, value)]
-            s += self._renderAttributes(dset, indentation)
-            # dset.dtype.kind == 'S', nchar = dset.dtype.itemsize
-        elif dset.dtype.kind == "O":
-            value = " = %s" % str(dset[()])
+        if dset.dtype.kind in ("S", "O"):
+            value = " = %s" % self._renderStrings(dset)
             s += ["%s%s:%s%s" % (indentation, name, txType, value)]
             s += self._renderAttributes(dset, indentation)
         elif shape == (1,):
@@ -241,7 +422,7 @@ class Hdf5TreeView(object):
             s += self._renderAttributes(dset, indentation)
         else:
 
-            if self.array_items_shown > 2:
+            if self._showsArrays():
                 value = self._renderArray(dset, indentation + "  ")
                 if len(dset.shape) < 2:
                     # show the array inline with the field
@@ -275,7 +456,13 @@ class Hdf5TreeView(object):
         # dset.dtype.kind == 'S', nchar = dset.dtype.itemsize
         if obj.dtype.kind == "S":  # fixed-length string
             if len(obj.shape):
-                t = "char[%s]" % ",".join([str(o.dtype.itemsize) for o in obj])
+                # same size for each item, as shown in the tree
+                n = obj.shape[0]
+                shown = self._numShownFirst(n)
+                sizes = [str(obj.dtype.itemsize)] * shown
+                if shown < n:
+                    sizes += ["...", str(obj.dtype.itemsize)]
+                t = "char[%s]" % ",".join(sizes)
             else:
                 t = "CHAR"
         elif obj.dtype.kind == "O":  # variable-length string
@@ -296,12 +483,85 @@ class Hdf5TreeView(object):
             result = "[%s]" % ",".join(l)
         return result
 
+    def _renderStrings(self, dset):
+        """return the (preview of the) value of a string dataset"""
+        if len(dset.shape) == 0:
+            value = dset[()]
+            if dset.dtype.kind == "O":
+                return str(value)
+            return utils.decode_byte_string(value)
+        if dset.size > 1 and not self._showsArrays():
+            return "[ ... ]"
+
+        preview = self._readPreview(dset)
+        if dset.dtype.kind == "O":  # as numpy shows it
+            return str(preview)
+
+        def __render(part):
+            if isinstance(part, numpy.ndarray):
+                return "[%s]" % ", ".join(map(__render, part))
+            if part is SKIPPED:
+                return str(part)
+            return '"' + utils.decode_byte_string(part) + '"'
+
+        if len(dset.shape) == 1 and len(preview) < 2:
+            return ", ".join(map(__render, preview))
+        return __render(preview)
+
+    def _showsArrays(self):
+        """are the values of arrays shown?"""
+        return self.array_items_shown is None or self.array_items_shown > 2
+
+    def _readPreview(self, dset):
+        """
+        return the items of the dataset shown in the tree
+
+        Along each axis, the first few and the last items are shown (see
+        ``array_items_shown``), only these are read from the file, in
+        one read: a block of first and a block of last items along each
+        axis (``h5py.MultiBlockSlice``).  Items not shown are replaced by
+        ``SKIPPED``, so the result (a numpy array of objects) has at most
+        ``array_items_shown`` items along each axis.
+        """
+        if 0 in dset.shape:
+            return numpy.empty(dset.shape, dtype=object)
+
+        selection, picks = [], []
+        for n in dset.shape:
+            shown = self._numShownFirst(n)
+            block = max(shown, 1)
+            if shown < n and n >= 2 * block:
+                # first and last blocks of the same size
+                selection.append(
+                    h5py.MultiBlockSlice(start=0, stride=n - block, count=2, block=block)
+                )
+                picks.append(list(range(shown)) + [2 * block - 1])
+            else:
+                selection.append(slice(0, n))
+                picks.append(list(range(shown)) + [n - 1] * (shown < n))
+        data = dset[tuple(selection)][numpy.ix_(*picks)]
+
+        preview = numpy.empty(data.shape, dtype=object)
+        for index in numpy.ndindex(data.shape):
+            preview[index] = data[index]  # as numpy shows each item
+        for axis, n in enumerate(dset.shape):
+            shown = self._numShownFirst(n)
+            if shown < n:
+                preview = numpy.insert(preview, shown, SKIPPED, axis=axis)
+        return preview
+
     def _renderArray(self, obj, indentation="  "):
         """nicely format an array up to arbitrary rank"""
         shape = obj.shape
         r = ""
-        if len(shape) > 0:
-            r = self._renderNdArray(obj, indentation + "  ")
+        if len(shape) > 3:
+            # show the rank of the first items, nothing read from the file
+            items = ["rank=%d" % (len(shape) - 1)] * self._numShownFirst(shape[0])
+            if len(items) < shape[0]:
+                items += ["...", "rank=%d" % (len(shape) - 1)]
+            r = self._renderRows(items, indentation + "  ")
+        elif len(shape) > 0:
+            r = self._renderNdArray(self._readPreview(obj), indentation + "  ")
         return r
 
     def _decideNumShown(self, n):
@@ -311,38 +571,33 @@ class Hdf5TreeView(object):
                 n = self.array_items_shown - 2
         return n
 
-    def _renderNdArray(self, obj, indentation="  "):
-        """return a list of lower-dimension arrays, nicely formatted"""
-
-        def __render(obj, rank, key, indents):
-            if rank == 1:
-                item = obj[key]
-            elif rank < 4:
-                # this replaces a lot of code: if rank == ...
-                indices = ", ".join([str(key)] + (":" * (rank - 1)).split())
-                part = eval("obj[%s]" % indices)
-                item = self._renderNdArray(part, indents + "  ")  # recursion
-            else:
-                item = "rank=%d" % (rank - 1)
-
-            return item
+    def _numShownFirst(self, n):
+        """how many of the first n items to show (all, unless some are skipped)"""
+        shown = max(self._decideNumShown(n), 0)
+        if shown + 1 >= n:  # nothing skipped between first and last
+            shown = n
+        return shown
 
-        shape = obj.shape
-        rank = len(shape)
+    def _renderNdArray(self, preview, indentation="  "):
+        """return a list of lower-dimension arrays, nicely formatted"""
+        rank = len(preview.shape)
         if rank < 1:
             return None
-        n = self._decideNumShown(shape[0])
-        r = []
-        for i in range(n):
-            r.append(__render(obj, rank, i, indentation + "  "))
-        if n < shape[0]:
-            r.append("...")  # skip over most
-            r.append(__render(obj, rank, -1, indentation + "  "))  # last one
-
         if rank == 1:
-            s = str(r)
-        else:
-            s = "[\n" + indentation + "  "
-            s += ("\n" + indentation + "  ").join(r)
-            s += "\n" + indentation + "]"
+            items = ["'...'" if item is SKIPPED else str(item) for item in preview]
+            return "[%s]" % ", ".join(items)
+
+        r = []
+        for part in preview:
+            if part.size > 0 and all(item is SKIPPED for item in part.flat):
+                r.append("...")  # skip over most
+            else:
+                r.append(self._renderNdArray(part, indentation + "    "))  # recursion
+        return self._renderRows(r, indentation)
+
+    def _renderRows(self, rows, indentation="  "):
+        """return the rows of an array, one per line"""
+        s = "[\n" + indentation + "  "
+        s += ("\n" + indentation + "  ").join(rows)
+        s += "\n" + indentation + "]"
         return s
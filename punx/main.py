@@ -37,7 +37,7 @@ main user interface file
         demonstrate         demonstrate HDF5 file validation
         install             install NeXus definitions into the local cache
         tree                show tree structure of HDF5 or NXDL file
-        validate            validate a NeXus file
+        validate            validate NeXus file(s)
 
     Note: It is only necessary to use the first two (or more) characters
     of any subcommand, enough that the abbreviation is unique. Such as:
@@ -53,6 +53,7 @@ main user interface file
    ~func_install
    ~func_tree
    ~func_validate
+   ~validate_many_files
 
 """
 
@@ -73,7 +74,7 @@ logging.basicConfig(
 
 
 from .__init__ import __version__, __package_name__, __url__
-from .__init__ import FileNotFound, HDF5_Open_Error, SchemaNotFound
+from .__init__ import FileNotFound, HDF5_Open_Error, InvalidNxdlFile, SchemaNotFound
 from . import finding
 from . import utils
 
@@ -133,9 +134,15 @@ def func_demo(args):
 
     print("")
     print("console> punx validate " + args.infile)
+    args.infiles = [args.infile]
+    args.incremental = args.content_hash = False
+    args.workers = 1
+    args.format, args.output = "text", None
+    args.checks = args.skip_checks = None
+    args.statistics = False
     args.report = ",".join(sorted(finding.VALID_STATUS_DICT.keys()))
     args.file_set_name = cache_manager.GITHUB_NXDL_BRANCH
-    func_validate(args)
+    func_validate(args)  # demo: ignore the exit code
     del args.report
 
     print("")
@@ -146,7 +153,48 @@ def func_demo(args):
     #    :param bool show_attributes: display attributes in output
     show_attributes = True
     mc.array_items_shown = 5
-    print("\n".join(mc.report(show_attributes)))
+    for line in mc.iter_report(show_attributes):
+        print(line)
+
+
+def func_diff(args):
+    """
+    compare the findings of two validation runs
+
+    Returns the exit code: 0 (same findings), 1 (some differ), 2 (trouble).
+    """
+    import collections
+    import json
+    from . import diff
+
+    counts = collections.Counter()
+    try:
+        differences = diff.diff_runs(
+            diff.read_records(args.old_run),
+            diff.read_records(args.new_run),
+            counts=counts,
+            compare_comment=not args.ignore_comment,
+        )
+        for difference in differences:
+            if args.format == "jsonl":
+                print(json.dumps(difference))
+            else:
+                print(diff.diff_text(difference))
+    except KeyError as exc:
+        exit_message(f"Could not compare runs: record without {exc}", exit_code=2)
+    except (OSError, ValueError) as exc:
+        exit_message(f"Could not compare runs: {exc}", exit_code=2)
+
+    if args.format == "text":
+        print(
+            ", ".join(
+                f"{counts[change]} {change}" for change in diff.DIFF_CHANGES
+            )
+            + f", {counts['unchanged']} unchanged"
+        )
+    if any(counts[change] for change in diff.DIFF_CHANGES):
+        return 1
+    return 0
 
 
 # def func_hierarchy(args):
@@ -179,36 +227,39 @@ def func_tree(args):
         except FileNotFound:
             exit_message("File not found: " + args.infile)
         mc.array_items_shown = args.max_array_items
+        mc.path = args.path
+        mc.max_depth = args.max_depth
+        mc.include = args.include or []
+        mc.exclude = args.exclude or []
+        mc.nx_class = _comma_list(",".join(args.nx_class or [])) or []
         try:
-            report = mc.report(args.show_attributes)
-        except HDF5_Open_Error:
+            for line in mc.iter_report(args.show_attributes):
+                print(line)  # as soon as it is known
+        except h5tree.HDF5_Open_Error:  # as raised by h5tree
             exit_message("Could not open as HDF5: " + args.infile)
-        print("\n".join(report or ""))
+        except KeyError as exc:
+            exit_message(str(exc.args[0]))
 
 
 def func_validate(args):
     """
-    validate the content of a NeXus HDF5 data file of NXDL XML file
+    validate the content of NeXus HDF5 data files or NXDL XML files
+
+    Returns the exit code (see :func:`punx.batch.exit_code`).
     """
+    from . import batch
     from . import validate
 
     cm = cache_manager.CacheManager()
 
-    if args.infile.endswith(".nxdl.xml"):
-        result = validate.validate_xml(args.infile)
-        if result is None:
-            print(args.infile, " validates")
-        return
-
     file_sets = list(cm.all_file_sets.keys())
     if args.file_set_name not in file_sets:
         exit_message(
             f"File set '{args.file_set_name}' is not available locally."
-            f"  Either install it or use one of these: {', '.join(file_sets)}"
+            f"  Either install it or use one of these: {', '.join(file_sets)}",
+            exit_code=batch.EXIT_FAILED,
         )
 
-    validator = validate.Data_File_Validator(args.file_set_name)
-
     # determine which findings are to be reported
     report_choices, trouble = [], []
     for c in args.report.upper().split(","):
@@ -220,22 +271,173 @@ def func_validate(args):
         choices = ",".join(sorted(finding.VALID_STATUS_DICT.keys()))
         exit_message(
             f"invalid choice(s) for *--report* option: {','.join(trouble)}\n"
-            f"\t available choices: {choices}"
+            f"\t available choices: {choices}",
+            exit_code=batch.EXIT_FAILED,
+        )
+
+    # determine which checks are to be run
+    from . import validations
+
+    try:
+        args.checks = validations.select_checks(
+            _comma_list(args.checks), _comma_list(args.skip_checks)
         )
+    except ValueError as exc:
+        exit_message(str(exc), exit_code=batch.EXIT_FAILED)
+
+    file_names = batch.expand_file_names(args.infiles)
+    if args.format != "text":
+        return validate_to_records(args, file_names, report_choices)
+    if len(args.infiles) == 1 and file_names == args.infiles:
+        infile = args.infiles[0]  # one file: full report
+    else:
+        return validate_many_files(args, file_names)
+
+    if infile.endswith(".nxdl.xml"):
+        try:
+            result = validate.validate_xml(infile)
+        except FileNotFound:
+            exit_message("File not found: " + infile, exit_code=batch.EXIT_FAILED)
+        except InvalidNxdlFile as exc:
+            exit_message(str(exc), exit_code=batch.EXIT_ERROR_FINDINGS)
+        if result is None:
+            print(infile, " validates")
+        return batch.EXIT_OK
+
+    store = None
+    if args.incremental:
+        from . import results_store
+
+        store = results_store.get_results_store(args.content_hash)
+    validator = validate.Data_File_Validator(
+        args.file_set_name, results_store=store, checks=args.checks
+    )
 
     try:
         # run the validation
-        validator.validate(args.infile)
+        validator.validate(infile)
     except FileNotFound:
-        exit_message("File not found: " + args.infile)
+        exit_message("File not found: " + infile, exit_code=batch.EXIT_FAILED)
     except HDF5_Open_Error:
-        exit_message("Could not open as HDF5: " + args.infile)
+        exit_message("Could not open as HDF5: " + infile, exit_code=batch.EXIT_FAILED)
     except SchemaNotFound as _exc:
-        exit_message(str(_exc))
+        exit_message(str(_exc), exit_code=batch.EXIT_FAILED)
 
     # report the findings from the validation
-    validator.print_report(statuses=report_choices)
+    validator.print_report(statuses=report_choices, statistics=args.statistics)
+    print(f"NeXus definitions version: {args.file_set_name}")
+    if validator.results_from_store:
+        print("findings stored from previous validation of unchanged file")
+
+    if validator.finding_summary()[finding.ERROR] > 0:
+        return batch.EXIT_ERROR_FINDINGS
+    return batch.EXIT_OK
+
+
+def _comma_list(text):
+    """list of the comma-separated names in text (None if no text)"""
+    if text is None:
+        return None
+    return [name.strip() for name in text.split(",") if name.strip()]
+
+
+def _workers(text):
+    """number of worker processes (argparse type): 0 or more"""
+    try:
+        workers = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{text}'")
+    if workers < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, given: {workers}")
+    return workers
+
+
+def validate_many_files(args, file_names):
+    """
+    validate several files, print a line for each, then a summary table
+
+    Returns the exit code (see :func:`punx.batch.exit_code`).
+    """
+    from . import batch
+
+    incremental = args.incremental
+    if incremental and args.content_hash:
+        incremental = "content"
+
+    summaries = []
+    for summary in batch.validate_files(
+        file_names,
+        args.file_set_name,
+        workers=args.workers or None,
+        incremental=incremental,
+        checks=args.checks,
+    ):
+        summaries.append(summary)
+        counts = summary["counts"]
+        text = f"{summary['outcome']:6s} {summary['file']}"
+        if summary["stored"]:
+            text += "  (stored)"
+        if summary["score"] is not None:
+            text += f"  <finding>={summary['score']:f}"
+        for key in ("ERROR", "WARN"):
+            if counts[key] > 0:
+                text += f"  {key}={counts[key]}"
+        if summary["outcome"] == batch.OUTCOME_FAILED:
+            text += f"  ({summary['error']})"
+        print(text)
+
+    print("\nsummary statistics")
+    print(str(batch.summary_table(summaries)))
+    if incremental:
+        n = len([s for s in summaries if s["stored"]])
+        print(f"findings of {n} unchanged file(s) from previous validation")
     print(f"NeXus definitions version: {args.file_set_name}")
+    return batch.exit_code(summaries)
+
+
+def validate_to_records(args, file_names, statuses):
+    """
+    validate the file(s), write each finding as a record (see ``--format``)
+
+    Returns the exit code (see :func:`punx.batch.exit_code`).
+    """
+    from . import batch
+    from . import report
+
+    incremental = args.incremental
+    if incremental and args.content_hash:
+        incremental = "content"
+
+    binary = args.format == "parquet"
+    if args.output is None:
+        stream = sys.stdout.buffer if binary else sys.stdout
+    elif binary:
+        stream = open(args.output, "wb")
+    else:
+        stream = open(args.output, "w", newline="")
+    try:
+        writer = report.get_report_writer(args.format, stream, statuses)
+    except ValueError as exc:
+        exit_message(str(exc), exit_code=batch.EXIT_FAILED)
+
+    summaries = []
+    for summary in batch.validate_files(
+        file_names,
+        args.file_set_name,
+        workers=args.workers or None,
+        incremental=incremental,
+        records=statuses,
+        checks=args.checks,
+    ):
+        for record in summary.pop("records"):
+            writer.write_record(record)
+        if summary["outcome"] == batch.OUTCOME_FAILED:
+            logger.warning("%s: %s", summary["file"], summary["error"])
+        summaries.append(summary)
+    writer.close()
+    if args.output is not None:
+        stream.close()
+    return batch.exit_code(summaries)
 
 
 def func_install(args):
@@ -350,6 +552,27 @@ def parse_command_line_arguments():
     # TODO: add_logging_argument(p_sub)
     p_sub.set_defaults(func=func_demo)
 
+    # --- subcommand: diff
+    help_text = "compare the findings of two validation runs"
+    p_sub = subcommand.add_parser("diff", help=help_text)
+    p_sub.set_defaults(func=func_diff)
+    help_text = "findings of a run (punx validate --format jsonl|csv|json|parquet)"
+    p_sub.add_argument("old_run", help="old " + help_text)
+    p_sub.add_argument("new_run", help="new " + help_text)
+    p_sub.add_argument(
+        "--ignore-comment",
+        action="store_true",
+        default=False,
+        dest="ignore_comment",
+        help="findings with the same status but a new comment are not changed",
+    )
+    p_sub.add_argument(
+        "--format",
+        default="text",
+        choices=["text", "jsonl"],
+        help="format of the differences: text (default, with summary) or jsonl",
+    )
+
     #     # --- subcommand hierarchy
     #     # TODO: issue #1 & #10
     #     help_text = 'show NeXus base class hierarchy from a given base class'
@@ -402,13 +625,76 @@ def parse_command_line_arguments():
         # choices=range(1,51),
         help=help_text,
     )
+    p_sub.add_argument(
+        "--path",
+        default="/",
+        help="show only this group (HDF5 address, such as /entry/instrument)",
+    )
+    p_sub.add_argument(
+        "--max-depth",
+        type=int,
+        help="show only this many levels of groups (below --path)",
+    )
+    p_sub.add_argument(
+        "--include",
+        action="append",
+        metavar="PATTERN",
+        help="show only items with names (or HDF5 addresses) matching"
+        " this glob pattern, with their content (repeat for more)",
+    )
+    p_sub.add_argument(
+        "--exclude",
+        action="append",
+        metavar="PATTERN",
+        help="do not show items with names (or HDF5 addresses) matching"
+        " this glob pattern (repeat for more)",
+    )
+    p_sub.add_argument(
+        "--nx-class",
+        action="append",
+        metavar="NX_CLASS",
+        help="show only the content of groups of this NeXus class,"
+        " such as NXdetector (separate with comma or repeat for more)",
+    )
     # TODO: add_logging_argument(p_sub)
 
     # --- subcommand: validate
-    p_sub = subcommand.add_parser("validate", help="validate a NeXus file")
-    p_sub.add_argument("infile", help="HDF5 or NXDL file name")
+    p_sub = subcommand.add_parser("validate", help="validate NeXus file(s)")
+    p_sub.add_argument(
+        "infiles",
+        nargs="+",
+        help="HDF5 or NXDL file name(s), directories, or glob patterns",
+    )
     p_sub.set_defaults(func=func_validate)
 
+    help_text = "number of processes to validate many files"
+    help_text += " -- default=1, 0: one per CPU"
+    p_sub.add_argument(
+        "-w",
+        "--workers",
+        default=1,
+        type=_workers,
+        help=help_text,
+    )
+
+    help_text = "use stored findings of files unchanged since their last validation"
+    p_sub.add_argument(
+        "-i",
+        "--incremental",
+        action="store_true",
+        default=False,
+        help=help_text,
+    )
+
+    help_text = "with --incremental: also compare a hash of the file content"
+    p_sub.add_argument(
+        "--content-hash",
+        action="store_true",
+        default=False,
+        dest="content_hash",
+        help=help_text,
+    )
+
     help_text = "NeXus NXDL file set (definitions) name for validation"
     help_text += f" -- default={cm.default_file_set.ref}"
     p_sub.add_argument(
@@ -426,19 +712,53 @@ def parse_command_line_arguments():
         " (separate with comma if more than one, do not use white space)"
     )
     p_sub.add_argument("--report", default=reporting_choices, help=help_text)
+
+    from . import validations
+
+    check_names = ",".join(validations.CHECKS)
+    help_text = f"run only these checks, choices: {check_names}"
+    help_text += " (separate with comma) -- default: all"
+    p_sub.add_argument("--checks", default=None, help=help_text)
+
+    help_text = "do not run these checks (separate with comma)"
+    p_sub.add_argument(
+        "--skip-checks", default=None, dest="skip_checks", help=help_text
+    )
+
+    help_text = "format of the findings: text (report for people, default)"
+    help_text += ", or one record per finding: json, jsonl, csv, parquet"
+    p_sub.add_argument(
+        "--format",
+        default="text",
+        choices="text json jsonl csv parquet".split(),
+        help=help_text,
+    )
+
+    help_text = "with --format (not text): write the records to this file"
+    help_text += " -- default: standard output"
+    p_sub.add_argument("-o", "--output", default=None, help=help_text)
+
+    help_text = "text report of one file: also print statistics of the name memo"
+    p_sub.add_argument(
+        "--statistics", action="store_true", default=False, help=help_text
+    )
     # TODO: add_logging_argument(p_sub)
 
     return p.parse_args()
 
 
 def main():
-    print("\n!!! WARNING: this program is not ready for distribution.\n")
     args = parse_command_line_arguments()
+    # keep standard output for the records (punx validate --format)
+    stream = sys.stdout if getattr(args, "format", "text") == "text" else sys.stderr
+    print("\n!!! WARNING: this program is not ready for distribution.\n", file=stream)
     if not hasattr(args, "func"):
         print("ERROR: must specify a subcommand -- for help, type:")
         print("%s -h" % sys.argv[0])
         sys.exit(1)
-    args.func(args)
+    exit_code = args.func(args)
+    if exit_code:
+        sys.exit(exit_code)
 
 
 if __name__ == "__main__":
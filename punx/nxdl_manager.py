@@ -24,16 +24,73 @@ and XML Schema files that comprise a version of the NeXus definitions standard.
 It is identified by a name (release name, tag name, short commit hash, or branch
 name).
 
+Parsing and validating all the NXDL files of a file set takes a noticeable
+time.  Once parsed, the :class:`NXDL_Manager` writes a *snapshot* (a pickle
+of the parsed content) into a subdirectory of the user cache.  The snapshot
+is used to construct the next :class:`NXDL_Manager` of the same file set
+as long as no file in the file set has changed.
+
+Parsing the NXDL files of a file set may be spread over several threads
+or processes, see the ``parallel`` parameter of :class:`NXDL_Manager`.
+Or, each NXDL file may be parsed only when its class is first used,
+see the ``lazy`` parameter of :class:`NXDL_Manager` and :class:`NXDL_Classes`.
+:class:`~punx.validate.Data_File_Validator` uses such a manager,
+so a data file is validated parsing only the classes it uses.
+
+The result of validating each NXDL file against its XML Schema is
+recorded in the user cache, keyed by the content of both files
+(see :class:`NXDL_Validation_Cache`).  Cached file sets do not change
+once downloaded, so an :class:`NXDL_Manager` *trusts* these records
+and validates a file only when its content (or the XML Schema) is new.
+Validating an NXDL file with :func:`punx.validate.validate_xml`
+(``punx validate *.nxdl.xml``) always validates the file.
+
+Building an :class:`NXDL_Manager` is still not free.  Long-running
+programs that validate against several file sets can share managers
+through the process-wide :class:`NXDL_Manager_Registry`
+(see :func:`get_manager`).
+
+.. autosummary::
+
+   ~NXDL_Manager
+   ~NXDL_Classes
+   ~NXDL_Manager_Registry
+   ~get_manager
+   ~get_registry
+   ~get_file_set
+   ~estimate_memory
+   ~get_NXDL_file_list
+   ~load_definition
+   ~read_nxdl_xml
+   ~validate_xml_tree
+   ~snapshot_directory
+   ~snapshot_file_name
+   ~read_snapshot
+   ~write_snapshot
+   ~NXDL_Validation_Cache
+   ~get_validation_cache
+   ~validation_cache_file_name
+
 """
 
 from __future__ import print_function
 
 import collections
+import concurrent.futures
+import copy
+import gc
+import hashlib
+import io
+import json
 import lxml.etree
 import os
+import pickle
 import six
+import sys
+import threading
+import types
 
-from .__init__ import FileNotFound, InvalidNxdlFile
+from .__init__ import __version__, FileNotFound, InvalidNxdlFile
 from . import nxdl_schema
 from . import cache_manager
 from . import utils
@@ -41,6 +98,13 @@ from . import utils
 
 logger = utils.setup_logger(__name__)
 
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_SUBDIR = "snapshots"
+REGISTRY_MAX_SIZE = 4  # number of NXDL_Manager instances kept by the registry
+VALIDATION_CACHE_FORMAT_VERSION = 1
+VALIDATION_CACHE_FILE = "nxdl_validation.json"
+PARALLEL_MODES = ("thread", "process")
+
 
 class NXDL_Manager(object):
 
@@ -54,6 +118,7 @@ class NXDL_Manager(object):
         is the NeXus class name and the value is an instance of the
         :class:`~punx.nxdl_manager.NXDL__definition()` class (defined below)
         which describes the NXDL structure.
+        (Instance of :class:`NXDL_Classes` when ``lazy=True``.)
 
     nxdl_file_set str :
         Absolute path to a directory which contains a complete set of the
@@ -68,20 +133,65 @@ class NXDL_Manager(object):
     nxdl_defaults obj :
         Instance of :class:`punx.nxdl_schema.NXDL_Summary()` or ``None``.
         If not ``None``, default values for all NXDL as defined by the ``nxdl.xsd``.
+        Shared by all definitions (and managers) of the file set: read-only.
+
+    snapshot_loaded bool :
+        ``True`` if ``classes`` was loaded from a snapshot
+        (see :func:`read_snapshot`) rather than parsed from the NXDL files.
+
+    PARAMETERS
+
+    file_set obj or str:
+        Instance of :class:`~punx.cache_manager.NXDL_File_Set()`,
+        name of a file set, or ``None`` to use the default file set.
+    use_snapshot bool:
+        If ``True`` (default), load the parsed NXDL content from
+        a snapshot if available and current, and write a new snapshot
+        after parsing the NXDL files.
+    parallel str:
+        How to parse the NXDL files (when not loaded from a snapshot).
+
+        * ``None`` (default): one after another
+        * ``"thread"``: read and validate (lxml) the XML in a pool of threads
+        * ``"process"``: read, validate, and parse each NXDL file
+          in a pool of processes
+
+        In all cases, ``classes`` is in the same order (category, then alphabetical).
+    workers int:
+        Maximum number of threads or processes for ``parallel`` parsing.
+        (default: ``None``, chosen by :mod:`concurrent.futures`)
+    lazy bool:
+        If ``True``, only index the NXDL files now and parse each
+        when its class is first used (see :class:`NXDL_Classes`).
+        A current snapshot is still loaded, when available.
+        No snapshot is written.
+        (default: ``False``)
+    prefetch [str]:
+        (optional, only with ``lazy=True``) Names of NXDL classes
+        to be parsed now.  Unknown names are ignored.
+    trusted bool:
+        If ``True``, do not validate an NXDL file again when the
+        :class:`NXDL_Validation_Cache` has a result for its content.
+        (default: ``True``)
     """
 
     nxdl_file_set = None
     nxdl_defaults = None
-
-    def __init__(self, file_set=None):
-        if file_set is None:
-            cm = cache_manager.CacheManager()
-            file_set = cm.default_file_set
-        elif isinstance(file_set, six.string_types):
-            cm = cache_manager.CacheManager()
-            cm.select_NXDL_file_set(file_set)
-            file_set = cm.default_file_set
-        assert isinstance(file_set, cache_manager.NXDL_File_Set)
+    snapshot_loaded = False
+    trusted = True
+
+    def __init__(
+        self,
+        file_set=None,
+        use_snapshot=True,
+        parallel=None,
+        workers=None,
+        lazy=False,
+        prefetch=None,
+        trusted=True,
+    ):
+        file_set = get_file_set(file_set)
+        self.trusted = trusted
 
         if file_set.path is None or not os.path.exists(file_set.path):
             msg = "NXDL directory: " + str(file_set.path)
@@ -89,15 +199,32 @@ class NXDL_Manager(object):
             raise FileNotFound(msg)
 
         self.nxdl_file_set = file_set
+        if use_snapshot and self.load_snapshot():
+            return
+
+        if parallel is not None and parallel not in PARALLEL_MODES:
+            raise ValueError(
+                f"parallel='{parallel}' must be one of: None, {', '.join(PARALLEL_MODES)}"
+            )
+
         self.nxdl_defaults = self.get_nxdl_defaults()
-        self.classes = collections.OrderedDict()
+        file_list = get_NXDL_file_list(file_set.path)
 
-        for nxdl_file_name in get_NXDL_file_list(file_set.path):
-            logger.debug("reading NXDL file: " + nxdl_file_name)
-            definition = NXDL__definition(nxdl_manager=self)  # the default
-            definition.set_file(nxdl_file_name)  # defines definition.title
+        if lazy:
+            self.classes = NXDL_Classes(self, file_list)
+            self.prefetch(prefetch or [])
+            return
+
+        self.classes = collections.OrderedDict()
+        if parallel == "thread":
+            definitions = self._load_with_threads(file_list, workers)
+        elif parallel == "process":
+            definitions = self._load_with_processes(file_list, workers)
+        else:
+            definitions = (load_definition(self, fname) for fname in file_list)
+
+        for definition in definitions:
             self.classes[definition.title] = definition
-            definition.parse_nxdl_xml()
 
             logger.debug(definition)
             for j in "attributes groups fields links".split():
@@ -108,10 +235,14 @@ class NXDL_Manager(object):
                 logger.debug("symbol: " + v)
             logger.debug("-" * 50)
 
+        get_validation_cache().save()
+        if use_snapshot:
+            write_snapshot(self)
+
     def __str__(self, *args, **kwargs):
         s = "NXDL_Manager("
         count = {}
-        for v in self.classes.values():
+        for v in dict.values(self.classes):  # do not parse any lazy classes
             if v.category not in count:
                 count[v.category] = 0
             count[v.category] += 1
@@ -120,13 +251,464 @@ class NXDL_Manager(object):
         s += ")"
         return s
 
+    def class_category(self, nx_class):
+        """
+        Return the category (such as ``base_classes``) of NXDL class ``nx_class``.
+
+        ``None`` if the class is not known.  With ``lazy=True``, the
+        category is known from the index, the class is not parsed.
+        """
+        definition = dict.get(self.classes, nx_class)  # do not parse a lazy class
+        if definition is None:
+            return None
+        return definition.category
+
+    def prefetch(self, names):
+        """
+        Parse the named NXDL classes now (when ``lazy=True``).
+
+        Unknown names are ignored.  Without ``lazy=True``,
+        all classes have been parsed already.
+        """
+        for nx_class in names:
+            self.classes.get(nx_class)
+
+    def _load_with_threads(self, file_list, workers):
+        """
+        Read & validate the XML in threads, parse definitions in this thread.
+
+        lxml releases the GIL while reading and validating.
+        """
+        from . import schema_manager
+
+        schema_file = schema_manager.get_default_schema_manager().schema_file
+        thread_data = threading.local()
+
+        def read(fname):
+            if not hasattr(thread_data, "schema"):
+                # XMLSchema validators are not shared between threads
+                thread_data.schema = lxml.etree.XMLSchema(lxml.etree.parse(schema_file))
+            return read_nxdl_xml(
+                fname,
+                schema=thread_data.schema,
+                trusted=self.trusted,
+                schema_file=schema_file,
+            )
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            for fname, lxml_tree in zip(file_list, pool.map(read, file_list)):
+                yield load_definition(self, fname, lxml_tree=lxml_tree)
+
+    def _load_with_processes(self, file_list, workers):
+        """
+        Parse definitions in processes.
+
+        Each process parses the same ``nxdl.xsd`` file.  References to its
+        ``nxdl_defaults`` are pickled by position (see :class:`_DefaultsPickler`)
+        and replaced here by the same objects of ``self.nxdl_defaults``.
+        """
+        from . import schema_manager
+
+        schema_file = schema_manager.get_default_schema_manager().schema_file
+        shared = _list_defaults_objects(self.nxdl_defaults)
+        validation_cache = get_validation_cache()
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_process_worker,
+            initargs=(self.nxdl_file_set.info, schema_file, self.trusted),
+        ) as pool:
+            for payload, records in pool.map(_load_definition_in_process, file_list):
+                validation_cache.update(records)
+                definition = _DefaultsUnpickler(io.BytesIO(payload), shared).load()
+                definition.nxdl_manager = self
+                yield definition
+
+    def load_snapshot(self):
+        """
+        Load ``nxdl_defaults`` and ``classes`` from the snapshot of the file set.
+
+        Return ``True`` if the snapshot was loaded.
+        """
+        content = read_snapshot(self.nxdl_file_set)
+        if content is None:
+            return False
+
+        self.nxdl_defaults = content["nxdl_defaults"]
+        self.classes = content["classes"]
+        for definition in self.classes.values():
+            definition.nxdl_manager = self
+        self.snapshot_loaded = True
+        return True
+
     def get_nxdl_defaults(self):
         """
         Get default values for this NXDL type from the NXDL Schema.
+
+        The ``nxdl.xsd`` file is parsed only once,
+        see :func:`punx.nxdl_schema.get_nxdl_summary()`.
         """
         schema_file = os.path.join(self.nxdl_file_set.path, nxdl_schema.NXDL_XSD_NAME)
         if os.path.exists(schema_file):
-            return nxdl_schema.NXDL_Summary(schema_file)
+            return nxdl_schema.get_nxdl_summary(schema_file)
+
+
+class _Unparsed(object):
+
+    """Index entry of an NXDL class not parsed yet."""
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.category = os.path.split(os.path.dirname(file_name))[-1]
+
+
+class NXDL_Classes(collections.OrderedDict):
+
+    """
+    Dictionary of NXDL classes, each parsed on first use.
+
+    The keys (NeXus class names, in the usual order) are known from the
+    file names.  Any access to a value (such as ``classes.get(nx_class)``,
+    ``classes[nx_class]``, ``classes.values()``, or ``classes.items()``)
+    reads, validates, and parses the NXDL file if not done already.
+    Membership tests (``nx_class in classes``) and ``len(classes)``
+    do not parse any NXDL file.
+
+    .. autosummary::
+
+       ~is_parsed
+       ~parsed
+    """
+
+    def __init__(self, manager, file_list):
+        collections.OrderedDict.__init__(self)
+        self._manager = manager
+        self._lock = threading.RLock()
+        for fname in file_list:
+            title = os.path.split(fname)[-1].split(".")[0]
+            collections.OrderedDict.__setitem__(self, title, _Unparsed(fname))
+
+    def __getitem__(self, key):
+        value = collections.OrderedDict.__getitem__(self, key)
+        if isinstance(value, _Unparsed):
+            with self._lock:
+                value = collections.OrderedDict.__getitem__(self, key)
+                if isinstance(value, _Unparsed):  # not parsed by another thread
+                    value = load_definition(self._manager, value.file_name)
+                    collections.OrderedDict.__setitem__(self, key, value)
+                    get_validation_cache().save()
+        return value
+
+    def __reduce__(self):
+        """Pickle as an (entirely parsed) OrderedDict."""
+        return (collections.OrderedDict, (list(self.items()),))
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def values(self):
+        return [self[k] for k in list(self.keys())]
+
+    def items(self):
+        return [(k, self[k]) for k in list(self.keys())]
+
+    def is_parsed(self, key):
+        """Has the NXDL class ``key`` been parsed?"""
+        return not isinstance(collections.OrderedDict.__getitem__(self, key), _Unparsed)
+
+    def parsed(self):
+        """Return the names of the NXDL classes parsed so far."""
+        return [k for k in self.keys() if self.is_parsed(k)]
+
+
+class NXDL_Manager_Registry(object):
+
+    """
+    Thread-safe, bounded (least-recently used) cache of :class:`NXDL_Manager` instances.
+
+    Managers are keyed by the cache, ``ref``, ``sha``, and path of their file set,
+    and by ``lazy`` (see :class:`NXDL_Manager`).
+    All callers requesting the same file set (and ``lazy``) share the same manager.
+    When more than ``max_size`` managers are kept, or their total (estimated)
+    memory exceeds ``max_memory`` bytes, the least-recently used managers
+    are evicted.  The most-recently used manager is never evicted.
+
+    USAGE::
+
+        registry = NXDL_Manager_Registry(max_size=3, max_memory=50_000_000)
+        manager = registry.get("v2018.5")
+        ...
+        print(registry.statistics())
+
+    .. autosummary::
+
+       ~get
+       ~configure
+       ~clear
+       ~statistics
+    """
+
+    def __init__(self, max_size=REGISTRY_MAX_SIZE, max_memory=None):
+        self.max_size = max_size
+        self.max_memory = max_memory
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._managers = collections.OrderedDict()  # key: (manager, memory)
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._managers)
+
+    def __str__(self):
+        args = ", ".join(["%s=%s" % (k, v) for k, v in self.statistics().items()])
+        return "NXDL_Manager_Registry(" + args + ")"
+
+    def get(self, file_set=None, lazy=False, prefetch=None):
+        """
+        Return the shared :class:`NXDL_Manager` for ``file_set`` (build if needed).
+
+        ``file_set``, ``lazy``, and ``prefetch`` have the same meaning as
+        in :class:`NXDL_Manager`.  The ``prefetch`` classes are parsed
+        also when the manager is shared.
+        """
+        file_set = get_file_set(file_set)
+        key = (file_set.cache, file_set.ref, file_set.sha, file_set.path, bool(lazy))
+
+        with self._lock:
+            manager = self._lookup(key)
+            if manager is None:
+                key_lock = self._key_locks.setdefault(key, threading.Lock())
+        if manager is not None:
+            manager.prefetch(prefetch or [])
+            return manager
+
+        # Only one thread builds the manager of a file set.
+        # Other threads waiting for the same file set will find it.
+        with key_lock:
+            with self._lock:
+                manager = self._lookup(key)
+                if manager is None:
+                    self.misses += 1
+
+            if manager is not None:  # built by another thread
+                manager.prefetch(prefetch or [])
+                return manager
+
+            manager = NXDL_Manager(file_set, lazy=lazy, prefetch=prefetch)
+            memory = estimate_memory(manager)
+
+            with self._lock:
+                self._managers[key] = (manager, memory)
+                self._key_locks.pop(key, None)
+                self._evict()
+        return manager
+
+    def configure(self, max_size=None, max_memory=None):
+        """Change the limits of the registry, evict as needed."""
+        with self._lock:
+            if max_size is not None:
+                self.max_size = max_size
+            if max_memory is not None:
+                self.max_memory = max_memory
+            self._evict()
+
+    def clear(self):
+        """Remove all managers and reset the counters."""
+        with self._lock:
+            self._managers.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def statistics(self):
+        """Return a dictionary with the counters and the current usage."""
+        with self._lock:
+            return collections.OrderedDict(
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                size=len(self._managers),
+                max_size=self.max_size,
+                memory=self._memory(),
+                max_memory=self.max_memory,
+            )
+
+    def _lookup(self, key):
+        """Return the manager and count a hit, or None.  Call with lock held."""
+        entry = self._managers.get(key)
+        if entry is None:
+            return None
+        self._managers.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def _memory(self):
+        return sum([memory for _manager, memory in self._managers.values()])
+
+    def _evict(self):
+        """Evict least-recently used managers over the limits.  Call with lock held."""
+
+        def over_limits():
+            if len(self._managers) > max(self.max_size, 1):
+                return True
+            return self.max_memory is not None and self._memory() > self.max_memory
+
+        while len(self._managers) > 1 and over_limits():
+            key, _entry = self._managers.popitem(last=False)
+            self.evictions += 1
+            logger.debug("evicted NXDL_Manager: %s", str(key))
+
+
+_registry = NXDL_Manager_Registry()
+
+
+def get_registry():
+    """Return the process-wide :class:`NXDL_Manager_Registry`."""
+    return _registry
+
+
+def get_manager(file_set=None, lazy=False, prefetch=None):
+    """
+    Return the shared :class:`NXDL_Manager` for ``file_set`` from the registry.
+
+    See :meth:`NXDL_Manager_Registry.get`.
+    """
+    return _registry.get(file_set, lazy=lazy, prefetch=prefetch)
+
+
+def get_file_set(file_set=None):
+    """
+    Return the :class:`~punx.cache_manager.NXDL_File_Set` described by ``file_set``.
+
+    PARAMETERS
+
+    file_set obj or str:
+        Instance of :class:`~punx.cache_manager.NXDL_File_Set()` (returned as-is),
+        name of a file set (also becomes the default file set),
+        or ``None`` for the default file set.
+    """
+    if file_set is None:
+        cm = cache_manager.CacheManager()
+        file_set = cm.default_file_set
+    elif isinstance(file_set, six.string_types):
+        cm = cache_manager.CacheManager()
+        cm.select_NXDL_file_set(file_set)
+        file_set = cm.default_file_set
+    assert isinstance(file_set, cache_manager.NXDL_File_Set)
+    return file_set
+
+
+def estimate_memory(manager):
+    """
+    Return the estimated memory (bytes) used by the NXDL content of ``manager``.
+
+    Sum of ``sys.getsizeof()`` over all objects reachable from
+    the manager's ``classes`` and ``nxdl_defaults``.
+    """
+    skip = (type, types.ModuleType, types.FunctionType, types.MethodType)
+    seen = {id(manager), id(manager.nxdl_file_set)}
+    stack = [manager.classes, manager.nxdl_defaults]
+    total = 0
+    while len(stack) > 0:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, skip):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        stack += gc.get_referents(obj)
+    return total
+
+
+class _DefaultsPickler(pickle.Pickler):
+
+    """Pickle references to the ``nxdl_defaults`` objects by their position."""
+
+    def __init__(self, file, shared):
+        pickle.Pickler.__init__(self, file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.positions = {id(obj): i for i, obj in enumerate(shared)}
+
+    def persistent_id(self, obj):
+        return self.positions.get(id(obj))
+
+
+class _DefaultsUnpickler(pickle.Unpickler):
+
+    """Restore references to the ``nxdl_defaults`` objects from their position."""
+
+    def __init__(self, file, shared):
+        pickle.Unpickler.__init__(self, file)
+        self.shared = shared
+
+    def persistent_load(self, pid):
+        return self.shared[pid]
+
+
+def _list_defaults_objects(nxdl_defaults):
+    """
+    Return the objects of ``nxdl_defaults`` in a repeatable order.
+
+    Two instances of :class:`~punx.nxdl_schema.NXDL_Summary` from the
+    same ``nxdl.xsd`` file give corresponding objects at the same position.
+    """
+    objects = []
+    seen = set()
+    stack = [nxdl_defaults]
+    while len(stack) > 0:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, dict):
+            stack += reversed(list(obj.values()))
+        elif isinstance(obj, list):
+            stack += reversed(obj)
+        elif hasattr(obj, "__dict__") and not isinstance(obj, type):
+            objects.append(obj)
+            stack += reversed(list(obj.__dict__.values()))
+    return objects
+
+
+_process_worker = {}
+
+
+def _init_process_worker(info_file, schema_file, trusted):
+    """Prepare a process of the pool used by ``NXDL_Manager(parallel="process")``."""
+    file_set = cache_manager.NXDL_File_Set()
+    file_set.read_info_file(info_file)
+
+    manager = NXDL_Manager.__new__(NXDL_Manager)  # no NXDL files parsed here
+    manager.nxdl_file_set = file_set
+    manager.nxdl_defaults = manager.get_nxdl_defaults()
+    manager.classes = collections.OrderedDict()
+
+    _process_worker["manager"] = manager
+    _process_worker["schema"] = lxml.etree.XMLSchema(lxml.etree.parse(schema_file))
+    _process_worker["schema_file"] = schema_file
+    _process_worker["trusted"] = trusted
+    _process_worker["shared"] = _list_defaults_objects(manager.nxdl_defaults)
+
+
+def _load_definition_in_process(nxdl_file_name):
+    """
+    Parse one NXDL file in a pool process.
+
+    Return the pickled definition and any new validation records.
+    """
+    lxml_tree = read_nxdl_xml(
+        nxdl_file_name,
+        schema=_process_worker["schema"],
+        trusted=_process_worker["trusted"],
+        schema_file=_process_worker["schema_file"],
+    )
+    definition = load_definition(
+        _process_worker["manager"], nxdl_file_name, lxml_tree=lxml_tree
+    )
+    buffer = io.BytesIO()
+    _DefaultsPickler(buffer, _process_worker["shared"]).dump(definition)
+    return buffer.getvalue(), get_validation_cache().pop_new_records()
 
 
 def get_NXDL_file_list(nxdl_dir):
@@ -159,15 +741,326 @@ def get_NXDL_file_list(nxdl_dir):
     return nxdl_file_list
 
 
-def validate_xml_tree(xml_tree):
+def snapshot_directory():
+    """Return the directory (in the user cache) with the NXDL_Manager snapshots."""
+    cm = cache_manager.CacheManager()
+    return os.path.join(cm.user.path, SNAPSHOT_SUBDIR)
+
+
+def snapshot_file_name(file_set):
+    """
+    Return the name of the snapshot file for the ``file_set``.
+
+    The name identifies the cache, the ``ref``, and the ``sha``
+    (from the file set's ``__github_info__.json`` file).
+    """
+    ref = str(file_set.ref).replace(os.sep, "_").replace("/", "_")
+    sha = cache_manager.get_short_sha(str(file_set.sha))
+    fname = f"{file_set.cache}-{ref}-{sha}.p"
+    return os.path.join(snapshot_directory(), fname)
+
+
+def read_snapshot(file_set):
+    """
+    Return the content of the snapshot of ``file_set`` or ``None``.
+
+    ``None`` is returned when there is no snapshot, the snapshot cannot
+    be read, or the snapshot is out of date (written by a different
+    version of punx, from a different ``sha``, or any file in the
+    file set has changed since the snapshot was written).
+    """
+    fname = snapshot_file_name(file_set)
+    if not os.path.exists(fname):
+        return None
+
+    try:
+        with open(fname, "rb") as fp:
+            content = pickle.load(fp)
+    except Exception as exc:
+        logger.debug("cannot read snapshot %s: %s", fname, exc)
+        return None
+
+    expected = dict(
+        format=SNAPSHOT_FORMAT_VERSION,
+        punx_version=__version__,
+        sha=file_set.sha,
+        fingerprint=file_set.fingerprint(),
+    )
+    if not isinstance(content, dict):
+        return None
+    for k, v in expected.items():
+        if content.get(k) != v:
+            logger.debug("snapshot %s is out of date: %s", fname, k)
+            return None
+    logger.debug("read snapshot: %s", fname)
+    return content
+
+
+def write_snapshot(manager):
+    """
+    Write the parsed NXDL content of ``manager`` to its snapshot file.
+
+    Failure to write the snapshot is not an error (the snapshot is
+    only an optimization).
+    """
+    file_set = manager.nxdl_file_set
+    fname = snapshot_file_name(file_set)
+    content = dict(
+        format=SNAPSHOT_FORMAT_VERSION,
+        punx_version=__version__,
+        sha=file_set.sha,
+        fingerprint=file_set.fingerprint(),
+        nxdl_defaults=manager.nxdl_defaults,
+        classes=manager.classes,
+    )
+
+    temp_name = f"{fname}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(fname), exist_ok=True)
+        with open(temp_name, "wb") as fp:
+            pickle.dump(content, fp, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_name, fname)  # atomic: readers never see partial file
+    except Exception as exc:
+        logger.debug("cannot write snapshot %s: %s", fname, exc)
+        if os.path.exists(temp_name):
+            os.remove(temp_name)
+        return
+    logger.debug("wrote snapshot: %s", fname)
+
+
+class NXDL_Validation_Cache(object):
+
+    """
+    Results of validating NXDL files against their XML Schema file.
+
+    Each result (valid or not, and the error text) is keyed by the
+    content of the NXDL file and the content of the XML Schema file,
+    independent of the file names.  New results are kept in memory
+    until :meth:`save` writes them to ``file_name`` (a JSON file).
+
+    PARAMETERS
+
+    file_name str:
+        Name of the JSON file with the results.
+
+    .. autosummary::
+
+       ~make_key
+       ~get
+       ~record
+       ~update
+       ~pop_new_records
+       ~save
+    """
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.records = self._read()
+        self._new_records = {}
+        self._schema_digests = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.records)
+
+    def _read(self):
+        """Return the records in ``file_name``, empty if not available."""
+        if not os.path.exists(self.file_name):
+            return {}
+        try:
+            with open(self.file_name, "r") as fp:
+                content = json.load(fp)
+        except Exception as exc:
+            logger.debug("cannot read %s: %s", self.file_name, exc)
+            return {}
+        if content.get("format") != VALIDATION_CACHE_FORMAT_VERSION:
+            return {}
+        return content.get("records", {})
+
+    def make_key(self, nxdl_content, schema_file):
+        """
+        Return the key of the NXDL file ``nxdl_content`` (bytes).
+
+        The digest of the ``schema_file`` content is computed
+        once (until the file is changed).
+        """
+        st = os.stat(schema_file)
+        schema_id = (os.path.abspath(schema_file), st.st_size, st.st_mtime_ns)
+        with self._lock:
+            schema_digest = self._schema_digests.get(schema_id)
+            if schema_digest is None:
+                with open(schema_file, "rb") as fp:
+                    schema_digest = hashlib.sha256(fp.read()).hexdigest()
+                self._schema_digests[schema_id] = schema_digest
+        return schema_digest + "-" + hashlib.sha256(nxdl_content).hexdigest()
+
+    def get(self, key):
+        """Return the result (dict with keys: valid, error) for ``key`` or ``None``."""
+        with self._lock:
+            return self.records.get(key)
+
+    def record(self, key, valid, error=""):
+        """Record the result of a validation."""
+        with self._lock:
+            self.records[key] = dict(valid=valid, error=error)
+            self._new_records[key] = self.records[key]
+
+    def update(self, records):
+        """Record several results (as returned by :meth:`pop_new_records`)."""
+        for key, result in records.items():
+            self.record(key, **result)
+
+    def pop_new_records(self):
+        """Return (and forget) the results not yet saved."""
+        with self._lock:
+            records, self._new_records = self._new_records, {}
+        return records
+
+    def save(self):
+        """
+        Write any new results to ``file_name``.
+
+        Results written meanwhile by other processes are kept.
+        Failure to write the file is not an error (the records
+        are only an optimization).
+        """
+        with self._lock:
+            if len(self._new_records) == 0:
+                return
+            records = self._read()
+            records.update(self.pop_new_records())
+            self.records.update(records)
+            content = dict(format=VALIDATION_CACHE_FORMAT_VERSION, records=records)
+
+            temp_name = f"{self.file_name}.{os.getpid()}.tmp"
+            try:
+                os.makedirs(os.path.dirname(self.file_name), exist_ok=True)
+                with open(temp_name, "w") as fp:
+                    json.dump(content, fp)
+                os.replace(temp_name, self.file_name)
+            except Exception as exc:
+                logger.debug("cannot write %s: %s", self.file_name, exc)
+                if os.path.exists(temp_name):
+                    os.remove(temp_name)
+
+
+_validation_cache = None
+_validation_cache_lock = threading.Lock()
+
+
+def validation_cache_file_name():
+    """Return the name of the file (in the user cache) with the validation results."""
+    cm = cache_manager.CacheManager()
+    return os.path.join(cm.user.path, VALIDATION_CACHE_FILE)
+
+
+def get_validation_cache():
+    """Return the process-wide :class:`NXDL_Validation_Cache`."""
+    global _validation_cache
+
+    file_name = validation_cache_file_name()
+    with _validation_cache_lock:
+        if _validation_cache is None or _validation_cache.file_name != file_name:
+            _validation_cache = NXDL_Validation_Cache(file_name)
+        return _validation_cache
+
+
+def load_definition(manager, nxdl_file_name, lxml_tree=None):
+    """
+    Return the :class:`NXDL__definition` parsed from ``nxdl_file_name``.
+
+    PARAMETERS
+
+    manager obj:
+        Instance of :class:`NXDL_Manager`.
+    nxdl_file_name str:
+        Absolute path to the NXDL file.
+    lxml_tree obj:
+        (optional) Validated content of the NXDL file,
+        as returned by :func:`read_nxdl_xml`.
+    """
+    logger.debug("reading NXDL file: " + nxdl_file_name)
+    definition = NXDL__definition(nxdl_manager=manager)  # the default
+    definition.set_file(nxdl_file_name)  # defines definition.title
+    definition.parse_nxdl_xml(lxml_tree=lxml_tree)
+    return definition
+
+
+def read_nxdl_xml(nxdl_file_name, schema=None, trusted=False, schema_file=None):
+    """
+    Read and validate an NXDL file, return the lxml tree.
+
+    The result of the validation is recorded in the
+    :class:`NXDL_Validation_Cache` (if the XML Schema file is known).
+
+    PARAMETERS
+
+    nxdl_file_name str:
+        Absolute path to the NXDL file.
+    schema obj:
+        (optional) Instance of ``lxml.etree.XMLSchema``,
+        see :func:`validate_xml_tree`.
+    trusted bool:
+        If ``True``, use the recorded result of a previous validation
+        of the same content, if available, instead of validating.
+        (default: ``False``)
+    schema_file str:
+        (optional) Name of the XML Schema file of ``schema``.
+        Not needed when ``schema`` is ``None``.
+    """
+    from . import schema_manager
+
+    if nxdl_file_name is None or not os.path.exists(nxdl_file_name):
+        msg = "NXDL file: " + str(nxdl_file_name)
+        logger.error(msg)
+        raise FileNotFound(msg)
+
+    if schema is None:
+        sm = schema_manager.get_default_schema_manager()
+        schema, schema_file = sm.lxml_schema, sm.schema_file
+
+    with open(nxdl_file_name, "rb") as fp:
+        content = fp.read()
+    lxml_tree = lxml.etree.parse(io.BytesIO(content), base_url=nxdl_file_name)
+
+    validation_cache, key = None, None
+    if schema_file is not None:
+        validation_cache = get_validation_cache()
+        key = validation_cache.make_key(content, schema_file)
+
+    record = None
+    if trusted and key is not None:
+        record = validation_cache.get(key)
+    if record is None:
+        try:
+            validate_xml_tree(lxml_tree, schema=schema)
+            record = dict(valid=True, error="")
+        except InvalidNxdlFile as exc:
+            record = dict(valid=False, error=str(exc))
+        if key is not None:
+            validation_cache.record(key, **record)
+
+    if not record["valid"]:
+        msg = "NXDL file is not valid: " + nxdl_file_name
+        msg += "\n" + record["error"]
+        logger.error(msg)
+        raise InvalidNxdlFile(msg)
+
+    return lxml_tree
+
+
+def validate_xml_tree(xml_tree, schema=None):
     """
     Validate an NXDL XML file against its NeXus NXDL XML Schema file.
 
-    :param str xml_file_name: name of XML file
+    :param obj xml_tree: lxml tree of the XML file
+    :param obj schema: instance of ``lxml.etree.XMLSchema``
+        (default: XML Schema of the default file set)
     """
     from . import schema_manager
 
-    schema = schema_manager.get_default_schema_manager().lxml_schema
+    if schema is None:
+        schema = schema_manager.get_default_schema_manager().lxml_schema
     try:
         result = schema.assertValid(xml_tree)
     except lxml.etree.DocumentInvalid as exc:
@@ -206,6 +1099,22 @@ class NXDL__base(object):
         for k, v in sorted(defaults.attributes.items()):
             self.xml_attributes[k] = v
 
+    def override_xml_attribute(self, name, **kwargs):
+        """
+        Change the ``name`` entry of ``xml_attributes`` for this object only.
+
+        The entries of ``xml_attributes`` are shared with the schema defaults
+        (``nxdl_defaults``) of all definitions.  Copy the entry before changing.
+
+        EXAMPLE::
+
+            obj.override_xml_attribute("minOccurs", default_value=1)
+        """
+        obj = copy.copy(self.xml_attributes[name])
+        for k, v in kwargs.items():
+            setattr(obj, k, v)
+        self.xml_attributes[name] = obj
+
     def parse_attributes(self, xml_node):
         """
         Parse NXDL ``<attribute>`` elements in ``xml_node``.
@@ -228,7 +1137,7 @@ class NXDL__base(object):
             if self.nxdl_definition.category in ("applications",):
                 # handle contributed definitions as base classes (for now, minOccurs = 0)
                 # TODO: test for hasattr(base class, "definition")
-                obj.xml_attributes["optional"].default_value = False
+                obj.override_xml_attribute("optional", default_value=False)
 
             # Does a default already exist?
             if obj.name in self.attributes:
@@ -257,7 +1166,7 @@ class NXDL__base(object):
 
             if self.nxdl_definition.category in ("applications",):
                 # handle contributed definitions as base classes (for now, minOccurs = 0)
-                obj.xml_attributes["minOccurs"].default_value = 1
+                obj.override_xml_attribute("minOccurs", default_value=1)
 
             self.ensure_unique_name(obj)
             self.fields[obj.name] = obj
@@ -281,7 +1190,7 @@ class NXDL__base(object):
 
             if self.nxdl_definition.category in ("applications",):
                 # handle contributed definitions as base classes (for now, minOccurs = 0)
-                obj.xml_attributes["minOccurs"].default_value = 1
+                obj.override_xml_attribute("minOccurs", default_value=1)
 
             self.ensure_unique_name(obj)
             self.groups[obj.name] = obj
@@ -393,9 +1302,15 @@ class NXDL__definition(NXDL__base):  # lgtm [py/missing-call-to-init]
         self.links = {}
         self.symbols = []
 
-        nxdl_defaults = nxdl_manager.get_nxdl_defaults()
+        nxdl_defaults = nxdl_manager.nxdl_defaults or nxdl_manager.get_nxdl_defaults()
         self._init_defaults_from_schema(nxdl_defaults)
 
+    def __getstate__(self):
+        """Do not pickle the manager, it is restored by the manager."""
+        state = self.__dict__.copy()
+        state["nxdl_manager"] = None
+        return state
+
     def __str__(self, *args, **kwargs):
         s = self.title + "("
         args = []
@@ -431,22 +1346,16 @@ class NXDL__definition(NXDL__base):  # lgtm [py/missing-call-to-init]
         self.title = os.path.split(fname)[-1].split(".")[0]
         self.category = os.path.split(os.path.dirname(fname))[-1]
 
-    def parse_nxdl_xml(self):
-        """parse the XML content"""
-        if self.file_name is None or not os.path.exists(self.file_name):
-            msg = "NXDL file: " + str(self.file_name)
-            logger.error(msg)
-            raise FileNotFound(msg)
-
-        lxml_tree = lxml.etree.parse(self.file_name)
+    def parse_nxdl_xml(self, lxml_tree=None):
+        """
+        parse the XML content
 
-        try:
-            validate_xml_tree(lxml_tree)
-        except InvalidNxdlFile as exc:
-            msg = "NXDL file is not valid: " + self.file_name
-            msg += "\n" + str(exc)
-            logger.error(msg)
-            raise InvalidNxdlFile(msg)
+        lxml_tree obj:
+            (optional) Validated content of the NXDL file.
+            If ``None``, read from ``self.file_name``.
+        """
+        if lxml_tree is None:
+            lxml_tree = read_nxdl_xml(self.file_name, trusted=self.nxdl_manager.trusted)
 
         root_node = lxml_tree.getroot()
 
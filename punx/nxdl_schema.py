@@ -18,6 +18,7 @@ Read the NeXus XML Schema
 .. autosummary::
 
    ~NXDL_Summary
+   ~get_nxdl_summary
    ~render_class_str
    ~get_reference_keys
    ~get_named_parent_node
@@ -45,6 +46,7 @@ from __future__ import print_function
 
 import lxml.etree
 import os
+import threading
 
 from . import utils
 
@@ -53,6 +55,27 @@ logger = utils.setup_logger(__name__)
 NXDL_XSD_NAME = "nxdl.xsd"
 NXDL_TEST_FILE = os.path.join(os.path.dirname(__file__), "cache", "v3.3", NXDL_XSD_NAME)
 
+_summary_cache = {}
+_summary_cache_lock = threading.Lock()
+
+
+def get_nxdl_summary(nxdl_xsd_file_name):
+    """
+    Return the :class:`NXDL_Summary` of ``nxdl_xsd_file_name``.
+
+    The XML Schema file is parsed only once (or again, if it is modified).
+    The same :class:`NXDL_Summary` instance is returned to all callers
+    and must be treated as read-only.
+    """
+    key = os.path.abspath(nxdl_xsd_file_name)
+    mtime = os.stat(key).st_mtime_ns
+    with _summary_cache_lock:
+        cached = _summary_cache.get(key)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, NXDL_Summary(key))
+            _summary_cache[key] = cached
+    return cached[1]
+
 
 def get_xml_namespace_dictionary():
     """return the NeXus XML namespace dictionary"""
@@ -581,6 +604,8 @@ class NXDL_Summary(object):
         ...
         summary.simpleType['validItemName'].patterns
 
+    Parsing is expensive.  Use :func:`get_nxdl_summary()` to get
+    a shared (read-only) instance.
     """
 
     def __init__(self, nxdl_xsd_file_name):
@@ -0,0 +1,412 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2022, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+write validation findings, one finding at a time
+
+A report writer writes each finding as soon as it is given, either
+while the file is validated (see the ``report_writer`` parameter of
+:class:`~punx.validate.Data_File_Validator`) or from the findings
+of a validation (see :func:`write_report`).  No table of all findings
+is built.  The summary statistics are counted as the findings are
+written, so memory does not grow with the number of findings.
+
+=======  ====================================  ==============================
+format   writer                                output
+=======  ====================================  ==============================
+text     :class:`Text_Report_Writer`           findings table, summary table
+json     :class:`JSON_Report_Writer`           JSON array of records
+jsonl    :class:`JSONL_Report_Writer`          one JSON record per line
+csv      :class:`CSV_Report_Writer`            one row per record
+parquet  :class:`Parquet_Report_Writer`        Parquet table of records
+=======  ====================================  ==============================
+
+All formats but text write one record (see :func:`finding_record`)
+for each finding, to be loaded into a database without parsing text.
+The findings of several files can be written by one writer (call
+:meth:`~Report_Writer.begin` and :meth:`~Report_Writer.end` for each
+file, then :meth:`~Report_Writer.close`).  Parquet needs the
+optional ``pyarrow`` package and a binary stream.
+
+.. autosummary::
+
+   ~Report_Writer
+   ~Text_Report_Writer
+   ~Record_Writer
+   ~JSON_Report_Writer
+   ~JSONL_Report_Writer
+   ~CSV_Report_Writer
+   ~Parquet_Report_Writer
+   ~get_report_writer
+   ~finding_record
+   ~column_widths
+   ~write_report
+
+"""
+
+import csv
+import json
+
+import numpy
+import pyRestTable
+
+from . import finding
+
+
+REPORT_LABELS = "address status test comments".split()
+RECORD_FIELDS = "file h5_address test_name status status_value comment key".split()
+PARQUET_BATCH_SIZE = 65536  # records written to Parquet at a time
+
+
+def finding_record(fname, h5_address, test_name, status, comment, key=None):
+    """
+    Return one finding as a dictionary (see ``RECORD_FIELDS``).
+
+    ============  =========================================================
+    key           value
+    ============  =========================================================
+    file          name of the data file
+    h5_address    address of the HDF5 item
+    test_name     short description of the test
+    status        key of the status (such as ``ERROR``)
+    status_value  value of the status (see :mod:`punx.finding`)
+    comment       description (text)
+    key           hash of address and test (see :func:`~punx.finding.finding_key`)
+    ============  =========================================================
+
+    The ``key`` is made unless given.
+    """
+    return dict(
+        file=fname,
+        h5_address=h5_address,
+        test_name=str(test_name),
+        status=status.key,
+        status_value=status.value,
+        comment=str(comment),
+        key=key or finding.finding_key(h5_address, test_name),
+    )
+
+
+def _text_width(text):
+    """width of text, the longest line of a multi-line text"""
+    return max(len(line) for line in str(text).split("\n"))
+
+
+class Report_Writer(object):
+    """
+    base class: write findings to ``stream``, count them by status
+
+    :param obj stream: open text file (such as ``sys.stdout``)
+    :param [str] statuses: (optional) write only findings with these
+        status keys (such as ``["ERROR", "WARN"]``, default: all).
+        All findings are counted.
+
+    .. autosummary::
+
+       ~begin
+       ~write
+       ~write_findings
+       ~end
+       ~close
+       ~summary
+       ~score
+    """
+
+    def __init__(self, stream, statuses=None):
+        self.stream = stream
+        self.statuses = set(statuses or finding.VALID_STATUS_DICT)
+        self.fname = None
+        self.counts = [0] * len(finding.VALID_STATUS_LIST)  # by status code
+
+    def begin(self, fname=None, nxdl_file_set=None):
+        """Start the report of data file ``fname``."""
+        self.fname = fname
+        self.counts = [0] * len(finding.VALID_STATUS_LIST)
+
+    def write(self, h5_address, test_name, status, comment):
+        """Count one finding, write it if its status is reported."""
+        self.counts[finding.STATUS_CODE[status]] += 1
+        if status.key in self.statuses:
+            self._write(h5_address, test_name, status, comment)
+
+    def _write(self, h5_address, test_name, status, comment):
+        raise NotImplementedError
+
+    def write_findings(self, findings, rows=None):
+        """
+        Write the findings (a :class:`~punx.finding.Findings` object).
+
+        :param [int] rows: (optional) row numbers, in the order to be
+            written (default: all rows, in the order recorded)
+        """
+        if rows is None:
+            rows = range(len(findings))
+        for row in rows:
+            self.write(*findings.row(row))
+
+    def end(self):
+        """Finish the report of this file, return its summary."""
+        return self.summary()
+
+    def close(self):
+        """Finish the output (after the report of the last file)."""
+
+    def summary(self):
+        """Return the number of findings written for each status (so far)."""
+        return {
+            status: self.counts[code]
+            for code, status in enumerate(finding.VALID_STATUS_LIST)
+        }
+
+    def score(self):
+        """Return (total, count, average) of the values of the findings written."""
+        total, count = 0, 0
+        for status, n in zip(finding.VALID_STATUS_LIST, self.counts):
+            if status.value != 0:
+                total += n * status.value
+                count += n
+        if count == 0:
+            return total, count, 0
+        return total, count, float(total) / count
+
+
+class Text_Report_Writer(Report_Writer):
+    """
+    write findings as the text report of ``punx validate``
+
+    :param [int] widths: (optional) width of each column (see
+        :func:`column_widths`).  With widths, findings are written as a
+        reST table, the same as one made by ``pyRestTable``.  Without
+        (such as while validating), one line is written for each finding.
+    """
+
+    def __init__(self, stream, statuses=None, widths=None):
+        super().__init__(stream, statuses)
+        self.widths = widths
+        if widths is None:
+            self._separator = None
+            self._fmt = "%-7s %s  %s  %s\n"
+        else:
+            self._separator = " ".join(["=" * w for w in widths]) + "\n"
+            self._fmt = " ".join([f"%-{w}s" for w in widths]) + "\n"
+
+    def begin(self, fname=None, nxdl_file_set=None):
+        super().begin(fname, nxdl_file_set)
+        if fname is not None:
+            self.stream.write(f"data file: {fname}\n")
+        if nxdl_file_set is not None:
+            self.stream.write(
+                f"NeXus definitions: {nxdl_file_set.ref}"
+                f", dated {nxdl_file_set.last_modified}"
+                f", sha={nxdl_file_set.sha}\n\n"
+            )
+        self.stream.write("findings\n")
+        if self._separator is not None:
+            self.stream.write(self._separator)
+            self._write_cells(REPORT_LABELS)
+            self.stream.write(self._separator)
+
+    def _write_cells(self, cells):
+        cells = [str(c).split("\n") for c in cells]
+        for line in range(max(map(len, cells))):
+            self.stream.write(
+                self._fmt % tuple(c[line] if line < len(c) else "" for c in cells)
+            )
+
+    def _write(self, h5_address, test_name, status, comment):
+        if self._separator is None:
+            self.stream.write(self._fmt % (status, h5_address, test_name, comment))
+        else:
+            self._write_cells([h5_address, status, test_name, comment])
+
+    def end(self):
+        if self._separator is not None:
+            self.stream.write(self._separator)
+        self.stream.write("\n")
+
+        summary = self.summary()
+        t = pyRestTable.Table()
+        for label in "status count description (value)".split():
+            t.addLabel(label)
+        for s, c in summary.items():
+            t.addRow([s.key, c, s.description, s.value])
+        t.addRow(["", "--", "", ""])
+        t.addRow(["TOTAL", sum(summary.values()), "", ""])
+        self.stream.write("\nsummary statistics\n")
+        self.stream.write(str(t) + "\n")
+        total, count, average = self.score()
+        self.stream.write("<finding>=%f of %d items reviewed\n" % (average, count))
+        return summary
+
+
+class Record_Writer(Report_Writer):
+    """
+    base class: write each finding as a record (see :func:`finding_record`)
+
+    .. autosummary::
+
+       ~write_record
+    """
+
+    def _write(self, h5_address, test_name, status, comment):
+        self.write_record(
+            finding_record(self.fname, h5_address, test_name, status, comment)
+        )
+
+    def write_record(self, record):
+        """Write one record (a dictionary, see :func:`finding_record`)."""
+        raise NotImplementedError
+
+
+class JSON_Report_Writer(Record_Writer):
+    """write records as one JSON array (written as they are given)"""
+
+    def __init__(self, stream, statuses=None):
+        super().__init__(stream, statuses)
+        self._separator = "[\n"
+
+    def write_record(self, record):
+        self.stream.write(self._separator + json.dumps(record))
+        self._separator = ",\n"
+
+    def close(self):
+        if self._separator == "[\n":  # no records
+            self.stream.write("[")
+        self.stream.write("\n]\n")
+
+
+class JSONL_Report_Writer(Record_Writer):
+    """write records as JSON Lines, one record per line"""
+
+    def write_record(self, record):
+        self.stream.write(json.dumps(record) + "\n")
+
+
+class CSV_Report_Writer(Record_Writer):
+    """write records as CSV, one row per record (after a row of labels)"""
+
+    def __init__(self, stream, statuses=None):
+        super().__init__(stream, statuses)
+        self._csv = csv.DictWriter(stream, RECORD_FIELDS)
+        self._csv.writeheader()
+
+    def write_record(self, record):
+        self._csv.writerow(record)
+
+
+class Parquet_Report_Writer(Record_Writer):
+    """
+    write records as a Parquet table (needs the ``pyarrow`` package)
+
+    The records are written in row groups of ``PARQUET_BATCH_SIZE``.
+    The ``stream`` must be binary (such as ``sys.stdout.buffer``).
+    """
+
+    def __init__(self, stream, statuses=None):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ValueError("Parquet report needs the 'pyarrow' package")
+        super().__init__(stream, statuses)
+        self._pyarrow = pyarrow
+        self._schema = pyarrow.schema(
+            [
+                (name, pyarrow.int64() if name == "status_value" else pyarrow.string())
+                for name in RECORD_FIELDS
+            ]
+        )
+        self._parquet = pyarrow.parquet.ParquetWriter(stream, self._schema)
+        self._batch = {name: [] for name in RECORD_FIELDS}
+
+    def write_record(self, record):
+        for name, column in self._batch.items():
+            column.append(record[name])
+        if len(self._batch["key"]) >= PARQUET_BATCH_SIZE:
+            self._flush()
+
+    def _flush(self):
+        if len(self._batch["key"]) > 0:
+            self._parquet.write_table(
+                self._pyarrow.table(self._batch, schema=self._schema)
+            )
+            self._batch = {name: [] for name in RECORD_FIELDS}
+
+    def close(self):
+        self._flush()
+        self._parquet.close()
+
+
+REPORT_FORMATS = {
+    "text": Text_Report_Writer,
+    "json": JSON_Report_Writer,
+    "jsonl": JSONL_Report_Writer,
+    "csv": CSV_Report_Writer,
+    "parquet": Parquet_Report_Writer,
+}
+
+
+def get_report_writer(report_format, stream, statuses=None, **kwargs):
+    """Return a writer (see ``REPORT_FORMATS``) of ``report_format``."""
+    try:
+        writer_class = REPORT_FORMATS[report_format]
+    except KeyError:
+        choices = ", ".join(sorted(REPORT_FORMATS))
+        raise ValueError(f"unknown report format '{report_format}', use: {choices}")
+    return writer_class(stream, statuses, **kwargs)
+
+
+def column_widths(findings, rows):
+    """
+    Return the width of each column of the text report of these rows.
+
+    Each distinct text is measured once.
+    """
+    widths = [len(label) for label in REPORT_LABELS]
+    rows = numpy.asarray(rows, dtype=numpy.intp)
+    if len(rows) == 0:
+        return widths
+    texts = findings._texts
+    for column, name in ((0, "address"), (2, "test_name"), (3, "comment")):
+        ids = numpy.frombuffer(getattr(findings, name), dtype=numpy.int32)[rows]
+        for text_id in numpy.unique(ids).tolist():
+            widths[column] = max(widths[column], _text_width(texts[text_id]))
+    codes = numpy.frombuffer(findings.status, dtype=numpy.int8)[rows]
+    for code in numpy.unique(codes).tolist():
+        widths[1] = max(widths[1], len(finding.VALID_STATUS_LIST[code].key))
+    return widths
+
+
+def write_report(validator, stream, report_format="text", statuses=None):
+    """
+    Write the report of the findings of ``validator``, return the summary.
+
+    The findings (of a :class:`~punx.validate.Data_File_Validator`)
+    are written in report order (see
+    :meth:`~punx.finding.Findings.report_rows`).
+
+    :param obj stream: open text file (such as ``sys.stdout``)
+    :param str report_format: one of ``REPORT_FORMATS`` (default: text)
+    :param [str] statuses: (optional) write only findings with these
+        status keys (default: all)
+    """
+    findings = validator.validations
+    kwargs = {}
+    if report_format == "text":
+        kwargs["widths"] = column_widths(findings, findings.report_rows(statuses))
+    writer = get_report_writer(report_format, stream, statuses, **kwargs)
+    writer.begin(validator.fname, validator.manager.nxdl_file_set)
+    writer.write_findings(findings, findings.report_rows())
+    summary = writer.end()
+    writer.close()
+    return summary
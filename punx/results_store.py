@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2022, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+store validation findings for revalidation of unchanged files
+
+The findings of each validated data file are stored in an SQLite database
+in the user cache (next to the ``punx.ini`` settings file).  The findings
+are used again, instead of validating the file, as long as
+all of these are unchanged:
+
+* absolute path of the data file
+* size and modification time of the data file
+* (optional) SHA-256 hash of the content of the data file
+* ``sha`` of the NXDL file set
+* version of punx
+
+.. autosummary::
+
+   ~Results_Store
+   ~get_results_store
+   ~results_store_file_name
+   ~content_hash
+
+"""
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from .__init__ import __version__
+from . import finding
+from . import utils
+
+
+RESULTS_STORE_FILE = "results.sqlite"
+HASH_BLOCK_SIZE = 1024 * 1024
+
+logger = utils.setup_logger(__name__, logging.INFO)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    path TEXT NOT NULL,
+    file_set_sha TEXT NOT NULL,
+    punx_version TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    content_hash TEXT,
+    findings BLOB NOT NULL,
+    validated REAL NOT NULL,
+    PRIMARY KEY (path, file_set_sha, punx_version)
+)
+"""
+
+
+def results_store_file_name():
+    """Return the name of the SQLite file (in the user cache)."""
+    from . import cache_manager
+
+    cm = cache_manager.CacheManager()
+    return os.path.join(cm.user.path, RESULTS_STORE_FILE)
+
+
+def content_hash(file_name):
+    """Return the SHA-256 hash of the content of ``file_name``."""
+    h = hashlib.sha256()
+    with open(file_name, "rb") as fp:
+        for block in iter(lambda: fp.read(HASH_BLOCK_SIZE), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class Results_Store(object):
+
+    """
+    SQLite database of validation findings, one row per data file
+
+    PARAMETERS
+
+    file_name str:
+        (optional) Name of the SQLite file.
+        (default: :func:`results_store_file_name`)
+    use_content_hash bool:
+        If ``True``, also compare the SHA-256 hash of the data file
+        content.  A file with a different hash is validated again, even if
+        its size and modification time are unchanged.  A file with the
+        same hash (such as a copy with a new modification time) is not.
+        (default: ``False``, reading every file is expensive)
+
+    .. autosummary::
+
+       ~get
+       ~put
+       ~remove
+       ~clear
+       ~statistics
+    """
+
+    def __init__(self, file_name=None, use_content_hash=False):
+        self.file_name = file_name or results_store_file_name()
+        self.use_content_hash = use_content_hash
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.file_name)), exist_ok=True)
+        with self._connect() as db:
+            db.execute(_SCHEMA)
+
+    def __len__(self):
+        with self._connect() as db:
+            return db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """Connect to the database, commit (or roll back), and close."""
+        # several processes may use the same file (punx validate --workers)
+        db = sqlite3.connect(self.file_name, timeout=60)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            with db:  # transaction
+                yield db
+        finally:
+            db.close()
+
+    def _file_identity(self, data_file):
+        st = os.stat(data_file)
+        return os.path.abspath(data_file), st.st_size, st.st_mtime_ns
+
+    def get(self, data_file, file_set_sha):
+        """
+        Return the stored findings of ``data_file`` or ``None``.
+
+        ``None`` when there are no stored findings or they are out of date.
+        """
+        path, size, mtime_ns = self._file_identity(data_file)
+        with self._lock, self._connect() as db:
+            row = db.execute(
+                "SELECT size, mtime_ns, content_hash, findings FROM results"
+                " WHERE path=? AND file_set_sha=? AND punx_version=?",
+                (path, str(file_set_sha), __version__),
+            ).fetchone()
+
+        findings = None
+        if row is not None:
+            stored_size, stored_mtime_ns, stored_hash, blob = row
+            if not self.use_content_hash:
+                if (stored_size, stored_mtime_ns) == (size, mtime_ns):
+                    findings = blob
+            elif stored_size == size and stored_hash == content_hash(data_file):
+                findings = blob
+                if stored_mtime_ns != mtime_ns:  # same content, touched
+                    with self._lock, self._connect() as db:
+                        db.execute(
+                            "UPDATE results SET mtime_ns=? WHERE path=?"
+                            " AND file_set_sha=? AND punx_version=?",
+                            (mtime_ns, path, str(file_set_sha), __version__),
+                        )
+
+        if findings is None:
+            self.misses += 1
+            logger.debug("no stored findings: %s", data_file)
+            return None
+        self.hits += 1
+        logger.debug("stored findings: %s", data_file)
+        return [
+            finding.Finding(addr, test, finding.VALID_STATUS_DICT[status], comment)
+            for addr, test, status, comment in json.loads(zlib.decompress(findings))
+        ]
+
+    def put(self, data_file, file_set_sha, findings):
+        """Store the ``findings`` (list of Finding objects) of ``data_file``."""
+        path, size, mtime_ns = self._file_identity(data_file)
+        digest = content_hash(data_file) if self.use_content_hash else None
+        rows = [
+            (f.h5_address, f.test_name, f.status.key, f.comment) for f in findings
+        ]
+        blob = zlib.compress(json.dumps(rows, default=str).encode("utf8"))
+        with self._lock, self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    path,
+                    str(file_set_sha),
+                    __version__,
+                    size,
+                    mtime_ns,
+                    digest,
+                    blob,
+                    time.time(),
+                ),
+            )
+
+    def remove(self, data_file):
+        """Forget the stored findings of ``data_file`` (any file set)."""
+        with self._lock, self._connect() as db:
+            db.execute(
+                "DELETE FROM results WHERE path=?", (os.path.abspath(data_file),)
+            )
+
+    def clear(self):
+        """Forget all stored findings."""
+        with self._lock, self._connect() as db:
+            db.execute("DELETE FROM results")
+
+    def statistics(self):
+        """Return a dictionary with the hits and misses of :meth:`get`."""
+        return dict(hits=self.hits, misses=self.misses, size=len(self))
+
+
+_results_store = None
+
+
+def get_results_store(use_content_hash=False):
+    """Return the results store in the user cache (shared in this process)."""
+    global _results_store
+
+    file_name = results_store_file_name()
+    if _results_store is None or _results_store.file_name != file_name:
+        _results_store = Results_Store(file_name)
+    _results_store.use_content_hash = use_content_hash
+    return _results_store
@@ -22,6 +22,7 @@ Public
 .. autosummary::
 
    ~SchemaManager
+   ~Schema_Name_Matcher
    ~Schema_Root
    ~Schema_Attribute
    ~Schema_Element
@@ -43,8 +44,11 @@ Internal
 
 from __future__ import print_function
 
+import collections
 import lxml.etree
 import os
+import re
+import threading
 from . import NAMESPACE_DICT, FileNotFound, InvalidNxdlFile
 from . import singletons
 from . import utils
@@ -53,6 +57,9 @@ from . import utils
 logger = utils.setup_logger(__name__)
 
 
+_NOT_IN_MEMO = object()
+
+
 def strip_ns(ref):
     """
     strip the namespace prefix from ``ref``
@@ -129,6 +136,22 @@ class SchemaManager(object):
         # del self.lxml_schema    # needed for XML file validation
         del self.lxml_tree
 
+        self.name_matchers = {}
+
+    def get_name_matcher(self, key, patterns):
+        """
+        return the :class:`Schema_Name_Matcher` for ``key`` (such as *validItemName*)
+
+        The matcher is built (from ``patterns``, a dictionary of
+        regular expressions keyed by label) the first time only,
+        then shared by all validations with this schema.
+        """
+        matcher = self.name_matchers.get(key)
+        if matcher is None:
+            matcher = Schema_Name_Matcher(patterns)
+            self.name_matchers[key] = matcher
+        return matcher
+
     def parse_nxdl_patterns(self):
         """
         get regexp patterns for validItemName, validNXClassName, & validTargetName from nxdl.xsd
@@ -215,6 +238,111 @@ class Schema_pattern(object):
         self.maxLength = -1  # unlimited
 
 
+class Schema_Name_Matcher(object):
+
+    """
+    match names with an ordered set of regular expressions
+
+    All the regular expressions are compiled into one alternation,
+    the first one that matches the entire name wins (as if
+    each were tried in order).
+
+    The result for each distinct name is kept in a memo, a name seen
+    before is a dictionary lookup.  The memo is bounded (at most
+    ``memo_size`` names) in two generations: names are added to the
+    recent generation; once it is full, it becomes the older generation
+    and the previous older generation (names not used since) is dropped.
+    A name found in the older generation moves to the recent one.
+
+    A matcher is shared by all validators of the same file set
+    (see :meth:`SchemaManager.get_name_matcher`), also in several threads.
+    Changes to the memo are guarded by a lock; a name found in the
+    recent generation (the usual case) is one dictionary lookup,
+    which needs no lock.
+
+    :param dict patterns: regular expressions keyed by label, in order of preference
+    :param int memo_size: (optional) maximum number of names kept in the memo
+
+    .. autosummary::
+
+       ~match
+       ~statistics
+    """
+
+    memo_size = 100000  # default maximum number of names kept
+
+    def __init__(self, patterns, memo_size=None):
+        self.patterns = collections.OrderedDict(patterns)
+        self._labels = list(self.patterns.keys())
+        self._groups = ["p%d" % i for i in range(len(self._labels))]
+        alternatives = [
+            "(?P<%s>%s)" % (group, p)
+            for group, p in zip(self._groups, self.patterns.values())
+        ]
+        # same anchors as re.match("^" + p + "$", name) for each pattern
+        self.regexp = re.compile("^(?:" + "|".join(alternatives) + ")$")
+        self.memo_size = memo_size or self.memo_size
+        self._recent = {}  # name: label
+        self._older = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def match(self, name, counts=None):
+        """
+        Return the label of the first pattern matching ``name`` (or None).
+
+        counts [int, int]:
+            (optional) Also count the lookup here, as ``[hits, misses]``
+            (such as the lookups of one validator).
+        """
+        label = self._recent.get(name, _NOT_IN_MEMO)
+        if label is not _NOT_IN_MEMO:
+            self.hits += 1
+            if counts is not None:
+                counts[0] += 1
+            return label
+
+        with self._lock:
+            label = self._older.pop(name, _NOT_IN_MEMO)
+            missed = label is _NOT_IN_MEMO
+            if missed:
+                label = self._match(name)
+                self.misses += 1
+            else:
+                self.hits += 1
+            if counts is not None:
+                counts[int(missed)] += 1
+            self._recent[name] = label
+            if len(self._recent) >= max(1, self.memo_size // 2):
+                self._older = self._recent  # new generation
+                self._recent = {}
+        return label
+
+    def _match(self, name):
+        m = self.regexp.match(name)
+        if m is not None:
+            for group, k in zip(self._groups, self._labels):
+                if m.group(group) is not None:
+                    return k
+        return None
+
+    def statistics(self):
+        """
+        Return a dictionary with the size, hits, and misses of the memo.
+
+        (Lookups made at the very same time in several threads
+        might not all be counted.)
+        """
+        lookups = self.hits + self.misses
+        return collections.OrderedDict(
+            names=len(self._recent) + len(self._older),
+            hits=self.hits,
+            misses=self.misses,
+            hit_rate=self.hits / lookups if lookups > 0 else None,
+        )
+
+
 class Schema_nxdlType(object):
 
     """
@@ -0,0 +1,18 @@
+import pytest
+
+from .. import nxdl_manager
+
+
+@pytest.fixture(autouse=True)
+def isolated_user_cache(tmp_path, monkeypatch):
+    """
+    write NXDL_Manager snapshots and NXDL validation results in ``tmp_path``
+
+    (not in the user cache, so no test depends on what an earlier run left there)
+    """
+    snapshots = str(tmp_path / nxdl_manager.SNAPSHOT_SUBDIR)
+    cache_file = str(tmp_path / nxdl_manager.VALIDATION_CACHE_FILE)
+    monkeypatch.setattr(nxdl_manager, "snapshot_directory", lambda: snapshots)
+    monkeypatch.setattr(
+        nxdl_manager, "validation_cache_file_name", lambda: cache_file
+    )
@@ -0,0 +1,123 @@
+import os
+import pytest
+import shutil
+
+from ._core import EXAMPLE_DATA_DIR
+from ._core import tempdir  # noqa
+from .. import batch
+from .. import cache_manager
+from .. import main
+
+
+@pytest.fixture(scope="function")
+def data_dir(tempdir):
+    for fname in ("writer_1_3.hdf5", "Data_Q.h5", "verysimple.nx5"):
+        shutil.copy2(os.path.join(EXAMPLE_DATA_DIR, fname), tempdir)
+    subdir = os.path.join(tempdir, "subdir")
+    os.mkdir(subdir)
+    shutil.copy2(os.path.join(EXAMPLE_DATA_DIR, "chopper.nxs"), subdir)
+    with open(os.path.join(subdir, "bad.h5"), "w") as fp:
+        fp.write("not HDF5\n")
+    with open(os.path.join(subdir, "notes.txt"), "w") as fp:
+        fp.write("not searched\n")
+    yield tempdir
+
+
+def test_expand_file_names(data_dir):
+    subdir = os.path.join(data_dir, "subdir")
+    expected = [
+        os.path.join(data_dir, "Data_Q.h5"),
+        os.path.join(data_dir, "verysimple.nx5"),
+        os.path.join(data_dir, "writer_1_3.hdf5"),
+        os.path.join(subdir, "bad.h5"),
+        os.path.join(subdir, "chopper.nxs"),
+    ]
+    assert batch.expand_file_names([data_dir]) == expected
+
+    names = batch.expand_file_names(
+        [
+            os.path.join(data_dir, "**", "*.h5"),
+            os.path.join(data_dir, "Data_Q.h5"),  # only listed once
+            "no_such_file.h5",  # kept
+        ]
+    )
+    assert names == [
+        os.path.join(data_dir, "Data_Q.h5"),
+        os.path.join(subdir, "bad.h5"),
+        "no_such_file.h5",
+    ]
+
+
+def test_validate_file(data_dir):
+    summary = batch.validate_file(os.path.join(data_dir, "writer_1_3.hdf5"))
+    assert summary["outcome"] == batch.OUTCOME_OK
+    assert summary["error"] is None
+    assert summary["counts"]["OK"] > 0
+    assert summary["counts"]["ERROR"] == 0
+    assert summary["score"] > 90
+
+    summary = batch.validate_file(os.path.join(data_dir, "Data_Q.h5"))
+    assert summary["outcome"] == batch.OUTCOME_ERROR
+    assert summary["counts"]["ERROR"] == 1
+    assert "records" not in summary
+
+    summary = batch.validate_file(os.path.join(data_dir, "Data_Q.h5"), records=["ERROR"])
+    assert [r["status"] for r in summary["records"]] == ["ERROR"]
+    assert summary["records"][0]["file"] == summary["file"]
+
+    summary = batch.validate_file(os.path.join(data_dir, "subdir", "bad.h5"))
+    assert summary["outcome"] == batch.OUTCOME_FAILED
+    assert summary["error"] == "could not open as HDF5"
+
+    summary = batch.validate_file(os.path.join(data_dir, "no_such_file.h5"))
+    assert summary["outcome"] == batch.OUTCOME_FAILED
+    assert summary["error"] == "file not found"
+
+    cm = cache_manager.CacheManager()
+    nxdl_file = os.path.join(cm.default_file_set.path, "base_classes", "NXentry.nxdl.xml")
+    summary = batch.validate_file(nxdl_file)
+    assert summary["outcome"] == batch.OUTCOME_OK
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_validate_files(data_dir, workers):
+    file_names = batch.expand_file_names([data_dir])
+    summaries = list(batch.validate_files(file_names, workers=workers))
+    assert [s["file"] for s in summaries] == file_names
+    assert [s["outcome"] for s in summaries] == [
+        batch.OUTCOME_ERROR,  # Data_Q.h5
+        batch.OUTCOME_OK,
+        batch.OUTCOME_OK,
+        batch.OUTCOME_FAILED,  # bad.h5
+        batch.OUTCOME_ERROR,  # chopper.nxs
+    ]
+    assert batch.exit_code(summaries) == batch.EXIT_FAILED
+    assert batch.exit_code(summaries[:3]) == batch.EXIT_ERROR_FINDINGS
+    assert batch.exit_code(summaries[1:3]) == batch.EXIT_OK
+
+    table = batch.summary_table(summaries)
+    rows = {row[0]: row[1] for row in table.rows}
+    assert rows["files failed"] == 1
+    assert rows["TOTAL files"] == 5
+    assert rows["ERROR"] == sum(s["counts"]["ERROR"] for s in summaries)
+    assert rows["TOTAL findings"] == sum(sum(s["counts"].values()) for s in summaries)
+
+
+@pytest.mark.parametrize(
+    "workers, expected",
+    [
+        ["0", 0],
+        ["3", 3],
+        ["-1", None],
+        ["many", None],
+    ]
+)
+def test_workers_option(workers, expected, monkeypatch, capsys):
+    monkeypatch.setattr("sys.argv", ["punx", "validate", "-w", workers, "file.h5"])
+    if expected is None:
+        with pytest.raises(SystemExit) as exc:
+            main.parse_command_line_arguments()
+        assert exc.value.code == 2  # usage error, not a traceback
+        assert "argument -w/--workers" in capsys.readouterr().err
+    else:
+        assert main.parse_command_line_arguments().workers == expected
@@ -0,0 +1,101 @@
+import collections
+import json
+import os
+import pytest
+
+from ._core import tempdir  # noqa
+from .. import diff
+from .. import finding
+
+
+def record(fname, h5_address, test_name, status, comment=""):
+    return dict(
+        file=fname,
+        h5_address=h5_address,
+        test_name=test_name,
+        status=status,
+        comment=comment,
+        key=finding.finding_key(h5_address, test_name),
+    )
+
+
+OLD_RUN = [
+    record("a.h5", "/", "default plot", "OK"),
+    record("a.h5", "/entry", "known NXDL", "OK"),
+    record("a.h5", "/entry", "field", "OPTIONAL", "not found: x"),
+    record("a.h5", "/entry", "field", "OPTIONAL", "not found: y"),
+    record("b.h5", "/", "default plot", "ERROR"),
+    record("gone.h5", "/", "default plot", "OK"),
+]
+NEW_RUN = [
+    record("b.h5", "/", "default plot", "OK"),  # other order of files
+    record("a.h5", "/entry", "field", "OPTIONAL", "not found: y"),
+    record("a.h5", "/entry", "known NXDL", "OK"),
+    record("a.h5", "/entry", "attribute", "WARN"),
+    record("a.h5", "/", "default plot", "OK", "new comment"),
+    record("new.h5", "/", "default plot", "OK"),
+]
+
+
+def test_diff_runs():
+    counts = collections.Counter()
+    differences = list(diff.diff_runs(OLD_RUN, NEW_RUN, counts=counts))
+    assert [(d["change"], d["file"], d["test_name"]) for d in differences] == [
+        ("changed", "b.h5", "default plot"),  # both runs read b.h5 first
+        ("added", "a.h5", "attribute"),
+        ("changed", "a.h5", "default plot"),
+        ("removed", "a.h5", "field"),
+        ("removed", "gone.h5", "default plot"),
+        ("added", "new.h5", "default plot"),
+    ]
+    assert counts == dict(unchanged=2, added=2, removed=2, changed=2)
+    assert differences[3]["old_comment"] == "not found: x"
+    assert (differences[0]["old_status"], differences[0]["new_status"]) == (
+        "ERROR", "OK"
+    )
+    assert list(differences[0]) == diff.DIFF_FIELDS
+    assert diff.diff_text(differences[0]) == "~ b.h5 / [default plot] ERROR -> OK: "
+
+    counts = collections.Counter()
+    differences = list(
+        diff.diff_runs(OLD_RUN, NEW_RUN, counts=counts, compare_comment=False)
+    )
+    assert counts["changed"] == 1  # only b.h5
+    assert list(diff.diff_runs(NEW_RUN, NEW_RUN)) == []
+
+
+def test_diff_runs_interleaved():
+    interleaved = NEW_RUN[1:3] + NEW_RUN[:1] + NEW_RUN[3:]
+    assert [r["file"] for r in interleaved[:4]] == ["a.h5", "a.h5", "b.h5", "a.h5"]
+
+    # records of a.h5 appear again, before a.h5 is compared: merged
+    a_last = NEW_RUN[:1] + NEW_RUN[5:] + NEW_RUN[1:5]
+    counts = collections.Counter()
+    assert list(diff.diff_runs(a_last, interleaved, counts=counts)) == []
+    assert counts == dict(unchanged=len(NEW_RUN))
+
+    # records of a.h5 appear again, after a.h5 was compared
+    with pytest.raises(ValueError) as exc:
+        list(diff.diff_runs(NEW_RUN[1:], interleaved))
+    assert "'a.h5' are not one after another in the new run" in str(exc.value)
+    with pytest.raises(ValueError) as exc:
+        list(diff.diff_runs(interleaved, NEW_RUN[1:]))
+    assert "in the old run" in str(exc.value)
+
+
+def test_read_records(tempdir):
+    run_file = os.path.join(tempdir, "run.jsonl")
+    with open(run_file, "w") as fp:
+        for r in OLD_RUN:
+            r = dict(r)
+            del r["key"]  # made when read
+            fp.write(json.dumps(r) + "\n")
+    assert list(diff.read_records(run_file)) == OLD_RUN
+
+    run_file = os.path.join(tempdir, "run.json")
+    with open(run_file, "w") as fp:
+        json.dump(NEW_RUN, fp)
+    assert list(diff.read_records(run_file)) == NEW_RUN
+
+    with pytest.raises(ValueError):
+        diff.read_records(os.path.join(tempdir, "run.txt"))
@@ -75,3 +75,111 @@ def test_Finding_make_md5(addr, test_name, status, comment):
 
         # can be duplicated from same inputs (is NOT random)?
         assert md5 == f.make_md5()
+
+
+def test_Finding_key():
+    f = finding.Finding("/entry", "known NXDL", finding.OK, "NXentry")
+    assert isinstance(f.key, str)
+    assert len(f.key) == 16  # 64 bits
+    assert isinstance(int(f.key, 16), int)  # is hexadecimal?
+    assert f.key == finding.finding_key("/entry", "known NXDL")
+    assert f.key == finding.Finding("/entry", "known NXDL", finding.ERROR, "").key
+    assert f.key != finding.Finding("/entry", "NeXus base class", finding.OK, "").key
+    assert f.key != finding.Finding("/entry@NX_class", "known NXDL", finding.OK, "").key
+
+    findings = finding.Findings([f])
+    findings.add("/", "default plot", finding.ERROR, "no default plot")
+    assert findings.key(0) == f.key
+    assert findings.key(1) == findings[1].key
+
+
+def test_Findings():
+    findings = finding.Findings()
+    assert len(findings) == 0
+    assert list(findings.status_counts()) == [0] * len(finding.VALID_STATUS_LIST)
+
+    assert findings.add("/entry", "known NXDL", finding.OK, "NXentry") == 0
+    assert findings.add("/entry@NX_class", "attribute value", finding.OK, "NXentry") == 1
+    findings.append(finding.Finding("/entry", "NeXus base class", finding.TODO, "?"))
+    findings.extend([finding.Finding("/", "NeXus default plot", finding.ERROR, "?")])
+    with pytest.raises(ValueError):
+        findings.add("/", "test", "OK", "status is not a ValidationResultStatus")
+    assert len(findings) == 4
+    assert len(findings._texts) == 9  # "/entry" and "NXentry" kept once
+
+    f = findings[1]
+    assert isinstance(f, finding.Finding)
+    assert (f.h5_address, f.test_name, f.status, f.comment) == (
+        "/entry@NX_class", "attribute value", finding.OK, "NXentry"
+    )
+    assert findings[-1].status == finding.ERROR
+    assert [f.test_name for f in findings[1:3]] == ["attribute value", "NeXus base class"]
+    assert [f.status for f in findings] == [
+        finding.OK, finding.OK, finding.TODO, finding.ERROR
+    ]
+
+    counts = findings.status_counts()
+    assert counts[finding.STATUS_CODE[finding.OK]] == 2
+    assert counts[finding.STATUS_CODE[finding.TODO]] == 1
+    assert counts[finding.STATUS_CODE[finding.ERROR]] == 1
+    assert counts.sum() == 4
+
+    by_test = findings.by_address("/entry")
+    assert sorted(by_test) == ["NeXus base class", "known NXDL"]
+    assert by_test["known NXDL"].comment == "NXentry"
+    assert findings.by_address("/not/here") == {}
+
+    new_rows = findings.remove([0, 2])
+    assert list(new_rows) == [-1, 0, -1, 1]
+    assert [f.h5_address for f in findings] == ["/entry@NX_class", "/"]
+    assert findings.by_address("/entry") == {}
+    assert list(findings.by_address("/")) == ["NeXus default plot"]
+    findings.add("/entry", "known NXDL", finding.OK, "NXentry")  # can grow again
+    assert len(findings) == 3
+    assert list(findings.by_address("/entry")) == ["known NXDL"]
+    assert finding.Findings(findings)[2].test_name == "known NXDL"
+
+
+def test_Findings_report_rows():
+    findings = finding.Findings()
+    assert list(findings.report_rows()) == []
+    assert findings.score() == (0, 0, 0)
+    for addr, status in [
+        ("/entry/data", finding.WARN),
+        ("/entry@default", finding.OK),
+        ("/entry", finding.ERROR),
+        ("/entry/data", finding.OK),
+        ("/entry", finding.OK),
+        ("/entry", finding.TODO),
+        ("/entry@default", finding.OK),  # same key, kept in order recorded
+        ("/", finding.NOTE),
+    ]:
+        findings.add(addr, "test %d" % len(findings), status, "")
+
+    def expected(statuses=None):
+        rows = [
+            i
+            for i, f in enumerate(findings)
+            if statuses is None or f.status.key in statuses
+        ]
+        return sorted(rows, key=lambda i: finding.report_sort_key(*sort_args(i)))
+
+    def sort_args(row):
+        h5_address, test_name, status, comment = findings.row(row)
+        return h5_address, status
+
+    assert list(findings.report_rows()) == expected()
+    assert list(findings.report_rows()) == [7, 5, 4, 2, 1, 6, 3, 0]
+    assert list(findings.report_rows(["ERROR", "WARN"])) == [2, 0]
+    assert list(findings.report_rows(["not a status"])) == []
+
+    total, count, average = findings.score()
+    values = [f.status.value for f in findings if f.status.value != 0]
+    assert (total, count) == (sum(values), len(values))
+    assert average == pytest.approx(sum(values) / len(values))
+
+    findings.add("/entry/data@units", "new finding", finding.ERROR, "")
+    assert list(findings.report_rows())[-3:] == [3, 0, 8]  # order made again
+    findings.remove([0])
+    assert list(findings.report_rows()) == expected()
+    assert list(findings.report_rows())[-2:] == [2, 7]
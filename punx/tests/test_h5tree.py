@@ -1,5 +1,7 @@
 import h5py
+import numpy
 import os
+import pytest
 
 from ._core import hfile
 from .. import utils
@@ -31,3 +33,192 @@ def test_h5tree(hfile):
     mc = h5tree.Hdf5TreeView(hfile)
     assert mc is not None
     assert len(mc.report()) == 5
+
+
+def test_h5tree_string_previews(hfile):
+    with h5py.File(hfile, "w") as f:
+        f.create_dataset(
+            "events", data=numpy.array([b"event %d" % i for i in range(1000)])
+        )
+        f.create_dataset(
+            "names",
+            data=["name %d" % i for i in range(1000)],
+            dtype=h5py.string_dtype(),
+        )
+        f.create_dataset(
+            "table", data=numpy.array([[b"a", b"bb", b"c"], [b"d", b"e", b"f"]])
+        )
+        f.create_dataset("subtitle", data=numpy.array([b"<a subtitle>"]))
+
+    mc = h5tree.Hdf5TreeView(hfile)
+    mc.array_items_shown = 5
+    report = [line.strip() for line in mc.report()[1:]]
+    assert report == [
+        'events:char[9,9,9,...,9] = ["event 0", "event 1", "event 2", ..., "event 999"]',
+        "names:CHAR = [b'name 0' b'name 1' b'name 2' ... b'name 999']",
+        'subtitle:char[12] = "<a subtitle>"',
+        'table:char[2,2] = [["a", "bb", "c"], ["d", "e", "f"]]',
+    ]
+
+    mc.array_items_shown = 0
+    report = [line.strip() for line in mc.report()[1:]]
+    assert report == [
+        "events:char[...,9] = [ ... ]",
+        "names:CHAR = [ ... ]",
+        'subtitle:char[12] = "<a subtitle>"',
+        "table:char[...,2] = [ ... ]",
+    ]
+
+
+def test_h5tree_array_previews(hfile):
+    with h5py.File(hfile, "w") as f:
+        f.create_dataset("counts", data=numpy.arange(31, dtype="int32"))
+        f.create_dataset("stack", data=numpy.arange(7 * 6 * 5).reshape(7, 6, 5))
+
+    mc = h5tree.Hdf5TreeView(hfile)
+    mc.array_items_shown = 3
+    report = "\n".join(mc.report()).splitlines()
+    assert report[1] == "  counts:int32[31] = [0, '...', 30]"
+    assert report[2:] == [
+        "  stack:int64[7,6,5] = __array",
+        "    __array = [",
+        "        [",
+        "            [0, '...', 4]",
+        "            ...",
+        "            [25, '...', 29]",
+        "          ]",
+        "        ...",
+        "        [",
+        "            [180, '...', 184]",
+        "            ...",
+        "            [205, '...', 209]",
+        "          ]",
+        "      ]",
+    ]
+
+    with h5py.File(hfile, "r") as f:
+        preview = mc._readPreview(f["stack"])
+    assert preview.shape == (3, 3, 3)
+    assert preview[1, 0, 0] is h5tree.SKIPPED
+    assert preview[-1, -1, -1] == 209
+
+
+def test_h5tree_iter_report(hfile):
+    with h5py.File(hfile, "w") as f:
+        for name in "abc":
+            group = f.create_group(name)
+            group.attrs["NX_class"] = "NXcollection"
+            group.create_dataset("x", data=[1, 2, 3])
+        f.create_dataset("title", data=b"this is the title")
+
+    mc = h5tree.Hdf5TreeView(hfile)
+    lines = mc.iter_report()
+    assert next(lines) == hfile  # before the rest of the file is read
+    assert [hfile] + list(lines) == mc.report()
+    assert len(mc.report()) == 11
+
+    mc = h5tree.Hdf5TreeView("no such file")
+    assert list(mc.iter_report()) == []
+    assert mc.report() is None
+
+
+def test_h5tree_filters(hfile):
+    with h5py.File(hfile, "w") as f:
+        entry = f.create_group("entry")
+        entry.attrs["NX_class"] = "NXentry"
+        entry.create_dataset("title", data=b"scan")
+        instrument = entry.create_group("instrument")
+        instrument.attrs["NX_class"] = "NXinstrument"
+        detector = instrument.create_group("detector")
+        detector.attrs["NX_class"] = "NXdetector"
+        detector.create_dataset("distance", data=[1.5])
+        source = instrument.create_group("source")
+        source.attrs["NX_class"] = "NXsource"
+        source.create_dataset("name", data=numpy.array([b"APS"]))
+        sample = entry.create_group("sample")
+        sample.attrs["NX_class"] = "NXsample"
+        sample.create_dataset("temperature", data=[300.0, 301.0])
+
+    def tree(**filters):
+        mc = h5tree.Hdf5TreeView(hfile)
+        for k, v in filters.items():
+            setattr(mc, k, v)
+        return [line.strip() for line in mc.report(show_attributes=False)[1:]]
+
+    assert len(tree()) == 9
+    assert tree(path="/entry/instrument") == [
+        "/entry/instrument:NXinstrument",
+        "detector:NXdetector",
+        "distance:NX_FLOAT64 = 1.5",
+        "source:NXsource",
+        'name:NX_CHAR[3] = "APS"',
+    ]
+    assert tree(path="/entry/sample/temperature") == [
+        "/entry/sample/temperature:NX_FLOAT64[2] = [300.0, 301.0]",
+    ]
+    assert tree(max_depth=2) == [
+        "entry:NXentry",
+        "title:NX_CHAR = b'scan'",
+        "instrument:NXinstrument",
+        "sample:NXsample",
+    ]
+    assert tree(include=["*detector*"]) == [
+        "entry:NXentry",
+        "instrument:NXinstrument",
+        "detector:NXdetector",
+        "distance:NX_FLOAT64 = 1.5",
+    ]
+    assert tree(exclude=["instrument", "title"]) == [
+        "entry:NXentry",
+        "sample:NXsample",
+        "temperature:NX_FLOAT64[2] = [300.0, 301.0]",
+    ]
+    assert tree(nx_class=["NXsource", "NXsample"], exclude=["temperature"]) == [
+        "entry:NXentry",
+        "instrument:NXinstrument",
+        "source:NXsource",
+        'name:NX_CHAR[3] = "APS"',
+        "sample:NXsample",
+    ]
+    assert tree(include=["no such name"]) == []
+
+    with pytest.raises(KeyError):
+        tree(path="/no/such/group")
+
+
+def test_h5tree_single_open(hfile, monkeypatch):
+    with h5py.File(hfile, "w") as f:
+        entry = f.create_group("entry")
+        entry.attrs["NX_class"] = "NXentry"
+        entry.create_dataset("title", data=b"scan")
+    expected = h5tree.Hdf5TreeView(hfile).report()
+    assert expected[0] == hfile + " : NeXus data file"
+
+    class CountingFile(h5py.File):
+        opened = 0
+
+        def __init__(self, *args, **kwargs):
+            CountingFile.opened += 1
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(h5py, "File", CountingFile)
+    mc = h5tree.Hdf5TreeView(hfile)
+    assert CountingFile.opened == 0
+    assert mc.report() == expected
+    assert mc.isNeXus
+    assert CountingFile.opened == 1  # NeXus detected in the same open
+
+    # an open HDF5 file is used, not opened again, and left open
+    with h5py.File(hfile, "r") as f:
+        mc = h5tree.Hdf5TreeView(f)
+        assert mc.isNeXus
+        assert mc.report() == expected
+        assert CountingFile.opened == 2
+        assert f.id.valid
+
+    # a file-like object
+    with open(hfile, "rb") as fp:
+        mc = h5tree.Hdf5TreeView(fp)
+        assert mc.filename == hfile
+        assert mc.report() == expected
+        assert not fp.closed
@@ -1,8 +1,10 @@
 import lxml.etree
 import os
 import pytest
+import shutil
 
 from ._core import No_Exception
+from ._core import tempdir  # noqa
 from .. import cache_manager
 from .. import FileNotFound
 from .. import InvalidNxdlFile
@@ -480,3 +482,218 @@ def test_NXDL__symbols_structure(nxclass, file_set, symbols):
     # nxdl_def.symbols is a list
     symbols_defined = " ".join(nxdl_def.symbols)
     assert symbols_defined == symbols, f"{nxclass} {file_set}"
+
+
+def test_NXDL_Manager_snapshot(tempdir, monkeypatch):
+    monkeypatch.setattr(nxdl_manager, "snapshot_directory", lambda: tempdir)
+
+    # copy a file set so its files can be changed safely
+    cm = cache_manager.CacheManager()
+    source = cm.select_NXDL_file_set("v3.3").path  # validate with v3.3 schema
+    path = os.path.join(tempdir, "v3.3")
+    shutil.copytree(source, path)
+    fs = cache_manager.NXDL_File_Set()
+    fs.read_info_file(os.path.join(path, cache_manager.INFO_FILE_NAME))
+
+    manager = nxdl_manager.NXDL_Manager(fs)
+    assert not manager.snapshot_loaded
+    assert os.path.exists(nxdl_manager.snapshot_file_name(fs))
+
+    snapshot = nxdl_manager.NXDL_Manager(fs)
+    assert snapshot.snapshot_loaded
+    assert list(snapshot.classes) == list(manager.classes)
+    assert str(snapshot) == str(manager)
+    nxdata = snapshot.classes["NXdata"]
+    assert nxdata.nxdl_manager is snapshot
+    assert " ".join(nxdata.symbols) == "dataRank n nx ny nz"
+    assert snapshot.nxdl_defaults is not None
+
+    # any change in the file set invalidates the snapshot
+    nxdl_file = os.path.join(path, "base_classes", "NXdata.nxdl.xml")
+    st = os.stat(nxdl_file)
+    os.utime(nxdl_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert nxdl_manager.read_snapshot(fs) is None
+    assert not nxdl_manager.NXDL_Manager(fs).snapshot_loaded
+    assert nxdl_manager.NXDL_Manager(fs).snapshot_loaded
+
+    assert not nxdl_manager.NXDL_Manager(fs, use_snapshot=False).snapshot_loaded
+
+
+def test_NXDL_Manager_shared_defaults():
+    cache_manager.CacheManager()
+    manager = nxdl_manager.NXDL_Manager("v3.3", use_snapshot=False)
+    defaults = manager.nxdl_defaults
+    assert defaults is nxdl_schema.get_nxdl_summary(
+        os.path.join(manager.nxdl_file_set.path, nxdl_schema.NXDL_XSD_NAME)
+    )
+
+    # the definition element defaults are shared, not copied
+    nxentry = manager.classes["NXentry"]
+    for k, v in nxentry.xml_attributes.items():
+        assert v is defaults.definition.attributes[k]
+
+    # application definitions override minOccurs for their own fields only
+    shared = defaults.field.attributes["minOccurs"]
+    app_field = manager.classes["NXarchive"].groups["entry"].fields["title"]
+    assert app_field.xml_attributes["minOccurs"] is not shared
+    assert app_field.xml_attributes["minOccurs"].default_value == 1
+    base_field = nxentry.fields["title"]
+    assert base_field.xml_attributes["minOccurs"] is shared
+    assert shared.default_value != 1
+
+
+def test_NXDL_Manager_Registry():
+    cache_manager.CacheManager()
+    registry = nxdl_manager.NXDL_Manager_Registry(max_size=2)
+    assert len(registry) == 0
+
+    m1 = registry.get("v3.3")
+    assert isinstance(m1, nxdl_manager.NXDL_Manager)
+    assert registry.get("v3.3") is m1
+    m2 = registry.get("v2018.5")
+    assert m2 is not m1
+    assert registry.get("v3.3") is m1  # now, v2018.5 is least-recently used
+
+    registry.get("a4fd52d")  # evicts v2018.5
+    stats = registry.statistics()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 3
+    assert stats["evictions"] == 1
+    assert stats["size"] == 2
+    assert stats["memory"] > 0
+    assert registry.get("v3.3") is m1
+    assert registry.get("v2018.5") is not m2
+
+    # memory ceiling: only the most-recently used manager is kept
+    registry.configure(max_memory=1)
+    assert len(registry) == 1
+    assert registry.get("v2018.5") is not None
+    assert registry.statistics()["evictions"] == 3
+
+    registry.clear()
+    assert len(registry) == 0
+    assert registry.statistics()["misses"] == 0
+
+    with pytest.raises(KeyError):
+        registry.get("no such file set")
+
+
+def test_get_manager(monkeypatch):
+    monkeypatch.setattr(nxdl_manager, "_registry", nxdl_manager.NXDL_Manager_Registry())
+    cache_manager.CacheManager()
+    lazy = nxdl_manager.get_manager("v3.3", lazy=True, prefetch=["NXentry"])
+    assert lazy is nxdl_manager.get_manager("v3.3", lazy=True, prefetch=["NXdata"])
+    assert sorted(lazy.classes.parsed()) == ["NXdata", "NXentry"]
+
+    manager = nxdl_manager.get_manager("v3.3")
+    assert manager is not lazy  # lazy is part of the key
+    assert manager is nxdl_manager.get_manager("v3.3")
+    assert manager is nxdl_manager.get_registry().get("v3.3")
+
+
+@pytest.mark.parametrize("parallel", ["thread", "process"])
+def test_NXDL_Manager_parallel(parallel):
+    cache_manager.CacheManager()
+    serial = nxdl_manager.NXDL_Manager("v3.3", use_snapshot=False)
+    manager = nxdl_manager.NXDL_Manager(
+        "v3.3", use_snapshot=False, parallel=parallel, workers=2
+    )
+    assert list(manager.classes) == list(serial.classes)  # same order
+    for k, v in manager.classes.items():
+        assert v.nxdl_manager is manager
+        assert str(v) == str(serial.classes[k])
+
+    # definitions still share the schema defaults of the manager
+    defaults = manager.nxdl_defaults
+    field = manager.classes["NXentry"].fields["title"]
+    assert field.xml_attributes["minOccurs"] is defaults.field.attributes["minOccurs"]
+
+
+def test_NXDL_Manager_parallel__ValueError():
+    with pytest.raises(ValueError):
+        nxdl_manager.NXDL_Manager("v3.3", use_snapshot=False, parallel="gpu")
+
+
+def test_NXDL_Manager_lazy(tempdir, monkeypatch):
+    monkeypatch.setattr(nxdl_manager, "snapshot_directory", lambda: tempdir)
+    cache_manager.CacheManager()
+    eager = nxdl_manager.NXDL_Manager("v3.3", use_snapshot=False)
+
+    manager = nxdl_manager.NXDL_Manager("v3.3", lazy=True, prefetch=["NXentry", "NXunknown"])
+    assert not manager.snapshot_loaded
+    classes = manager.classes
+    assert isinstance(classes, nxdl_manager.NXDL_Classes)
+    assert isinstance(classes, dict)
+    assert list(classes) == list(eager.classes)
+    assert len(classes) == 98
+    assert classes.parsed() == ["NXentry"]
+    assert str(manager) == str(eager)  # does not parse
+    assert "NXdata" in classes
+    assert classes.parsed() == ["NXentry"]
+
+    nxdata = classes.get("NXdata")
+    assert isinstance(nxdata, nxdl_manager.NXDL__definition)
+    assert str(nxdata) == str(eager.classes["NXdata"])
+    assert classes.get("NXdata") is nxdata
+    assert classes["NXdata"] is nxdata
+    assert classes.get("NXunknown") is None
+    assert sorted(classes.parsed()) == ["NXdata", "NXentry"]
+
+    # the category is known from the index
+    assert manager.class_category("NXdetector") == "base_classes"
+    assert manager.class_category("NXunknown") is None
+    assert "NXdetector" not in classes.parsed()
+
+    # lazy managers do not write snapshots
+    assert not os.path.exists(nxdl_manager.snapshot_file_name(manager.nxdl_file_set))
+
+    for k, v in classes.items():
+        assert isinstance(v, nxdl_manager.NXDL__definition), k
+    assert classes.parsed() == list(eager.classes)
+
+
+def test_NXDL_Validation_Cache(tempdir, monkeypatch):
+    cache_file = os.path.join(tempdir, "validation.json")
+    monkeypatch.setattr(nxdl_manager, "validation_cache_file_name", lambda: cache_file)
+    cm = cache_manager.CacheManager()
+    cm.select_NXDL_file_set("v3.3")
+
+    manager = nxdl_manager.NXDL_Manager("v3.3", use_snapshot=False)
+    assert os.path.exists(cache_file)
+    validation_cache = nxdl_manager.get_validation_cache()
+    assert len(validation_cache) == len(manager.classes)
+    assert validation_cache.pop_new_records() == {}
+
+    calls = []
+    validate_xml_tree = nxdl_manager.validate_xml_tree
+
+    def counting_validate_xml_tree(*args, **kwargs):
+        calls.append(args)
+        return validate_xml_tree(*args, **kwargs)
+
+    monkeypatch.setattr(nxdl_manager, "validate_xml_tree", counting_validate_xml_tree)
+    nxdl_manager.NXDL_Manager("v3.3", use_snapshot=False)
+    assert len(calls) == 0  # trusted the recorded results
+    nxdl_manager.NXDL_Manager("v3.3", use_snapshot=False, trusted=False)
+    assert len(calls) == len(manager.classes)
+
+    # an invalid NXDL file: its result is recorded, too
+    nxdl_file = os.path.join(tempdir, "NXbroken.nxdl.xml")
+    with open(manager.classes["NXentry"].file_name, "r") as fp:
+        content = fp.read()
+    with open(nxdl_file, "w") as fp:
+        fp.write(content.replace("<group ", "<not_a_group/><group ", 1))
+    with pytest.raises(ValueError):  # super class of InvalidNxdlFile
+        nxdl_manager.read_nxdl_xml(nxdl_file, trusted=True)
+    assert len(calls) == len(manager.classes) + 1
+    with pytest.raises(ValueError) as exc:
+        nxdl_manager.read_nxdl_xml(nxdl_file, trusted=True)
+    assert len(calls) == len(manager.classes) + 1
+    assert "not_a_group" in str(exc.value)
+
+    # results do not depend on the file name
+    nxdl_manager.get_validation_cache().save()
+    with open(os.path.join(tempdir, "NXentry.nxdl.xml"), "w") as fp:
+        fp.write(content)
+    nxdl_manager.read_nxdl_xml(os.path.join(tempdir, "NXentry.nxdl.xml"), trusted=True)
+    assert len(calls) == len(manager.classes) + 1
@@ -0,0 +1,137 @@
+import csv
+import io
+import json
+import os
+import pyRestTable
+import pytest
+
+from ._core import EXAMPLE_DATA_DIR
+from ._core import tempdir  # noqa
+from .. import finding
+from .. import report
+from .. import validate
+
+
+EXAMPLE_FILE = os.path.join(EXAMPLE_DATA_DIR, "writer_1_3.hdf5")
+
+
+@pytest.fixture(scope="module")
+def validator():
+    validator = validate.Data_File_Validator()
+    validator.validate(EXAMPLE_FILE)
+    yield validator
+    validator.close()
+
+
+def test_text_table_like_pyRestTable():
+    findings = finding.Findings()
+    findings.add("/entry", "known NXDL", finding.OK, "NXentry")
+    findings.add("/entry/title", "field", finding.WARN, "two\nlines, the second longer")
+    findings.add("/", "default plot", finding.ERROR, "")
+    rows = findings.report_rows()
+
+    t = pyRestTable.Table()
+    t.labels = report.REPORT_LABELS
+    for row in rows:
+        h5_address, test_name, status, comment = findings.row(row)
+        t.addRow([h5_address, status, test_name, comment])
+
+    stream = io.StringIO()
+    writer = report.Text_Report_Writer(
+        stream, widths=report.column_widths(findings, rows)
+    )
+    writer.begin()
+    writer.write_findings(findings, rows)
+    summary = writer.end()
+    text = stream.getvalue()
+    assert text.startswith("findings\n" + str(t) + "\n")
+    assert writer.score() == findings.score()
+    assert "<finding>=%f of 3 items reviewed" % findings.score()[-1] in text
+    assert summary[finding.OK] == 1
+    assert sum(summary.values()) == 3
+
+
+def test_write_report(validator):
+    findings = validator.validations
+    expected = validator.finding_summary()
+
+    stream = io.StringIO()
+    assert report.write_report(validator, stream, "csv", ["OK", "NOTE"]) == expected
+    records = list(csv.DictReader(io.StringIO(stream.getvalue())))
+    assert len(records) == expected[finding.OK] + expected[finding.NOTE]
+    assert {r["status"] for r in records} == {"OK", "NOTE"}
+
+    assert records[0]["file"] == EXAMPLE_FILE
+    assert int(records[0]["status_value"]) == finding.VALID_STATUS_DICT[
+        records[0]["status"]
+    ].value
+
+    stream = io.StringIO()
+    assert report.write_report(validator, stream, "jsonl") == expected
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert records == list(validator.to_records())
+    assert len(records) == len(findings)
+    h5_address, test_name, status, comment = findings.row(findings.report_rows()[0])
+    assert records[0] == dict(
+        file=EXAMPLE_FILE,
+        h5_address=h5_address,
+        test_name=test_name,
+        status=status.key,
+        status_value=status.value,
+        comment=comment,
+        key=finding.finding_key(h5_address, test_name),
+    )
+
+    stream = io.StringIO()
+    report.write_report(validator, stream, "json", ["NOTE", "TODO"])
+    assert json.loads(stream.getvalue()) == list(
+        validator.to_records(["NOTE", "TODO"])
+    )
+
+    with pytest.raises(ValueError):
+        report.write_report(validator, stream, "no such format")
+
+
+def test_json_writer_several_files(validator):
+    stream = io.StringIO()
+    writer = report.JSON_Report_Writer(stream)
+    writer.close()
+    assert json.loads(stream.getvalue()) == []
+
+    stream = io.StringIO()
+    writer = report.JSON_Report_Writer(stream, ["OK"])
+    for fname in ("a.h5", "b.h5"):
+        writer.begin(fname)
+        writer.write("/", "test", finding.OK, "fine")
+        writer.write("/", "test", finding.ERROR, "not written")
+        assert sum(writer.end().values()) == 2
+    writer.close()
+    assert [r["file"] for r in json.loads(stream.getvalue())] == ["a.h5", "b.h5"]
+
+
+def test_parquet_writer(validator, tempdir):
+    pyarrow_parquet = pytest.importorskip("pyarrow.parquet")
+
+    parquet_file = os.path.join(tempdir, "findings.parquet")
+    with open(parquet_file, "wb") as stream:
+        report.write_report(validator, stream, "parquet")
+    table = pyarrow_parquet.read_table(parquet_file)
+    assert table.column_names == report.RECORD_FIELDS
+    assert table.to_pylist() == list(validator.to_records())
+
+
+def test_report_writer_while_validating(validator):
+    stream = io.StringIO()
+    writer = report.JSONL_Report_Writer(stream)
+    live = validate.Data_File_Validator(report_writer=writer)
+    writer.begin()
+    live.validate(EXAMPLE_FILE)
+    live.close()
+    assert writer.end() == validator.finding_summary()
+    assert writer.score() == validator.finding_score()
+
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert len(records) == len(live.validations)
+    assert [r["h5_address"] for r in records] == [
+        f.h5_address for f in live.validations  # in the order recorded
+    ]
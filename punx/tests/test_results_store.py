@@ -0,0 +1,94 @@
+import os
+import shutil
+
+from ._core import EXAMPLE_DATA_DIR
+from ._core import tempdir  # noqa
+from .. import batch
+from .. import finding
+from .. import results_store
+from .. import validate
+
+
+def test_Results_Store(tempdir):
+    data_file = os.path.join(tempdir, "data.h5")
+    with open(data_file, "wb") as fp:
+        fp.write(b"content")
+    findings = [
+        finding.Finding("/entry", "test", finding.OK, "comment"),
+        finding.Finding("/entry@NX_class", "other", finding.ERROR, "no good"),
+    ]
+
+    store = results_store.Results_Store(os.path.join(tempdir, "results.sqlite"))
+    assert len(store) == 0
+    assert store.get(data_file, "sha") is None
+    store.put(data_file, "sha", findings)
+    assert len(store) == 1
+
+    stored = store.get(data_file, "sha")
+    assert [str(f) for f in stored] == [str(f) for f in findings]
+    assert stored[1].status is finding.ERROR
+    assert store.get(data_file, "other sha") is None
+    assert store.statistics() == dict(hits=1, misses=2, size=1)
+
+    st = os.stat(data_file)
+    os.utime(data_file, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert store.get(data_file, "sha") is None  # modified
+
+    store.remove(data_file)
+    assert len(store) == 0
+
+
+def test_Results_Store_content_hash(tempdir):
+    data_file = os.path.join(tempdir, "data.h5")
+    with open(data_file, "wb") as fp:
+        fp.write(b"content")
+    findings = [finding.Finding("/", "test", finding.OK, "comment")]
+
+    store = results_store.Results_Store(
+        os.path.join(tempdir, "results.sqlite"), use_content_hash=True
+    )
+    store.put(data_file, "sha", findings)
+
+    st = os.stat(data_file)
+    os.utime(data_file, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert store.get(data_file, "sha") is not None  # touched, same content
+
+    st = os.stat(data_file)
+    with open(data_file, "wb") as fp:
+        fp.write(b"CONTENT")  # same size
+    os.utime(data_file, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert store.get(data_file, "sha") is None
+
+    store.clear()
+    assert len(store) == 0
+
+
+def test_Data_File_Validator_results_store(tempdir, monkeypatch):
+    monkeypatch.setattr(
+        results_store,
+        "results_store_file_name",
+        lambda: os.path.join(tempdir, "results.sqlite"),
+    )
+    data_file = os.path.join(tempdir, "writer_1_3.hdf5")
+    shutil.copy2(os.path.join(EXAMPLE_DATA_DIR, "writer_1_3.hdf5"), data_file)
+    store = results_store.get_results_store()
+
+    validator = validate.Data_File_Validator(results_store=store)
+    validator.validate(data_file)
+    assert not validator.results_from_store
+    validated = [str(f) for f in validator.validations]
+    assert len(validator.addresses) > 0
+    validator.close()
+
+    validator = validate.Data_File_Validator(results_store=store)
+    validator.validate(data_file)
+    assert validator.results_from_store
+    assert validator.h5 is None
+    assert len(validator.addresses) == 0
+    assert [str(f) for f in validator.validations] == validated
+
+    summary = batch.validate_file(data_file, incremental=True)
+    assert summary["stored"]
+    assert sum(summary["counts"].values()) == len(validated)
+    summary = batch.validate_file(data_file)
+    assert not summary["stored"]
@@ -44,3 +44,62 @@ def test__function():
         other_sm = fs.schema_manager
         assert default_sm.schema_file != other_sm.schema_file
         assert default_sm.types_file != other_sm.types_file
+
+
+def test_Schema_Name_Matcher():
+    patterns = dict(strict=r"[a-z_][a-z0-9_]*", relaxed=r"[A-Za-z_][\w_]*")
+    matcher = schema_manager.Schema_Name_Matcher(patterns)
+    for name, expected in (
+        ("entry", "strict"),
+        ("Entry", "relaxed"),
+        ("x_pixel_size", "strict"),
+        ("Bad Name", None),
+        ("1st", None),
+        ("", None),
+    ):
+        assert matcher.match(name) == expected, name
+        assert matcher.match(name) == expected, name  # from the memo
+    stats = matcher.statistics()
+    assert stats["names"] == 6
+    assert stats["hits"] == 6
+    assert stats["misses"] == 6
+    assert stats["hit_rate"] == 0.5
+
+    # a pattern with its own groups
+    matcher = schema_manager.Schema_Name_Matcher(
+        dict(target=r"(/[a-zA-Z_][\w_]*(:[a-zA-Z_][\w_]*)?)+")
+    )
+    assert matcher.match("/entry/data") == "target"
+    assert matcher.match("entry") is None
+
+    sm = schema_manager.get_default_schema_manager()
+    matcher = sm.get_name_matcher("test", patterns)
+    assert sm.get_name_matcher("test", {}) is matcher  # built once
+
+
+def test_Schema_Name_Matcher_memo():
+    import threading
+
+    matcher = schema_manager.Schema_Name_Matcher(dict(any=r"\w+"), memo_size=10)
+    for i in range(100):
+        assert matcher.match("name_%d" % i) == "any"
+        assert matcher.match("entry") == "any"  # used often: kept
+    stats = matcher.statistics()
+    assert stats["names"] <= 10
+    assert stats["misses"] == 101
+    assert stats["hits"] == 99
+
+    matcher = schema_manager.Schema_Name_Matcher(dict(any=r"[a-z]+"), memo_size=50)
+    names = ["name", "Name", "entry", "x y", "data"] * 20 + ["n%d" % i for i in range(40)]
+    expected = [matcher._match(n) for n in names]
+    results = []
+
+    def check():
+        results.append([matcher.match(n) for n in names])
+
+    threads = [threading.Thread(target=check) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == [expected] * 8
@@ -26,11 +26,14 @@ from ._core import DEFAULT_NXDL_FILE_SET
 from ._core import EXAMPLE_DATA_DIR
 from ._core import hfile
 from ._core import No_Exception
+from ._core import tempdir  # noqa
 from .. import FileNotFound
 from .. import finding
 from .. import HDF5_Open_Error
+from .. import nxdl_manager
 from .. import utils
 from .. import validate
+from ..validations.base_class_items_in_hdf5_group import group_minOccurs
 
 
 def avert_exception(fname):
@@ -94,6 +97,31 @@ def test_valid_nexus_file_constructed(hfile):
         avert_exception(hfile)
 
     assert utils.isNeXusFile(hfile)
+    with h5py.File(hfile, "r") as f:
+        assert utils.isNeXusFile(f)
+        assert f.id.valid  # an open file is left open
+
+
+def test_validate_open_file(hfile):
+    with h5py.File(hfile, "w") as f:
+        g = f.create_group("entry")
+        g.attrs["NX_class"] = "NXentry"
+        g.create_dataset("title", data=b"scan")
+
+    def findings(source):
+        validator = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET)
+        validator.validate(source)
+        assert validator.fname == hfile
+        validator.close()
+        return [(f.h5_address, f.test_name, f.status) for f in validator.validations]
+
+    expected = findings(hfile)
+    assert len(expected) > 0
+    with h5py.File(hfile, "r") as f:
+        assert findings(f) == expected
+        assert f.id.valid  # not closed by the validator
+    with open(hfile, "rb") as fp:
+        assert findings(fp) == expected
 
 
 @pytest.mark.parametrize(
@@ -575,6 +603,39 @@ def test_default_plot_v3_fail(file_set_name, status, occurs, hfile):
     assert len(flist) == occurs
 
 
+def test_validation_parses_only_used_classes(hfile, monkeypatch):
+    monkeypatch.setattr(nxdl_manager, "_registry", nxdl_manager.NXDL_Manager_Registry())
+    setup_simple_test_file_default_plot(hfile)
+
+    validator = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET)
+    classes = validator.manager.classes
+    assert isinstance(classes, nxdl_manager.NXDL_Classes)  # no snapshot
+    assert classes.parsed() == []
+    validator.validate(hfile)
+    validator.close()
+    assert sorted(classes.parsed()) == ["NXdata", "NXentry", "NXroot"]
+
+    eager = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET, lazy=False)
+    assert eager.manager is not validator.manager
+    eager.validate(hfile)
+    eager.close()
+    assert [eager.validations.row(i) for i in range(len(eager.validations))] == [
+        validator.validations.row(i) for i in range(len(validator.validations))
+    ]
+
+
+def test_validation_leaves_nxdl_unchanged(hfile):
+    """validators share the NXDL content, validation must not change it"""
+    setup_simple_test_file_default_plot(hfile)
+
+    validator = validate.Data_File_Validator(ref=DEFAULT_NXDL_FILE_SET)
+    groups = validator.manager.classes["NXentry"].groups
+    before = {name: vars(group).copy() for name, group in groups.items()}
+    validator.validate(hfile)
+    assert len(validator.nxdl_minOccurs) > 0
+    assert {name: vars(group) for name, group in groups.items()} == before
+
+
 def test_default_plot_v2_pass(hfile):
     setup_simple_test_file_default_plot(hfile)
     with h5py.File(hfile, "r+") as f:
@@ -614,7 +675,12 @@ def test_default_plot_v2_fail_no_signal(file_set_name, status, occurs, hfile):
     validator.validate(hfile)
     sum, count, _ = validator.finding_score()
     assert count > 0, "items counted for scoring"
-    if validator.manager.classes["NXentry"].groups["data"].minOccurs > 0:
+    nxentry = validator.manager.classes["NXentry"]
+    data_group = nxentry.groups["data"]
+    minOccurs = validator.nxdl_minOccurs.get(
+        data_group, group_minOccurs(nxentry, data_group)
+    )
+    if minOccurs > 0:
         assert sum < 0, "scoring detects error(s)"
 
     test_name = "NeXus default plot"
@@ -722,3 +788,253 @@ def test_report_option(infile, report, observations, capsys):
 
 
 # Note: class Test_Example_data is already handled by test_data_files.py
+
+
+def test_validate_xml(tempdir, monkeypatch):
+    from .. import cache_manager
+    from .. import nxdl_manager
+
+    cache_file = os.path.join(tempdir, "validation.json")
+    monkeypatch.setattr(nxdl_manager, "validation_cache_file_name", lambda: cache_file)
+    cm = cache_manager.CacheManager()
+    nxdl_file = os.path.join(cm.default_file_set.path, "base_classes", "NXentry.nxdl.xml")
+
+    assert validate.validate_xml(nxdl_file) is None
+    assert os.path.exists(cache_file)
+    assert validate.validate_xml(nxdl_file) is None
+
+    broken_file = os.path.join(tempdir, "NXbroken.nxdl.xml")
+    with open(nxdl_file, "r") as src, open(broken_file, "w") as dst:
+        dst.write(src.read().replace("<group ", "<not_a_group/><group ", 1))
+    for _ in range(2):  # always validated, not taken from the cache
+        with pytest.raises(ValueError):  # super class of InvalidNxdlFile
+            validate.validate_xml(broken_file)
+
+    with pytest.raises(IOError):  # super class of FileNotFound
+        validate.validate_xml(os.path.join(tempdir, "no_such.nxdl.xml"))
+
+
+def test_build_address_catalog(hfile):
+    with h5py.File(hfile, "w") as f:
+        f.attrs["default"] = "entry"
+        entry = f.create_group("entry", track_order=True)
+        entry.attrs["NX_class"] = "NXentry"
+        for name in "zeta alpha mid".split():  # creation order is not name order
+            group = entry.create_group(name)
+            group.attrs["NX_class"] = "NXnote"
+        ds = entry.create_dataset("title", data="catalog")
+        ds.attrs["units"] = "none"
+
+    validator = validate.Data_File_Validator()
+    validator.h5 = h5py.File(hfile, "r")
+    validator.build_address_catalog()
+
+    addresses = [k for k in validator.addresses if "@" not in k]
+    assert addresses == [
+        "/",
+        "/entry",
+        "/entry/zeta",
+        "/entry/alpha",
+        "/entry/mid",
+        "/entry/title",
+    ]
+    assert validate.get_link_names(validator.h5["entry"]) == [
+        b"zeta", b"alpha", b"mid", b"title"
+    ]
+
+    stats = validator.catalog_statistics
+    assert stats["objects"] == 6
+    assert stats["attributes"] == 6
+    assert stats["seconds"] >= 0
+
+    # attribute values are read when first used
+    v_item = validator.addresses["/entry/title@units"]
+    assert v_item._h5_object is validate.ATTRIBUTE_VALUE_NOT_READ
+    assert utils.decode_byte_string(v_item.h5_object) == "none"
+    assert v_item._h5_object is not validate.ATTRIBUTE_VALUE_NOT_READ
+    assert validator.addresses["/entry@NX_class"].classpath == "/NXentry@NX_class"
+    validator.close()
+
+
+def test_ValidationItem_compact(hfile):
+    with h5py.File(hfile, "w") as f:
+        entry = f.create_group("entry")
+        entry.attrs["NX_class"] = "NXentry"
+        for name in ("one", "two"):
+            group = entry.create_group(name)
+            group.attrs["NX_class"] = "NXdata"
+            group.create_dataset("data", data=[1, 2, 3])
+
+    validator = validate.Data_File_Validator()
+    validator.h5 = h5py.File(hfile, "r")
+    validator.build_address_catalog()
+
+    one = validator.addresses["/entry/one"]
+    two = validator.addresses["/entry/two"]
+    assert not hasattr(one, "__dict__")
+    assert one.classpath == "/NXentry/NXdata"
+    assert one.classpath is two.classpath  # interned
+    assert (
+        validator.addresses["/entry/one@NX_class"].classpath
+        is validator.addresses["/entry/two@NX_class"].classpath
+    )
+    assert one.nx_class == "NXdata"
+    assert not hasattr(validator.addresses["/entry/one/data"], "nx_class")
+
+    assert utils.isHdf5Group(one.h5_object)
+    assert one.h5_object.name == "/entry/one"
+    assert one.is_hdf5_group()
+    assert validator.addresses["/"].is_hdf5_group()
+    data = validator.addresses["/entry/one/data"]
+    assert data._h5_object is validate.HDF5_OBJECT_NOT_OPEN
+    assert not data.is_hdf5_group()
+    assert utils.isHdf5Dataset(data.h5_object)
+    assert data.h5_object.name == "/entry/one/data"
+    assert utils.isHdf5FileObject(validator.addresses["/"].h5_object)
+
+    assert one._validations is None
+    assert one.validations == {}
+    validator.close()
+
+
+def test_refresh(hfile):
+    def findings(validator):
+        return sorted(
+            (f.h5_address, f.test_name, f.status.key, f.comment)
+            for f in validator.validations
+        )
+
+    with h5py.File(hfile, "w", libver="latest") as f:
+        f.attrs["default"] = "entry"
+        entry = f.create_group("entry")
+        entry.attrs["NX_class"] = "NXentry"
+        entry.create_dataset("title", data="scan 1")
+        f.create_group("later")  # not NeXus (yet)
+
+    validator = validate.Data_File_Validator(swmr=True)
+    validator.validate(hfile)
+    assert validator.h5.swmr_mode
+    n_addresses = len(validator.addresses)
+    v_entry = validator.addresses["/entry"]
+
+    validator.close()  # the writer continues
+    with h5py.File(hfile, "a") as f:
+        entry = f["/entry"]
+        entry.attrs["default"] = "data"
+        data = entry.create_group("data")
+        data.attrs["NX_class"] = "NXdata"
+        data.attrs["signal"] = "counts"
+        data.create_dataset("counts", data=[1, 2, 3])
+        data["counts"].attrs["units"] = "counts"
+        f["/later"].attrs["NX_class"] = "NXentry"
+        f["/later"].create_dataset("Bad Name", data=1)
+        f["/link"] = h5py.SoftLink("/entry/title")
+
+    new_findings = validator.refresh()
+    assert validator.addresses["/entry"] is v_entry  # kept
+    assert validator.addresses["/later"].classpath == "/NXentry"
+    assert "/later/Bad Name" in validator.addresses
+    assert validator.refresh_statistics["objects"] == 5  # data, counts, later, ...
+    assert len(validator.addresses) > n_addresses
+    assert len(new_findings) > 0
+    assert set(
+        (f.h5_address, f.test_name, f.status.key, f.comment) for f in new_findings
+    ) <= set(findings(validator))
+
+    full = validate.Data_File_Validator()
+    full.validate(hfile)
+    assert findings(validator) == findings(full)
+    full.close()
+
+    # nothing new
+    validator.refresh()
+    assert validator.refresh_statistics["objects"] == 0
+    assert validator.refresh_statistics["attributes"] == 0
+    assert findings(validator) == findings(full)
+    validator.close()
+
+    not_swmr = validate.Data_File_Validator()
+    with pytest.raises(ValueError):
+        not_swmr.refresh()
+
+
+def test_name_memo_shared(hfile, capsys):
+    with h5py.File(hfile, "w") as f:
+        entry = f.create_group("entry")
+        entry.attrs["NX_class"] = "NXentry"
+        entry.create_dataset("title", data="memo")
+
+    first = validate.Data_File_Validator()
+    first.validate(hfile)
+    first.close()
+    second = validate.Data_File_Validator()
+    second.validate(hfile)
+    second.close()
+
+    assert second.name_matchers["validItemName"] is first.name_matchers["validItemName"]
+    stats = second.name_memo_statistics()["validItemName"]
+    first_stats = first.name_memo_statistics()["validItemName"]
+    assert stats["misses"] == 0  # all names kept by the first validation
+    assert stats["hits"] == first_stats["hits"] + first_stats["misses"]
+    assert stats["names"] >= 2  # entry, title
+
+    second.validate(hfile)  # counted again, not added to the first count
+    assert second.name_memo_statistics()["validItemName"] == stats
+    second.close()
+
+    second.print_report()
+    assert "name memo" not in capsys.readouterr().out
+    second.print_report(statistics=True)
+    assert "name memo (validItemName): " in capsys.readouterr().out
+
+
+def test_selected_checks(hfile):
+    with h5py.File(hfile, "w") as f:
+        f.attrs["default"] = "entry"
+        entry = f.create_group("entry")
+        entry.attrs["NX_class"] = "NXentry"
+        entry.attrs["default"] = "data"
+        entry.create_dataset("definition", data="NXarpes")
+        data = entry.create_group("data")
+        data.attrs["NX_class"] = "NXdata"
+        data.attrs["signal"] = "counts"
+        data.create_dataset("counts", data=[1, 2, 3])
+        other = f.create_group("other")  # not NeXus
+        other.create_group("more").create_dataset("Bad Name", data=1)
+
+    def test_names(validator):
+        return set(f.test_name for f in validator.validations)
+
+    complete = validate.Data_File_Validator()
+    complete.validate(hfile)
+    complete.close()
+
+    validator = validate.Data_File_Validator(checks=["default_plot"])
+    validator.validate(hfile)
+    validator.close()
+    assert validator.catalog_scope == "nexus"
+    assert "/other" in validator.addresses
+    assert "/other/more" not in validator.addresses  # not needed
+    assert "/entry/data/counts" in validator.addresses
+    assert test_names(validator) == {
+        t for t in test_names(complete) if t.startswith("NeXus default plot")
+    }
+    # same status as with the group check (minOccurs of NXentry/data)
+    default_plot = [f for f in validator.validations if f.h5_address == "/"]
+    assert [f.status for f in default_plot] == [
+        f.status
+        for f in complete.validations
+        if f.h5_address == "/" and f.test_name == "NeXus default plot"
+    ]
+
+    validator = validate.Data_File_Validator(checks=["application_definition"])
+    validator.validate(hfile)
+    validator.close()
+    assert validator.catalog_scope == "entries"
+    assert "/entry/definition" in validator.addresses
+    assert "/entry/data/counts" not in validator.addresses
+    assert "known NXDL" in test_names(validator)
+    assert "validItemName" not in test_names(validator)
+
+    with pytest.raises(ValueError):
+        validate.Data_File_Validator(checks=["no such check"])
@@ -13,6 +13,7 @@ utility routines
 .. autosummary::
 
    ~decode_byte_string
+   ~hdf5FileName
    ~isHdf5FileObject
    ~isHdf5Group
    ~isHdf5Dataset
@@ -60,6 +61,21 @@ def string_list_to_hdf5(string_list):
     return [v.encode("utf8") for v in string_list]
 
 
+def hdf5FileName(source):
+    """
+    Name of the HDF5 file `source`
+
+    `source` is a file name, an open HDF5 file, or a (binary) file-like
+    object (named by its ``name`` attribute, if it has one).
+    """
+    if isHdf5FileObject(source):
+        return source.filename
+    if hasattr(source, "read"):
+        name = getattr(source, "name", None)
+        return name if isinstance(name, str) else repr(source)
+    return source
+
+
 def isHdf5FileObject(obj):
     """Is `obj` an HDF5 File?"""
     return isinstance(obj, h5py.File)
@@ -110,18 +126,21 @@ def __isHdf5ExternalLink(obj):
 
 
 def isNeXusFile(filename):
-    """Is `filename` is a NeXus HDF5 file?"""
+    """
+    Is `filename` is a NeXus HDF5 file?
+
+    `filename` may also be an open HDF5 file, which is not closed
+    (so the file is not opened again just to check).
+    """
+    if isHdf5FileObject(filename):
+        return any(
+            isNeXusGroup(filename.get(item), "NXentry") for item in filename
+        )
     if not os.path.exists(filename):
         return None
 
-    f = h5py.File(filename, "r")
-    if isHdf5FileObject(f):
-        for item in f:
-            if isNeXusGroup(f[item], "NXentry"):
-                f.close()
-                return True
-    f.close()
-    return False
+    with h5py.File(filename, "r") as f:
+        return isNeXusFile(f)
 
 
 def isNeXusGroup(obj, NXtype):
@@ -20,6 +20,7 @@ PUBLIC
 .. autosummary::
 
    ~Data_File_Validator
+   ~validate_xml
 
 INTERNAL
 
@@ -33,10 +34,13 @@ import collections
 import h5py
 import logging
 import os
-import pyRestTable
+import sys
+import time
 
 from . import FileNotFound, HDF5_Open_Error
 from . import finding
+from . import report
+from . import validations as checks_registry
 from . import utils
 from . import nxdl_manager
 
@@ -45,9 +49,26 @@ SLASH = "/"
 INFORMATIVE = int((logging.INFO + logging.DEBUG) / 2)
 CLASSPATH_OF_NON_NEXUS_CONTENT = "non-NeXus content"
 VALIDITEMNAME_STRICT_PATTERN = r"[a-z_][a-z0-9_]*"
+ATTRIBUTE_VALUE_NOT_READ = object()  # read attribute value when first used
+HDF5_OBJECT_NOT_OPEN = object()  # open HDF5 group or dataset when used
 logger = utils.setup_logger(__name__)
 
 
+def validate_xml(xml_file_name):
+    """
+    Validate an NXDL XML file against the XML Schema of the default file set.
+
+    The file is always validated (previous results recorded in the
+    :class:`~punx.nxdl_manager.NXDL_Validation_Cache` are not used).
+    Returns ``None`` if the file is valid.
+
+    :param str xml_file_name: name of NXDL XML file
+    :raises InvalidNxdlFile: if the file is not valid
+    """
+    nxdl_manager.read_nxdl_xml(os.path.abspath(xml_file_name), trusted=False)
+    nxdl_manager.get_validation_cache().save()
+
+
 class Data_File_Validator(object):
 
     """
@@ -66,62 +87,147 @@ class Data_File_Validator(object):
         validator = punx.validate.Data_File_Validator("v3.2")
         validator = punx.validate.Data_File_Validator("main")
 
+       Validators of the same file set share one NXDL_Manager
+       (see :func:`punx.nxdl_manager.get_manager`).
+
+       To use the stored findings of files not changed since
+       their last validation (see :mod:`punx.results_store`)::
+
+        store = punx.results_store.get_results_store()
+        validator = punx.validate.Data_File_Validator(results_store=store)
+
     2. use to validate a file or files::
 
         result = validator.validate(hdf5_file_name)
         result = validator.validate(another_file)
 
+       or a file opened by the caller (left open by the validator),
+       or a binary file-like object::
+
+        with h5py.File(hdf5_file_name, "r") as h5:
+            result = validator.validate(h5)
+
     3. close the HDF5 file when done with validation::
 
         validator.close()
 
+    To validate a file while it is written (such as with HDF5 SWMR),
+    validate its content once, then only what is added::
+
+        validator = punx.validate.Data_File_Validator(swmr=True)
+        validator.validate(hdf5_file_name)
+        while acquiring:
+            time.sleep(10)
+            new_findings = validator.refresh()
+
     PUBLIC METHODS
 
     .. autosummary::
 
        ~close
        ~validate
+       ~refresh
        ~print_report
+       ~to_records
+       ~name_memo_statistics
 
     INTERNAL METHODS
 
     .. autosummary::
 
        ~build_address_catalog
-       ~_group_address_catalog_
+       ~_add_to_address_catalog_
+       ~_refresh_address_catalog
        ~validate_item_name
 
+    PARAMETERS
+
+    ref str:
+        (optional) Name of the NXDL file set. (default: the default file set)
+    results_store obj:
+        (optional) Instance of :class:`~punx.results_store.Results_Store`.
+        (not used with ``swmr=True``, such a file is not done yet)
+    swmr bool:
+        If ``True``, open the file in HDF5 SWMR read mode and keep
+        the findings of each check, so that :meth:`refresh` can run
+        only the checks affected by new content.
+        (default: ``False``)
+    report_writer obj:
+        (optional) Instance of :class:`~punx.report.Report_Writer`.
+        Each finding is written as soon as it is recorded (stored
+        findings, all at once).  The writer is not started or finished
+        here, call its ``begin()`` and ``end()`` methods.
+        (default: ``None``)
+    checks [str]:
+        (optional) Names of the checks to run (see
+        :mod:`punx.validations`).  Only the part of the file these checks
+        need is cataloged.  The results store is used only for all checks.
+        (default: all checks)
+    lazy bool:
+        If ``True`` (default), each NXDL class is parsed when first used
+        by a validation (see :class:`~punx.nxdl_manager.NXDL_Classes`),
+        so a file is validated without parsing the classes it does not use.
+    prefetch [str]:
+        (optional, only with ``lazy=True``) Names of NXDL classes
+        to be parsed now.
     """
 
-    def __init__(self, ref=None):
+    def __init__(
+        self,
+        ref=None,
+        results_store=None,
+        swmr=False,
+        report_writer=None,
+        checks=None,
+        lazy=True,
+        prefetch=None,
+    ):
         self.h5 = None
+        self.fname = None
+        self._source = None  # what to open: name, h5py.File, file-like object
+        self.results_store = results_store
+        self.swmr = swmr
+        self.report_writer = report_writer
+        self.checks = checks_registry.select_checks(checks)
+        self.catalog_scope = checks_registry.catalog_scope(self.checks)
+        self.name_matchers = {}  # shared, see validations.item_name.get_name_matcher
         self.__init_local__()
-        self.manager = nxdl_manager.NXDL_Manager(ref)
+        self.manager = nxdl_manager.get_manager(ref, lazy=lazy, prefetch=prefetch)
 
     def __init_local__(self):
-        self.validations = []  # list of Finding() instances
+        self.validations = finding.Findings()  # all findings, in columns
         self.addresses = (
             collections.OrderedDict()
         )  # dictionary of all HDF5 address nodes in the data file
         self.classpaths = {}
-        self.regexp_cache = {}
+        self.catalog_statistics = collections.OrderedDict()
+        self.results_from_store = False  # True: findings were not validated now
+        self.refresh_statistics = collections.OrderedDict()
+        self.nxdl_minOccurs = {}  # NXDL group: minOccurs found during validation
+        self._check_findings = {}  # swmr: (check, h5_address): (start, stop) rows
+        self._stale_rows = []  # swmr: rows of findings to be removed
+        self.name_memo_counts = {}  # key: [hits, misses] of this validation
 
     def close(self):
         """
         close the HDF5 file (if it is open)
+
+        An HDF5 file given to :meth:`validate` is left open.
         """
         if utils.isHdf5FileObject(self.h5):
-            self.h5.close()
+            if self.h5 is not self._source:
+                self.h5.close()
             self.h5 = None
 
     def record_finding(self, v_item, key, status, comment):
         """
-        prepare the finding object and record it
+        record the finding (in ``self.validations``), return its row number
         """
-        f = finding.Finding(v_item.h5_address, key, status, comment)
-        self.validations.append(f)
-        v_item.validations[key] = f
-        return f
+        row = self.validations.add(v_item.h5_address, key, status, comment)
+        v_item._validations = self.validations
+        if self.report_writer is not None:
+            self.report_writer.write(v_item.h5_address, key, status, comment)
+        return row
 
     def finding_score(self):
         """
@@ -131,16 +237,7 @@ class Data_File_Validator(object):
         total: sum of status values for all findings
         score: total / count -- average status / finding
         """
-        total = 0
-        count = 0
-        for f in self.validations:
-            if f.status.value != 0:
-                total += f.status.value
-                count += 1
-        if count == 0:
-            return total, count, 0
-        else:
-            return total, count, float(total) / count
+        return self.validations.score()
 
     def finding_summary(self, report_statuses=None):
         """
@@ -162,139 +259,509 @@ class Data_File_Validator(object):
         ======= ===== ===========================================================
         """
         report_statuses = report_statuses or finding.VALID_STATUS_LIST
+        counts = self.validations.status_counts()
         summary = collections.OrderedDict()
         for status in report_statuses:
-            summary[status] = 0
-        for f in self.validations:
-            summary[f.status] += 1
+            summary[status] = int(counts[finding.STATUS_CODE[status]])
         return summary
 
-    def print_report(self, statuses=None):
+    def print_report(self, statuses=None, statistics=False):
         """
         Print a validation report.
+
+        With ``statistics=True``, also print the statistics of the
+        name memo (see :meth:`name_memo_statistics`).
         """
-        reported_statuses = statuses or list(finding.VALID_STATUS_DICT.keys())
+        report.write_report(self, sys.stdout, "text", statuses)
+        if not statistics:
+            return
 
-        print("data file: " + self.fname)
-        print(
-            f"NeXus definitions: {self.manager.nxdl_file_set.ref}"
-            f", dated {self.manager.nxdl_file_set.last_modified}"
-            f", sha={self.manager.nxdl_file_set.sha}\n"
-        )
+        for key, stats in self.name_memo_statistics().items():
+            if stats["hit_rate"] is not None:
+                print(
+                    "name memo (%s): %.1f%% of %d lookups found, %d names kept"
+                    % (
+                        key,
+                        100 * stats["hit_rate"],
+                        stats["hits"] + stats["misses"],
+                        stats["names"],
+                    )
+                )
+
+    def to_records(self, statuses=None):
+        """
+        yield each finding as a dictionary, in report order
+
+        For bulk loading into a database (see
+        :func:`~punx.report.finding_record` for the keys).
+
+        :param [str] statuses: (optional) only findings with these
+            status keys (such as ``["ERROR", "WARN"]``, default: all)
+        """
+        findings = self.validations
+        for row in findings.report_rows(statuses):
+            yield report.finding_record(
+                self.fname, *findings.row(row), key=findings.key(row)
+            )
+
+    def name_memo_statistics(self):
+        """
+        return statistics of the memo of name checks (one for each kind of name)
 
-        def sort_validations(f):
-            value = f.h5_address
-            value += " %3d" % -f.status.value  # sort from best to worst
-            value += " " + f.status.description
-            value = value.replace("@", " @")  # keep attributes with group or dataset
-            return value
-
-        print("findings")
-        t = pyRestTable.Table()
-        for label in "address status test comments".split():
-            t.addLabel(label)
-        for f in sorted(self.validations, key=sort_validations):
-            if str(f.status) in reported_statuses:
-                row = []
-                row.append(f.h5_address)
-                row.append(f.status)
-                row.append(f.test_name)
-                row.append(f.comment)
-                t.addRow(row)
-        print(str(t))
-
-        summary = self.finding_summary()
-        t = pyRestTable.Table()
-        for label in "status count description (value)".split():
-            t.addLabel(label)
-        for s, c in summary.items():
-            row = [s.key, c, s.description, s.value]
-            t.addRow(row)
-        t.addRow(["", "--", "", ""])
-        t.addRow(["TOTAL", sum(summary.values()), "", ""])
-        print("\nsummary statistics")
-        print(str(t))
-        total, count, average = self.finding_score()
-        print("<finding>=%f of %d items reviewed" % (average, count))
+        The hits and misses are those of the lookups of the last
+        validation (or refresh) by this validator.  The memo, and its
+        number of ``names``, is shared by all validators (in this process)
+        of the same NXDL file set, see
+        :class:`~punx.schema_manager.Schema_Name_Matcher`.
+        """
+        statistics = collections.OrderedDict()
+        for key, (hits, misses) in sorted(self.name_memo_counts.items()):
+            lookups = hits + misses
+            statistics[key] = collections.OrderedDict(
+                names=self.name_matchers[key].statistics()["names"],
+                hits=hits,
+                misses=misses,
+                hit_rate=hits / lookups if lookups > 0 else None,
+            )
+        return statistics
 
     def validate(self, fname):
-        """start the validation process from the file root"""
-        from .validations import default_plot
+        """
+        start the validation process from the file root
 
-        if not os.path.exists(fname):
-            raise FileNotFound(fname)
-        self.fname = fname
+        ``fname`` is the name of the file, an open HDF5 file
+        (``h5py.File``, used and left open), or a binary
+        file-like object.
+        """
+        from .validations import default_plot
 
         if self.h5 is not None:
             self.close()  # left open from previous call to validate()
-        try:
-            self.h5 = h5py.File(fname, "r")
-        except IOError:
-            logger.error("Could not open as HDF5: " + fname)
-            raise HDF5_Open_Error(fname)
 
+        if utils.isHdf5FileObject(fname) or hasattr(fname, "read"):
+            self._source = fname
+            fname = utils.hdf5FileName(fname)
+        elif not os.path.exists(fname):
+            raise FileNotFound(fname)
+        else:
+            self._source = fname
+        self.fname = fname
+
+        file_set_sha = self.manager.nxdl_file_set.sha
+        store = None if self.swmr else self.results_store
+        if not os.path.exists(fname):
+            store = None  # file-like object: stored by file name
+        if self.checks != tuple(checks_registry.CHECKS):
+            store = None  # stored findings are of all checks
+        if store is not None:
+            findings = store.get(fname, file_set_sha)
+            if findings is not None:
+                # unchanged since last validation: no addresses or classpaths
+                self.__init_local__()
+                self.validations = finding.Findings(findings)
+                self.results_from_store = True
+                if self.report_writer is not None:
+                    self.report_writer.write_findings(self.validations)
+                return
+
+        self._open()
         self.__init_local__()
         self.build_address_catalog()
 
         # 1. check all objects in file (name is valid, ...)
-        for v_list in self.classpaths.values():
-            for v_item in v_list:
-                self.validate_item_name(v_item)
-                self.validate_attribute(v_item)
+        self._validate_items(
+            v_item for v_list in self.classpaths.values() for v_item in v_list
+        )
 
         # 2. check all base classes against defaults
-        for k, v_item in self.addresses.items():
-            if utils.isHdf5Group(v_item.h5_object) or utils.isHdf5FileObject(
-                v_item.h5_object
-            ):
-                self.validate_group(v_item)
+        self._validate_groups(
+            v_item for v_item in self.addresses.values() if v_item.is_hdf5_group()
+        )
 
         # 3. check application definitions
-        for k in ("/NXentry/definition", "/NXentry/NXsubentry/definition"):
-            if k in self.classpaths:
-                for v_item in self.classpaths[k]:
-                    self.validate_application_definition(v_item.parent)
+        self._validate_application_definitions(self._definition_items())
 
         # 4. check for default plot
-        default_plot.verify(self)
+        if "default_plot" in self.checks:
+            self._check("default plot", SLASH, default_plot.verify, self)
+
+        if store is not None:
+            store.put(fname, file_set_sha, self.validations)
+
+    def refresh(self):
+        """
+        validate the content added to the file since it was last validated
+
+        The file (see :meth:`validate`) is opened again (an open HDF5
+        file given to :meth:`validate` is used as is) and the links of
+        all its groups are listed, to catalog only the groups, datasets, and
+        attributes added since :meth:`validate` or the last ``refresh()``.
+        The new items are validated.  Groups with new content are validated
+        again (with their attributes and, for an ``NXentry``, its application
+        definition), as are all ``@target`` attributes and the default plot.
+        The findings of all other checks are kept.
+
+        A group given an ``@NX_class`` attribute (such as a group
+        created, then described) is cataloged again, with its content.
+        Content removed from the file is not noticed.
+
+        Needs ``swmr=True`` (to keep the findings of each check).
+        Returns the list of findings recorded by this refresh.
+        """
+        from .validations import default_plot
+
+        if not self.swmr:
+            raise ValueError("refresh() needs a validator with swmr=True")
+        if self.fname is None or "/" not in self.addresses:
+            raise ValueError("refresh() needs a file validated by validate()")
+
+        self.close()
+        self._open()
+        t0 = time.time()
+        self.name_memo_counts = {}
+        new_items, changed_groups, counts = self._refresh_address_catalog()
+        start = len(self.validations)
+
+        # 1. new objects and attributes, attributes that depend on other objects
+        items = collections.OrderedDict((id(v), v) for v in new_items)
+        for v_group in changed_groups:
+            for v_item in self._attribute_items(v_group):
+                v_item._h5_object = ATTRIBUTE_VALUE_NOT_READ  # might be new
+                items[id(v_item)] = v_item
+        for classpath, v_list in self.classpaths.items():
+            if classpath.endswith("@target"):
+                items.update((id(v), v) for v in v_list)
+        self._validate_items(items.values())
+
+        # 2. new groups and groups with new content
+        groups = collections.OrderedDict(
+            (id(v), v) for v in new_items if v.is_hdf5_group()
+        )
+        groups.update((id(v), v) for v in changed_groups)
+        self._validate_groups(groups.values())
+
+        # 3. application definitions of those groups
+        self._validate_application_definitions(
+            v_item for v_item in self._definition_items() if id(v_item) in groups
+        )
+
+        # 4. default plot
+        if "default_plot" in self.checks:
+            self._check("default plot", SLASH, default_plot.verify, self)
+
+        stale = set(self._stale_rows)
+        new_findings = [
+            self.validations[row]
+            for row in range(start, len(self.validations))
+            if row not in stale
+        ]
+        if len(stale) > 0:
+            new_rows = self.validations.remove(stale)
+            for key, (first, stop) in self._check_findings.items():
+                # rows of one check remain adjacent
+                self._check_findings[key] = (
+                    int(new_rows[first]),
+                    int(new_rows[stop - 1]) + 1,
+                )
+            self._stale_rows = []
+
+        seconds = time.time() - t0
+        self.refresh_statistics["objects"] = counts["objects"]
+        self.refresh_statistics["attributes"] = counts["attributes"]
+        self.refresh_statistics["groups"] = len(groups)
+        self.refresh_statistics["findings"] = len(new_findings)
+        self.refresh_statistics["seconds"] = seconds
+        logger.log(
+            INFORMATIVE,
+            "refresh: %d new objects, %d new attributes, %d groups validated in %.3f s",
+            counts["objects"],
+            counts["attributes"],
+            len(groups),
+            seconds,
+        )
+        return new_findings
+
+    def _open(self):
+        """open the HDF5 file (an open HDF5 file is used as given)"""
+        if utils.isHdf5FileObject(self._source):
+            self.h5 = self._source
+            return
+        try:
+            self.h5 = h5py.File(self._source, "r", swmr=self.swmr)
+        except IOError:
+            logger.error("Could not open as HDF5: " + self.fname)
+            raise HDF5_Open_Error(self.fname)
+
+    def _check(self, check, h5_address, method, *args):
+        """
+        run one check (a method that records findings)
+
+        With ``swmr=True``, keep the findings of the check, so the
+        findings of a previous run of the same check can be removed.
+        """
+        if not self.swmr:
+            method(*args)
+            return
+
+        key = (check, h5_address)
+        previous = self._check_findings.pop(key, None)
+        if previous is not None:
+            self._forget_findings(previous)
+        start = len(self.validations)
+        method(*args)
+        if len(self.validations) > start:
+            self._check_findings[key] = (start, len(self.validations))
+
+    def _forget_findings(self, rows):
+        """mark these (start, stop) rows for removal (at the end of :meth:`refresh`)"""
+        self._stale_rows.extend(range(*rows))
+
+    def _validate_items(self, items):
+        """check the name (and value of an attribute) of each item"""
+        if "item_name" not in self.checks and "attribute" not in self.checks:
+            return
+        for v_item in items:
+            self._check("item", v_item.h5_address, self._validate_item, v_item)
+
+    def _validate_item(self, v_item):
+        if "item_name" in self.checks:
+            self.validate_item_name(v_item)
+        if "attribute" in self.checks:
+            self.validate_attribute(v_item)
+
+    def _validate_groups(self, groups):
+        """check each group against its base class"""
+        if "group" not in self.checks:
+            return
+        for v_item in groups:
+            self._check("group", v_item.h5_address, self.validate_group, v_item)
+
+    def _validate_application_definitions(self, groups):
+        """check each group (with a definition field) against its application definition"""
+        if "application_definition" not in self.checks:
+            return
+        for v_item in groups:
+            self._check(
+                "application definition",
+                v_item.h5_address,
+                self.validate_application_definition,
+                v_item,
+            )
+
+    def _definition_items(self):
+        """list the groups with a ``definition`` field (NXentry, NXsubentry)"""
+        groups = []
+        for k in ("/NXentry/definition", "/NXentry/NXsubentry/definition"):
+            groups += [v_item.parent for v_item in self.classpaths.get(k, [])]
+        return groups
+
+    def _attribute_items(self, v_item):
+        """list the cataloged attributes of this (group or dataset) item"""
+        prefix = v_item.h5_address + "@"
+        return [
+            self.addresses[prefix + k]
+            for k in sorted(v_item.h5_object.attrs.keys())
+            if prefix + k in self.addresses
+        ]
 
     # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 
     def build_address_catalog(self):
         """
         find all HDF5 addresses and NeXus class paths in the data file
+
+        The file is cataloged in one depth-first pass.  The links of each
+        group are listed once (``H5Literate``), each object is opened once,
+        and only the names of its attributes are read.  Attribute values
+        are read when first used (see :class:`ValidationItem`).
+
+        Groups are entered only as far as the selected checks need
+        (see ``catalog_scope`` and :mod:`punx.validations`).
+
+        The size and throughput of the pass are kept in ``catalog_statistics``.
         """
-        self._group_address_catalog_(None, self.h5)
+        t0 = time.time()
+        counts = collections.Counter()
+        root = self._add_to_address_catalog_(None, self.h5, counts)
+        stack = [(root, self.h5, "", iter(get_link_names(self.h5)))]
+        while len(stack) > 0:
+            parent, group, path, names = stack[-1]
+            name = next(names, None)
+            if name is None:
+                stack.pop()  # done with this group
+                continue
+            obj = group[name]
+            link_path = path + SLASH + name.decode("utf8", "surrogateescape")
+            v = self._add_to_address_catalog_(parent, obj, counts, link_path)
+            if utils.isHdf5Group(obj) and self._in_catalog_scope(v):
+                stack.append((v, obj, link_path, iter(get_link_names(obj))))
+
+        seconds = time.time() - t0
+        self.catalog_statistics["objects"] = counts["objects"]
+        self.catalog_statistics["attributes"] = counts["attributes"]
+        self.catalog_statistics["seconds"] = seconds
+        self.catalog_statistics["objects_per_second"] = (
+            counts["objects"] / seconds if seconds > 0 else None
+        )
+        logger.log(
+            INFORMATIVE,
+            "cataloged %d objects and %d attributes in %.3f s (%.0f objects/s)",
+            counts["objects"],
+            counts["attributes"],
+            seconds,
+            self.catalog_statistics["objects_per_second"] or 0,
+        )
+
+    def _in_catalog_scope(self, v_group):
+        """Is the content of this group needed by the selected checks?"""
+        if self.catalog_scope == "all":
+            return True
+        if self.catalog_scope == "nexus":
+            return v_group.classpath != CLASSPATH_OF_NON_NEXUS_CONTENT
+        return v_group.classpath in ("", "/NXentry", "/NXentry/NXsubentry")
+
+    def _add_to_address_catalog_(
+        self, parent, obj, counts, link_path=None, added=None
+    ):
+        """
+        catalog this HDF5 object and the names of its attributes
 
-    def _group_address_catalog_(self, parent, group):
+        The new items are appended to the ``added`` list (if given).
         """
-        catalog this group's address and all its contents
+        v = ValidationItem(parent, obj, link_path=link_path)
+        self.addresses[v.h5_address] = v
+        logger.log(INFORMATIVE, "HDF5 address: " + v.h5_address)
+        self._add_classpath_(v)
+        counts["objects"] += 1
+        if added is not None:
+            added.append(v)
+        for k in sorted(obj.attrs.keys()):  # only the names
+            self._add_attribute_to_address_catalog_(v, k, counts, added)
+        return v
+
+    def _add_attribute_to_address_catalog_(self, parent, name, counts, added=None):
+        """catalog the attribute ``name`` (not its value) of this item"""
+        av = ValidationItem(parent, ATTRIBUTE_VALUE_NOT_READ, attribute_name=name)
+        self.addresses[av.h5_address] = av
+        self._add_classpath_(av)
+        counts["attributes"] += 1
+        if added is not None:
+            added.append(av)
+
+    def _add_classpath_(self, v):
+        if v.classpath not in self.classpaths:
+            self.classpaths[v.classpath] = []
+        self.classpaths[v.classpath].append(v)
+        logger.log(INFORMATIVE, "NeXus classpath: " + v.classpath)
+
+    def _refresh_address_catalog(self):
         """
+        catalog the HDF5 objects and attributes added since the last catalog
 
-        def addClasspath(v):
-            if v.classpath not in self.classpaths:
-                self.classpaths[v.classpath] = []
-            self.classpaths[v.classpath].append(v)
-            logger.log(INFORMATIVE, "NeXus classpath: " + v.classpath)
+        Lists the links (and attribute names) of all groups, as
+        :meth:`build_address_catalog` does, but only new objects and
+        attributes are cataloged.  The items of known groups are given
+        the groups of the newly opened file.
 
-        def get_subject(parent, o):
-            v = ValidationItem(parent, o)
-            self.addresses[v.h5_address] = v
-            logger.log(INFORMATIVE, "HDF5 address: " + v.h5_address)
-            addClasspath(v)
-            for k, a in sorted(o.attrs.items()):
-                av = ValidationItem(v, a, attribute_name=k)
-                self.addresses[av.h5_address] = av
-                addClasspath(av)
+        Returns the list of new items, the list of known groups with
+        new content, and the counts of new objects and attributes.
+        """
+        counts = collections.Counter()
+        added = []
+        changed = collections.OrderedDict()  # known groups with new content
+
+        def refresh_item(parent, obj, link_path):
+            """Return the item of obj, cataloged (again) if new."""
+            v = self.addresses.get(link_path)
+            if v is None or (v._link_path or v.h5_address) != link_path:
+                v = self.addresses.get(obj.name)  # such as a soft link
+                if v is not None and not (
+                    v.is_hdf5_group() or v._link_path == link_path
+                ):
+                    v = None
+            if v is None:
+                changed[id(parent)] = parent
+                return self._add_to_address_catalog_(
+                    parent, obj, counts, link_path, added
+                )
+
+            is_group = v.is_hdf5_group()
+            if is_group:
+                v._h5_object = obj  # from the newly opened file
+            if v.classpath == CLASSPATH_OF_NON_NEXUS_CONTENT:
+                # attributes not cataloged, unless the group is now NeXus
+                new_names = []
+                if is_group and parent.classpath != CLASSPATH_OF_NON_NEXUS_CONTENT:
+                    new_names = [k for k in obj.attrs.keys() if k == "NX_class"]
+            else:
+                prefix = v.h5_address + "@"
+                new_names = [
+                    k
+                    for k in sorted(obj.attrs.keys())
+                    if prefix + k not in self.addresses
+                ]
+            if len(new_names) == 0:
+                return v
+            if "NX_class" in new_names and is_group:
+                # now a NeXus group: new class path for it and its content
+                self._forget_address_subtree(v)
+                changed[id(parent)] = parent
+                return self._add_to_address_catalog_(
+                    parent, obj, counts, link_path, added
+                )
+            for k in new_names:
+                self._add_attribute_to_address_catalog_(v, k, counts, added)
+            changed[id(v)] = v
             return v
 
-        obj = get_subject(parent, group)
-        parent = self.classpaths[obj.classpath][-1]
-        for item in group:
-            if utils.isHdf5Group(group[item]):
-                self._group_address_catalog_(parent, group[item])
-            else:
-                get_subject(parent, group[item])
+        root = self.addresses[SLASH]
+        root._h5_object = self.h5
+        prefix = root.h5_address + "@"
+        for k in sorted(self.h5.attrs.keys()):
+            if prefix + k not in self.addresses:
+                self._add_attribute_to_address_catalog_(root, k, counts, added)
+                changed[id(root)] = root
+
+        stack = [(root, self.h5, "", iter(get_link_names(self.h5)))]
+        while len(stack) > 0:
+            parent, group, path, names = stack[-1]
+            name = next(names, None)
+            if name is None:
+                stack.pop()  # done with this group
+                continue
+            obj = group[name]
+            link_path = path + SLASH + name.decode("utf8", "surrogateescape")
+            v = refresh_item(parent, obj, link_path)
+            if utils.isHdf5Group(obj) and self._in_catalog_scope(v):
+                stack.append((v, obj, link_path, iter(get_link_names(obj))))
+
+        new_ids = set(id(v) for v in added)
+        changed_groups = [v for k, v in changed.items() if k not in new_ids]
+        return added, changed_groups, counts
+
+    def _forget_address_subtree(self, v_item):
+        """remove this item, its attributes, and its content from the catalog"""
+
+        def in_subtree(v):
+            while v is not None:
+                if v is v_item:
+                    return True
+                v = v.parent
+            return False
+
+        for k in [k for k, v in self.addresses.items() if in_subtree(v)]:
+            del self.addresses[k]
+        for classpath, v_list in list(self.classpaths.items()):
+            v_list[:] = [v for v in v_list if not in_subtree(v)]
+            if len(v_list) == 0:
+                del self.classpaths[classpath]
+        address = v_item.h5_address
+        for key in list(self._check_findings.keys()):
+            h5_address = key[1] or ""
+            if h5_address == address or h5_address.startswith(
+                (address + SLASH, address + "@")
+            ):
+                self._forget_findings(self._check_findings.pop(key))
 
     def validate_item_name(self, v_item):
         from .validations import item_name
@@ -368,13 +835,12 @@ class Data_File_Validator(object):
         in the `NXentry` group of an application definition.
         This field is not present in base classes.
         """
-        nxdl_def = self.manager.classes.get(nx_class, None)
-        if nxdl_def is None:
+        category = self.manager.class_category(nx_class)  # not parsed yet
+        if category is None or category == "applications":
             return False
-        if nxdl_def.category == "applications":
-            return False
-        if nxdl_def.category == "base_classes":
+        if category == "base_classes":
             return True
+        nxdl_def = self.manager.classes.get(nx_class)
         # now, need to work at it a bit
         # *Should* only be one NXentry group but that is not a rule.
         if (
@@ -389,31 +855,121 @@ class Data_File_Validator(object):
         return True
 
 
+def get_link_names(group):
+    """
+    Return the names of the links in the HDF5 ``group``.
+
+    The names are listed in one ``H5Literate`` call, in the same
+    order as ``list(group)`` (creation order, if tracked).
+    """
+    idx_type = h5py.h5.INDEX_NAME
+    crt_order = group.id.get_create_plist().get_link_creation_order()
+    if crt_order & h5py.h5p.CRT_ORDER_TRACKED:
+        idx_type = h5py.h5.INDEX_CRT_ORDER
+    names = []
+    group.id.links.iterate(names.append, idx_type=idx_type)
+    return names
+
+
+def _intern(text):
+    """Return the interned ``text`` (if it is a str)."""
+    if isinstance(text, str):
+        return sys.intern(text)
+    return text
+
+
 class ValidationItem(object):
 
-    """HDF5 data file object for validation"""
+    """
+    HDF5 data file object for validation
+
+    For an HDF5 attribute, ``obj`` is the attribute value or
+    ``ATTRIBUTE_VALUE_NOT_READ`` to read it when ``h5_object``
+    is first used.
+
+    A large file has many of these, so they are kept small:
+    no instance ``__dict__``, interned ``name`` and ``classpath`` strings
+    (shared by all items with the same name or class path),
+    and no dictionary of findings (the findings are kept in the
+    validator's :class:`~punx.finding.Findings`).
+    Given its ``link_path`` (from the file root), an HDF5 dataset
+    is not kept open (an open HDF5 dataset holds about 13 kB in the
+    HDF5 library, ten times more than a group);
+    ``h5_object`` opens it again when used.
+    """
 
-    def __init__(self, parent, obj, attribute_name=None):
+    __slots__ = (
+        "parent",
+        "name",
+        "h5_address",
+        "classpath",
+        "nx_class",  # only for NeXus groups
+        "_h5_object",
+        "_link_path",  # only if not the same as h5_address
+        "_object_type",
+        "_validations",  # Findings with a finding of this item (or None)
+    )
+
+    def __init__(self, parent, obj, attribute_name=None, link_path=None):
         assert isinstance(parent, (ValidationItem, type(None)))
         self.parent = parent
-        self.validations = {}  # validation findings go here
-        self.h5_object = obj
+        self._validations = None
+        self._object_type = None
+        self._h5_object = obj
+        self._link_path = None
         if hasattr(obj, "name"):
-            self.h5_address = obj.name
-            if obj.name == SLASH:
+            self.h5_address = obj.name  # H5Iget_name(), not cheap
+            if self.h5_address == SLASH:
                 self.name = SLASH
             else:
-                self.name = obj.name.split(SLASH)[-1]
-            self.classpath = self.determine_NeXus_classpath()
+                self.name = _intern(self.h5_address.split(SLASH)[-1])
+            self.classpath = _intern(self.determine_NeXus_classpath())
+            if link_path is not None and utils.isHdf5Dataset(obj):
+                self._h5_object = HDF5_OBJECT_NOT_OPEN
+                if link_path != self.h5_address:  # such as a soft link
+                    self._link_path = link_path
         else:
-            self.name = attribute_name
+            self.name = _intern(attribute_name)
             if parent.classpath == CLASSPATH_OF_NON_NEXUS_CONTENT:
                 self.h5_address = None
                 self.classpath = CLASSPATH_OF_NON_NEXUS_CONTENT
             else:
                 self.h5_address = "%s@%s" % (parent.h5_address, self.name)
-                self.classpath = str(parent.classpath) + "@" + str(self.name)
-        self.object_type = self.identify_object_type()
+                self.classpath = _intern(str(parent.classpath) + "@" + str(self.name))
+
+    @property
+    def h5_object(self):
+        """HDF5 object (or value of HDF5 attribute)"""
+        obj = self._h5_object
+        if obj is HDF5_OBJECT_NOT_OPEN:
+            root = self.parent
+            while root.parent is not None:
+                root = root.parent
+            obj = root.h5_object[self._link_path or self.h5_address]
+        elif obj is ATTRIBUTE_VALUE_NOT_READ:
+            obj = self._h5_object = self.parent.h5_object.attrs[self.name]
+        return obj
+
+    def is_hdf5_group(self):
+        """Is this an HDF5 group (or the file root)?  Does not open a dataset."""
+        obj = self._h5_object
+        if obj is HDF5_OBJECT_NOT_OPEN or obj is ATTRIBUTE_VALUE_NOT_READ:
+            return False
+        return utils.isHdf5Group(obj) or utils.isHdf5FileObject(obj)
+
+    @property
+    def validations(self):
+        """dictionary (by test name) of validation findings of this item"""
+        if self._validations is None:
+            return {}
+        return self._validations.by_address(self.h5_address)
+
+    @property
+    def object_type(self):
+        """kind of HDF5 object (see :meth:`identify_object_type`)"""
+        if self._object_type is None:
+            self._object_type = self.identify_object_type()
+        return self._object_type
 
     def __str__(self, *args, **kwargs):
         try:
@@ -0,0 +1,111 @@
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2022, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+checks of a NeXus data file, by name
+
+:class:`~punx.validate.Data_File_Validator` runs the checks selected
+(by default, all of them) in the order of ``CHECKS``.
+The catalog of the data file (see
+:meth:`~punx.validate.Data_File_Validator.build_address_catalog`)
+has only the part of the file the selected checks need:
+
+=======  ===================================================================
+catalog  content
+=======  ===================================================================
+all      every group, field, and attribute
+nexus    not the content of groups that are not NeXus groups (no NX_class)
+entries  the root, NXentry, and NXsubentry groups and their direct content
+=======  ===================================================================
+
+.. autosummary::
+
+   ~Check
+   ~CHECKS
+   ~select_checks
+   ~catalog_scope
+
+"""
+
+import collections
+
+
+CATALOG_SCOPES = ("entries", "nexus", "all")  # from smallest to complete
+
+
+class Check(object):
+    """
+    one check of a data file
+
+    :param str name: name of the check (such as ``default_plot``)
+    :param str catalog: part of the file needed (see ``CATALOG_SCOPES``)
+    :param str description: what is checked
+    """
+
+    def __init__(self, name, catalog, description):
+        self.name = name
+        self.catalog = catalog
+        self.description = description
+
+
+CHECKS = collections.OrderedDict(
+    (check.name, check)
+    for check in (
+        Check(
+            "item_name",
+            "all",
+            "names of groups, fields, and attributes",
+        ),
+        Check(
+            "attribute",
+            "all",
+            "values of attributes",
+        ),
+        Check(
+            "group",
+            "all",
+            "content of each group with its NeXus base class",
+        ),
+        Check(
+            "application_definition",
+            "entries",
+            "content of each NXentry with its application definition",
+        ),
+        Check(
+            "default_plot",
+            "nexus",
+            "description of the default plot",
+        ),
+    )
+)
+"""all checks, by name, in the order run"""
+
+
+def select_checks(enable=None, disable=None):
+    """
+    Return the names of the selected checks (a tuple, in the order run).
+
+    :param [str] enable: (optional) names of the checks to run
+        (default: all checks)
+    :param [str] disable: (optional) names of the checks not to run
+
+    Raises ``ValueError`` for an unknown name.
+    """
+    for name in list(enable or []) + list(disable or []):
+        if name not in CHECKS:
+            raise ValueError(f"unknown check '{name}', use: {', '.join(CHECKS)}")
+    enabled = set(enable or CHECKS) - set(disable or [])
+    return tuple(name for name in CHECKS if name in enabled)
+
+
+def catalog_scope(checks):
+    """Return the smallest catalog (see ``CATALOG_SCOPES``) these checks need."""
+    needed = [CATALOG_SCOPES.index(CHECKS[name].catalog) for name in checks]
+    return CATALOG_SCOPES[max(needed, default=0)]
@@ -13,6 +13,14 @@ from .. import finding
 # from .. import utils
 
 
+def group_minOccurs(base_class, group_object):
+    """minOccurs of a group (``group_object``) of this base class"""
+    minOccurs = 0
+    if hasattr(base_class, "definition"):  # application definition
+        minOccurs = 1
+    return int(group_object.attributes.get("minOccurs", minOccurs))
+
+
 def verify(validator, v_item, base_class):
     """
     Verify items specified in base class NXDL with data file
@@ -48,11 +56,10 @@ def verify(validator, v_item, base_class):
         validator.record_finding(v_item, test, f, t)
 
         # ---------- this code is in the wrong place: to nxdl_manager -----
-        minOccurs = 0
-        if hasattr(base_class, "definition"):  # application definition
-            minOccurs = 1
-        minOccurs = int(group_object.attributes.get("minOccurs", minOccurs))
-        group_object.minOccurs = minOccurs
+        # NXDL content is shared by validators, note what this validation found
+        validator.nxdl_minOccurs[group_object] = group_minOccurs(
+            base_class, group_object
+        )
         # ---------------------------------------------------------
         # FIXME: report if required item is present, name could be flexible
 
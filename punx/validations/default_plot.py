@@ -15,6 +15,7 @@ import collections
 
 from .. import finding
 from .. import utils
+from . import base_class_items_in_hdf5_group
 
 
 def verify(validator):
@@ -36,10 +37,15 @@ def verify(validator):
             break  # no need to look further
     if status is None:
         c = "no default plot described"
-        data_group = validator.manager.classes["NXentry"].groups["data"]
-        if hasattr(data_group, "minOccurs"):
-            minOccurs = data_group.minOccurs
-        else:
+        nxentry = validator.manager.classes["NXentry"]
+        data_group = nxentry.groups["data"]
+        minOccurs = validator.nxdl_minOccurs.get(data_group)
+        if minOccurs is None and "/NXentry" in validator.classpaths:
+            # group check not run: as it would have noted
+            minOccurs = base_class_items_in_hdf5_group.group_minOccurs(
+                nxentry, data_group
+            )
+        if minOccurs is None:
             minOccurs = 1
         if minOccurs > 0:
             status = finding.ERROR
@@ -9,7 +9,6 @@
 # -----------------------------------------------------------------------------
 
 
-import re
 import collections
 
 from .. import finding
@@ -101,24 +100,15 @@ def verify(validator, v_item):
 
 def handle_NX_class(validator, v_item):
     """validate the value of the NX_class attribute"""
-    nxdl = validator.manager.nxdl_file_set.schema_manager.nxdl
     key = "validNXClassName"
-    patterns = collections.OrderedDict()
-    for i, p in enumerate(nxdl.patterns[key].re_list):
-        patterns[key + "-" + str(i)] = p
-
-    status = finding.ERROR
-    for k, p in patterns.items():
-        if k not in validator.regexp_cache:
-            validator.regexp_cache[k] = re.compile("^" + p + "$")
-        s = utils.decode_byte_string(v_item.h5_object)
-        m = validator.regexp_cache[k].match(s)
-        matches = m is not None and m.string == s
-        msg = "checking %s with %s: %s" % (v_item.h5_address, k, str(matches))
-        logger.debug(msg)
-        if matches:
-            status = finding.OK
-            break
+    matcher = get_name_matcher(validator, key)
+
+    s = utils.decode_byte_string(v_item.h5_object)
+    k = match_name(validator, s, key)
+    logger.debug("checking %s with %s: %s", v_item.h5_address, key, k is not None)
+    status = finding.ERROR if k is None else finding.OK
+    # report the matching pattern (or, if none, the last one tried)
+    p = matcher.patterns[k or list(matcher.patterns.keys())[-1]]
     validator.record_finding(v_item, TEST_NAME, status, "pattern: " + p)
 
 
@@ -127,10 +117,7 @@ def handle_any_attribute(validator, v_item, key=None):
     k = validItemName_match_key(validator, v_item.name)
     status = finding.TF_RESULT[k is not None]
     k = k or "no matching pattern found"
-    key = key or "validItemName"
-    f = finding.Finding(v_item.h5_address, TEST_NAME, status, k)  # noqa
-    validator.validations.append(f)
-    v_item.validations[key] = f
+    validator.record_finding(v_item, TEST_NAME, status, k)
 
 
 def getValidItemNamePatterns(validator, key=None):
@@ -149,19 +136,55 @@ def getValidItemNamePatterns(validator, key=None):
     return patterns
 
 
+def getValidNXClassNamePatterns(validator, key=None):
+    """get regular expression patterns for validNXClassName"""
+    key = key or "validNXClassName"
+    patterns = collections.OrderedDict()
+    nxdl = validator.manager.nxdl_file_set.schema_manager.nxdl
+    for i, p in enumerate(nxdl.patterns[key].re_list):
+        patterns[key + "-" + str(i)] = p
+    return patterns
+
+
+def get_name_matcher(validator, key="validItemName"):
+    """
+    Return the (precompiled) name matcher of this validator's schema.
+
+    See :class:`~punx.schema_manager.Schema_Name_Matcher`.
+    The matcher (and its memo of names) is built once for each
+    schema (file set), then shared by all validators of that file set.
+    """
+    matcher = validator.name_matchers.get(key)
+    if matcher is None:
+        schema_manager = validator.manager.nxdl_file_set.schema_manager
+        matcher = schema_manager.name_matchers.get(key)
+        if matcher is None:
+            patterns = {
+                "validItemName": getValidItemNamePatterns,
+                "validNXClassName": getValidNXClassNamePatterns,
+            }[key](validator)
+            matcher = schema_manager.get_name_matcher(key, patterns)
+        validator.name_matchers[key] = matcher
+    return matcher
+
+
+def match_name(validator, name, key="validItemName"):
+    """
+    Return the label of the pattern (of ``key``) that matches ``name``, or None.
+
+    The lookup is counted for this validator
+    (see :meth:`~punx.validate.Data_File_Validator.name_memo_statistics`).
+    """
+    counts = validator.name_memo_counts.setdefault(key, [0, 0])
+    return get_name_matcher(validator, key).match(name, counts)
+
+
 def validItemName_match_key(validator, text):
     """Return the validItemName key that matches text, or None"""
-    patterns = getValidItemNamePatterns(validator)
-    for k, p in patterns.items():
-        if k not in validator.regexp_cache:
-            validator.regexp_cache[k] = re.compile("^" + p + "$")
-
-        s = utils.decode_byte_string(text)
-        m = validator.regexp_cache[k].match(s)
-        matches = m is not None and m.string == s
-        logger.debug("checking %s with %s: %s", s, k, str(matches))
-        if matches:
-            return k
+    s = utils.decode_byte_string(text)
+    k = match_name(validator, s)
+    logger.debug("checking %s with validItemName: %s", s, k)
+    return k
 
 
 def handle_groups_and_fields(validator, v_item):
@@ -30,9 +30,9 @@ def validate_NX_class_attribute(validator, v_item, nx_class):
     if known:
         as_base = validator.usedAsBaseClass(nx_class)
         status = finding.TF_RESULT[as_base]
-        # ??? validator.manager.classes[nx_class].category
         msg = nx_class
-        if validator.manager.classes[nx_class].category == "base_classes":
+        # the category is in the index of NXDL classes, no need to parse the class
+        if validator.manager.class_category(nx_class) == "base_classes":
             msg += ": known NeXus base class"
         else:
             msg += ": known NeXus contributed definition used as base class"
@@ -0,0 +1,32 @@
+import pytest
+
+from ... import validations
+
+
+def test_select_checks():
+    all_checks = tuple(validations.CHECKS)
+    assert validations.select_checks() == all_checks
+    assert validations.select_checks(["default_plot", "item_name"]) == (
+        "item_name",  # in the order run
+        "default_plot",
+    )
+    assert validations.select_checks(disable=["group"]) == tuple(
+        name for name in all_checks if name != "group"
+    )
+    assert validations.select_checks(["group"], ["group"]) == ()
+    with pytest.raises(ValueError):
+        validations.select_checks(["no such check"])
+
+
+@pytest.mark.parametrize(
+    "checks, scope",
+    [
+        [[], "entries"],
+        [["application_definition"], "entries"],
+        [["application_definition", "default_plot"], "nexus"],
+        [["default_plot", "item_name"], "all"],
+        [list(validations.CHECKS), "all"],
+    ],
+)
+def test_catalog_scope(checks, scope):
+    assert validations.catalog_scope(checks) == scope